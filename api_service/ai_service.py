@@ -1,18 +1,59 @@
+import asyncio
 import base64
+import contextvars
 import json
 import logging
 import os
+import hashlib
 import re
+import threading
+import time
 import traceback
-
-import httpx
-
+from concurrent.futures import ThreadPoolExecutor
+
+from api_service import http_client
+from api_service.company_research import (
+    RESEARCH_SYSTEM_INSTRUCTION,
+    build_research_prompt,
+    get_company_research,
+    is_company_research_enabled,
+    normalize_company_name,
+)
+from api_service.hedging import hedged_call, hedged_call_async
+from api_service.metrics import stage
 from api_service.model_config import (
     get_base_url,
     get_default_model,
+    get_hedge_settings,
     is_allowed_model,
     load_model_config,
 )
+from api_service.project_index import get_project_index
+from api_service.project_ranking import rank_projects
+from api_service.rate_limit import model_slot, model_slot_async
+from api_service.resilience import (
+    OpenRouterError,
+    call_with_retries,
+    call_with_retries_async,
+    parse_retry_after,
+    stream_with_retries,
+    stream_with_retries_async,
+)
+from api_service.response_cache import (
+    make_cache_key,
+    run_cached,
+    run_cached_async,
+    stream_cached,
+    stream_cached_async,
+)
+from api_service.usage import (
+    current_usage_summary,
+    estimate_tokens,
+    record_openrouter_call,
+    track_usage,
+    usage_scope,
+)
+from api_service.web_search import decide_for_cover_letter, decide_for_questions, record_call_latency
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -30,6 +71,7 @@ if not OPENROUTER_API_KEY:
     logger.warning("OPENROUTER_API_KEY not set in environment")
 
 API_SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESUME_PATH = os.path.join(API_SERVICE_DIR, "..", "static", "resume.pdf")
 OPTIONAL_PERSONAL_INFO_FIELDS = {"address", "linkedin", "website"}
 WEB_SEARCH_TOOL = {
     "type": "openrouter:web_search",
@@ -39,75 +81,62 @@ WEB_SEARCH_TOOL = {
         "search_context_size": "low",
     },
 }
-COMPANY_RESEARCH_QUESTION_PATTERN = re.compile(
-    r"\b("
-    r"why\s+(?:do\s+you\s+)?(?:want|interested)|"
-    r"why\s+(?:this\s+)?company|"
-    r"why\s+(?:are\s+you\s+)?(?:interested\s+in\s+)?(?:us|our)|"
-    r"what\s+do\s+you\s+know\s+about|"
-    r"company|product|mission|team|culture"
-    r")\b",
-    re.IGNORECASE,
-)
+# Question fan-out: 0 keeps every question in a single call.
+DEFAULT_QUESTION_CHUNK_SIZE = 0
+DEFAULT_QUESTION_CONCURRENCY = 4
+DEFAULT_QUESTION_RETRY_ROUNDS = 1
+# Stands in for the company research in a prepared prompt until the response cache misses.
+PENDING_RESEARCH = "<pending company research>"
+PENDING_RESEARCH_SECTION = f"\n\nCompany Research:\n{PENDING_RESEARCH}"
 
 
-def load_projects():
-    """Load projects from constants.js and format them for the prompt."""
+def _env_int(name, default):
     try:
-        constants_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "..", "static", "constants.js"
-        )
-        logger.info(f"Loading projects from: {constants_path}")
+        return max(0, int(os.environ.get(name, default)))
+    except ValueError:
+        logger.warning(f"{name} is not an integer; using the default")
+        return default
 
-        if not os.path.exists(constants_path):
-            logger.error(f"Constants file not found at: {constants_path}")
-            return ""
 
-        with open(constants_path, "r", encoding="utf-8") as file:
-            content = file.read()
+def get_question_chunk_size():
+    return _env_int("QUESTION_CHUNK_SIZE", DEFAULT_QUESTION_CHUNK_SIZE)
 
-        start_match = re.search(r"export\s+const\s+projects\s*=\s*\[", content, re.DOTALL)
-        if not start_match:
-            logger.warning("Could not find projects array in constants.js")
-            return ""
 
-        start_pos = start_match.end() - 1
-        bracket_count = 0
-        i = start_pos
-
-        while i < len(content):
-            if content[i] == "[":
-                bracket_count += 1
-            elif content[i] == "]":
-                bracket_count -= 1
-                if bracket_count == 0:
-                    array_content = content[start_pos + 1 : i].strip()
-                    break
-            i += 1
-        else:
-            logger.warning("Could not find matching closing bracket for projects array")
-            return ""
+def get_question_concurrency():
+    return max(1, _env_int("QUESTION_CONCURRENCY", DEFAULT_QUESTION_CONCURRENCY))
 
-        projects_text = "\n\n".join(
-            [
-                "Full project evidence bank:",
-                "Use every project below as candidate evidence. Internally rank the projects against the job description or question, then cite the strongest matching projects in the final answer.",
-                array_content,
-            ]
-        )
-        logger.info(f"Loaded projects, content length: {len(projects_text)}")
-        return projects_text
-    except Exception as exc:
-        logger.error(f"Error loading projects: {exc}")
-        logger.error(traceback.format_exc())
-        return ""
+
+def get_question_retry_rounds():
+    return _env_int("QUESTION_RETRY_ROUNDS", DEFAULT_QUESTION_RETRY_ROUNDS)
+
+
+def load_projects(ranking_query="", project_limit=None, debug_info=None):
+    """
+    Format the most relevant projects from the cached index for the prompt.
+
+    ProjectIndexError propagates: a broken project bank fails the request
+    instead of quietly sending prompts without project evidence.
+    """
+    ranking = rank_projects(ranking_query, project_limit)
+
+    if debug_info is not None:
+        debug_info["projects"] = ranking["picks"]
+        debug_info["projectCount"] = {"selected": len(ranking["selected"]), "total": ranking["total"]}
+
+    project_blocks = ranking["index"]["project_blocks"]
+    if len(ranking["selected"]) == ranking["total"]:
+        heading = "Full project evidence bank:"
+        guidance = "Use every project below as candidate evidence. Internally rank the projects against the job description or question, then cite the strongest matching projects in the final answer."
+    else:
+        heading = f"Most relevant projects from the evidence bank ({len(ranking['selected'])} of {ranking['total']}):"
+        guidance = "These projects were preselected as the closest matches to the job description or question. Use them as candidate evidence and cite the strongest matching projects in the final answer."
+
+    return "\n\n".join([heading, guidance, *(project_blocks[position] for position in ranking["selected"])])
 
 
 def load_resume_pdf():
     """Read resume bytes from static/resume.pdf."""
-    resume_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "..", "static", "resume.pdf"
-    )
+    resume_path = RESUME_PATH
     logger.info(f"Loading resume from: {resume_path}")
     if not os.path.exists(resume_path):
         raise FileNotFoundError(f"Resume file not found at: {resume_path}")
@@ -162,17 +191,31 @@ def build_personal_info_text(personal_info):
     return "About me:\n" + "\n".join(lines)
 
 
-def build_application_context(job_description, company_name, custom_instructions, personal_info):
+@stage("build_application_context")
+def build_application_context(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    ranking_query=None,
+    project_limit=None,
+    debug_info=None,
+    company_research=None,
+):
     sections = ["My resume is attached as a PDF file in the request."]
 
     personal_info_text = build_personal_info_text(personal_info)
     if personal_info_text:
         sections.append(personal_info_text)
 
-    projects_text = load_projects()
+    if ranking_query is None:
+        ranking_query = "\n".join([job_description or "", custom_instructions or ""])
+    projects_text = load_projects(ranking_query, project_limit, debug_info)
     if projects_text:
         logger.info("Projects loaded successfully")
         sections.append(projects_text)
+        if debug_info is not None:
+            debug_info["projectTokensEstimate"] = estimate_tokens(projects_text)
     else:
         logger.warning("No projects loaded")
 
@@ -182,25 +225,69 @@ def build_application_context(job_description, company_name, custom_instructions
     if company_name:
         sections.append(f"Company Name: {company_name.strip()}")
 
+    if company_research:
+        sections.append(f"Company Research:\n{company_research}")
+
     if custom_instructions:
         sections.append(f"Additional Important Instruction you need to follow:\n{custom_instructions.strip()}")
 
     return "\n\n".join(section for section in sections if section)
 
 
+# Encoded resume keyed on (mtime_ns, size) so requests only pay for an
+# os.stat unless static/resume.pdf actually changes.
+_RESUME_CACHE = {"signature": None, "data_url": None, "fingerprint": None}
+_RESUME_CACHE_LOCK = threading.Lock()
+
+
+def _resume_signature():
+    try:
+        stat_result = os.stat(RESUME_PATH)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Resume file not found at: {RESUME_PATH}") from None
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def _load_resume_cache():
+    global _RESUME_CACHE
+    signature = _resume_signature()
+    cache = _RESUME_CACHE
+    if cache["signature"] == signature:
+        return cache
+
+    with _RESUME_CACHE_LOCK:
+        if _RESUME_CACHE["signature"] != signature:
+            resume_bytes = load_resume_pdf()
+            resume_data_b64 = base64.b64encode(resume_bytes).decode("utf-8")
+            # Swap in a new dict so readers never see a half-updated entry.
+            _RESUME_CACHE = {
+                "signature": signature,
+                "data_url": f"data:application/pdf;base64,{resume_data_b64}",
+                "fingerprint": hashlib.sha256(resume_bytes).hexdigest(),
+            }
+            logger.info(f"Cached encoded resume (mtime_ns={signature[0]}, size={signature[1]})")
+        return _RESUME_CACHE
+
+
 def build_resume_data_url():
-    resume_bytes = load_resume_pdf()
-    resume_data_b64 = base64.b64encode(resume_bytes).decode("utf-8")
-    return f"data:application/pdf;base64,{resume_data_b64}"
+    return _load_resume_cache()["data_url"]
 
 
-def should_enable_question_web_search(questions):
-    """Return True when application questions ask for company-specific context."""
-    return True
-    # return any(COMPANY_RESEARCH_QUESTION_PATTERN.search(question) for question in questions)
+def get_resume_fingerprint():
+    """Return the SHA-256 of the current resume bytes."""
+    return _load_resume_cache()["fingerprint"]
+
+
+def preload_resume():
+    """Warm the resume cache at worker startup so the first request doesn't pay for it."""
+    try:
+        _load_resume_cache()
+    except FileNotFoundError as exc:
+        logger.warning(f"Resume not preloaded: {exc}")
 
 
-def call_openrouter(system_instruction, prompt, selected_model, enable_web_search=False):
+def build_openrouter_request(system_instruction, prompt, selected_model, enable_web_search=False, attach_resume=True):
+    """Validate the call and return the endpoint, headers and payload for a chat completion."""
     if not OPENROUTER_API_KEY:
         raise RuntimeError("OPENROUTER_API_KEY not configured")
 
@@ -213,19 +300,22 @@ def call_openrouter(system_instruction, prompt, selected_model, enable_web_searc
             {"role": "system", "content": system_instruction},
             {
                 "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                    {
-                        "type": "file",
-                        "file": {
-                            "filename": "resume.pdf",
-                            "file_data": build_resume_data_url(),
-                        },
-                    },
-                ],
+                "content": [{"type": "text", "text": prompt}],
             },
         ],
+        # Ask for token counts and cost in the response (the last event of a stream).
+        "usage": {"include": True},
     }
+    if attach_resume:
+        payload["messages"][1]["content"].append(
+            {
+                "type": "file",
+                "file": {
+                    "filename": "resume.pdf",
+                    "file_data": build_resume_data_url(),
+                },
+            }
+        )
     if enable_web_search:
         payload["tools"] = [WEB_SEARCH_TOOL]
 
@@ -241,14 +331,18 @@ def call_openrouter(system_instruction, prompt, selected_model, enable_web_searc
         headers["X-Title"] = app_title
 
     endpoint = f"{get_base_url().rstrip('/')}/chat/completions"
-    logger.info(f"Calling OpenRouter chat completions at: {endpoint}")
-    response = httpx.post(endpoint, headers=headers, json=payload, timeout=120.0)
+    return endpoint, headers, payload
+
 
+def parse_openrouter_response(response):
+    """Extract the assistant text from an OpenRouter chat completion response."""
     if response.status_code >= 400:
         logger.error(f"OpenRouter API error {response.status_code}: {response.text}")
-        raise RuntimeError(f"OpenRouter API request failed with status {response.status_code}")
+        raise OpenRouterError(response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+    return parse_openrouter_response_data(response.json())
 
-    response_data = response.json()
+
+def parse_openrouter_response_data(response_data):
     choices = response_data.get("choices") or []
     if not choices:
         logger.error("OpenRouter response did not include any choices")
@@ -263,6 +357,297 @@ def call_openrouter(system_instruction, prompt, selected_model, enable_web_searc
     return response_text
 
 
+def record_openrouter_usage(
+    model, response_data, seconds, system_instruction, prompt, enable_web_search, attach_resume, error=None
+):
+    # Only generation calls carry the resume; research calls would skew the with-search average.
+    if error is None and attach_resume:
+        record_call_latency(enable_web_search, seconds)
+    record_openrouter_call(
+        model,
+        response_data,
+        seconds,
+        enable_web_search,
+        estimate_tokens(system_instruction) + estimate_tokens(prompt),
+        attach_resume,
+        error,
+    )
+
+
+def finish_openrouter_call(response, model, seconds, system_instruction, prompt, enable_web_search, attach_resume):
+    """Record the call's latency and token usage, then return its text."""
+    if response.status_code >= 400:
+        record_openrouter_usage(
+            model, None, seconds, system_instruction, prompt, enable_web_search, attach_resume,
+            error=f"HTTP {response.status_code}",
+        )
+        return parse_openrouter_response(response)
+
+    response_data = response.json()
+    record_openrouter_usage(model, response_data, seconds, system_instruction, prompt, enable_web_search, attach_resume)
+    return parse_openrouter_response_data(response_data)
+
+
+def _call_openrouter_model(system_instruction, prompt, model, enable_web_search, attach_resume):
+    endpoint, headers, payload = build_openrouter_request(
+        system_instruction, prompt, model, enable_web_search, attach_resume
+    )
+    logger.info(f"Calling OpenRouter chat completions at: {endpoint}")
+    with model_slot(model), stage("openrouter_call"):
+        started = time.perf_counter()
+        response = http_client.post(endpoint, model, headers=headers, json=payload)
+        return finish_openrouter_call(
+            response, model, time.perf_counter() - started, system_instruction, prompt, enable_web_search,
+            attach_resume,
+        )
+
+
+async def _call_openrouter_model_async(system_instruction, prompt, model, enable_web_search, attach_resume):
+    endpoint, headers, payload = build_openrouter_request(
+        system_instruction, prompt, model, enable_web_search, attach_resume
+    )
+    logger.info(f"Calling OpenRouter chat completions (async) at: {endpoint}")
+    async with model_slot_async(model):
+        with stage("openrouter_call"):
+            started = time.perf_counter()
+            response = await http_client.apost(endpoint, model, headers=headers, json=payload)
+            return finish_openrouter_call(
+                response, model, time.perf_counter() - started, system_instruction, prompt, enable_web_search,
+                attach_resume,
+            )
+
+
+def call_openrouter(system_instruction, prompt, selected_model, enable_web_search=False, attach_resume=True):
+    """
+    Return the completion text.
+
+    Transient failures are retried with backoff, a model behind an open
+    circuit is routed to its fallback, and hedged models race the fallback
+    after their latency deadline.
+    """
+    hedge_settings = get_hedge_settings(selected_model)
+    if hedge_settings is not None:
+        # The async path can cancel the losing request; a blocking call could not be stopped.
+        call = async_openrouter_call(system_instruction, prompt, enable_web_search, attach_resume)
+        return hedged_call(selected_model, hedge_settings, call)
+
+    return call_with_retries(
+        selected_model,
+        lambda target: _call_openrouter_model(system_instruction, prompt, target, enable_web_search, attach_resume),
+    )
+
+
+def async_openrouter_call(system_instruction, prompt, enable_web_search, attach_resume):
+    """Return call(model), a coroutine function running one retried OpenRouter call."""
+    def call(model):
+        return call_with_retries_async(
+            model,
+            lambda target: _call_openrouter_model_async(
+                system_instruction, prompt, target, enable_web_search, attach_resume
+            ),
+        )
+
+    return call
+
+
+async def call_openrouter_async(system_instruction, prompt, selected_model, enable_web_search=False, attach_resume=True):
+    call = async_openrouter_call(system_instruction, prompt, enable_web_search, attach_resume)
+    hedge_settings = get_hedge_settings(selected_model)
+    if hedge_settings is None:
+        return await call(selected_model)
+    return await hedged_call_async(selected_model, hedge_settings, call)
+
+
+def parse_openrouter_delta(content):
+    """Like parse_openrouter_content, but keeps the whitespace between streamed tokens."""
+    if content is None:
+        return ""
+
+    if isinstance(content, str):
+        return content
+
+    if isinstance(content, dict):
+        text_value = content.get("text")
+        return text_value if isinstance(text_value, str) else ""
+
+    if isinstance(content, list):
+        return "".join(
+            item["text"] for item in content if isinstance(item, dict) and isinstance(item.get("text"), str)
+        )
+
+    return str(content)
+
+
+def parse_stream_event(line):
+    """Return the JSON event from one SSE line of a streamed completion, or None."""
+    if not line or not line.startswith("data:"):
+        return None
+
+    data = line[len("data:"):].strip()
+    if not data or data == "[DONE]":
+        return None
+
+    event = json.loads(data)
+    if event.get("error"):
+        error = event["error"]
+        message = error.get("message") if isinstance(error, dict) else str(error)
+        logger.error(f"OpenRouter stream error: {message}")
+        raise RuntimeError(f"OpenRouter stream failed: {message}")
+    return event
+
+
+def stream_event_delta(event):
+    choices = (event or {}).get("choices") or []
+    if not choices:
+        return None
+
+    return parse_openrouter_delta((choices[0].get("delta") or {}).get("content"))
+
+
+def parse_stream_line(line):
+    """Return the content delta from one SSE line of a streamed completion, or None."""
+    return stream_event_delta(parse_stream_event(line))
+
+
+class StreamUsage:
+    """The served model and usage block of a stream; OpenRouter sends usage in the last event."""
+
+    def __init__(self):
+        self.response_data = {}
+
+    def feed(self, event):
+        if not event:
+            return
+        for key in ("model", "provider", "usage"):
+            if event.get(key):
+                self.response_data[key] = event[key]
+
+
+class StreamTextNormalizer:
+    """
+    Apply the non-streaming post-processing to a stream of text deltas.
+
+    Leading and trailing whitespace is dropped the same way str.strip() would
+    drop it from the full text, and em dashes are removed per chunk.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.pending_whitespace = ""
+
+    def feed(self, delta):
+        chunk = strip_em_dashes(delta)
+        if not self.parts:
+            chunk = chunk.lstrip()
+
+        stripped = chunk.rstrip()
+        if not stripped:
+            if self.parts:
+                self.pending_whitespace += chunk
+            return ""
+
+        emitted = self.pending_whitespace + stripped
+        self.pending_whitespace = chunk[len(stripped):]
+        self.parts.append(emitted)
+        return emitted
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+def _raise_stream_error(response, body):
+    logger.error(f"OpenRouter API error {response.status_code}: {body.decode('utf-8', 'replace')}")
+    raise OpenRouterError(response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+
+
+def _stream_openrouter_model(system_instruction, prompt, selected_model, enable_web_search):
+    endpoint, headers, payload = build_openrouter_request(
+        system_instruction, prompt, selected_model, enable_web_search
+    )
+    payload["stream"] = True
+    normalizer = StreamTextNormalizer()
+    usage = StreamUsage()
+
+    logger.info(f"Streaming OpenRouter chat completions from: {endpoint}")
+    with model_slot(selected_model), stage("openrouter_call"):
+        started = time.perf_counter()
+        with http_client.stream("POST", endpoint, selected_model, headers=headers, json=payload) as response:
+            if response.status_code >= 400:
+                record_openrouter_usage(
+                    selected_model, None, time.perf_counter() - started, system_instruction, prompt,
+                    enable_web_search, True, error=f"HTTP {response.status_code}",
+                )
+                _raise_stream_error(response, response.read())
+
+            for line in response.iter_lines():
+                event = parse_stream_event(line)
+                usage.feed(event)
+                text = normalizer.feed(stream_event_delta(event) or "")
+                if text:
+                    yield text
+        record_openrouter_usage(
+            selected_model, usage.response_data, time.perf_counter() - started, system_instruction, prompt,
+            enable_web_search, True,
+        )
+
+    if not normalizer.text:
+        logger.error("No response text received from OpenRouter")
+        raise RuntimeError("No response text received from OpenRouter")
+
+
+async def _stream_openrouter_model_async(system_instruction, prompt, selected_model, enable_web_search):
+    endpoint, headers, payload = build_openrouter_request(
+        system_instruction, prompt, selected_model, enable_web_search
+    )
+    payload["stream"] = True
+    normalizer = StreamTextNormalizer()
+    usage = StreamUsage()
+
+    logger.info(f"Streaming OpenRouter chat completions (async) from: {endpoint}")
+    async with model_slot_async(selected_model):
+        with stage("openrouter_call"):
+            started = time.perf_counter()
+            async with http_client.astream("POST", endpoint, selected_model, headers=headers, json=payload) as response:
+                if response.status_code >= 400:
+                    record_openrouter_usage(
+                        selected_model, None, time.perf_counter() - started, system_instruction, prompt,
+                        enable_web_search, True, error=f"HTTP {response.status_code}",
+                    )
+                    _raise_stream_error(response, await response.aread())
+
+                async for line in response.aiter_lines():
+                    event = parse_stream_event(line)
+                    usage.feed(event)
+                    text = normalizer.feed(stream_event_delta(event) or "")
+                    if text:
+                        yield text
+            record_openrouter_usage(
+                selected_model, usage.response_data, time.perf_counter() - started, system_instruction, prompt,
+                enable_web_search, True,
+            )
+
+    if not normalizer.text:
+        logger.error("No response text received from OpenRouter")
+        raise RuntimeError("No response text received from OpenRouter")
+
+
+def stream_openrouter(system_instruction, prompt, selected_model, enable_web_search=False):
+    """Yield normalized text chunks from a streamed chat completion, retrying only before the first chunk."""
+    return stream_with_retries(
+        selected_model,
+        lambda model: _stream_openrouter_model(system_instruction, prompt, model, enable_web_search),
+    )
+
+
+def stream_openrouter_async(system_instruction, prompt, selected_model, enable_web_search=False):
+    """Async variant of stream_openrouter."""
+    return stream_with_retries_async(
+        selected_model,
+        lambda model: _stream_openrouter_model_async(system_instruction, prompt, model, enable_web_search),
+    )
+
+
 def parse_questions(questions):
     if isinstance(questions, list):
         raw_items = [str(item).strip() for item in questions]
@@ -283,6 +668,7 @@ def parse_questions(questions):
     return parsed_questions
 
 
+@stage("parse_json_response")
 def parse_json_response(response_text):
     cleaned_response = response_text.strip()
     if cleaned_response.startswith("```"):
@@ -306,76 +692,620 @@ def strip_em_dashes(text: str) -> str:
     return text.replace(EM_DASH, "")
 
 
-def normalize_question_answers(response_payload, original_questions):
-    answers = response_payload.get("answers")
+def validate_question_answers(response_payload, original_questions, question_numbers=None):
+    """
+    Check each answer on its own.
+
+    Returns one (answer, error) pair per question in order, so callers can keep
+    the valid answers and retry only the rest. question_numbers overrides the
+    1-based numbers used in error messages.
+    """
+    numbers = question_numbers or range(1, len(original_questions) + 1)
+    answers = response_payload.get("answers") if isinstance(response_payload, dict) else None
     if not isinstance(answers, list):
-        raise ValueError("Question answer response did not include an 'answers' array")
+        return [(None, "Question answer response did not include an 'answers' array")] * len(original_questions)
 
-    normalized_answers = []
-    for index, question in enumerate(original_questions):
+    results = []
+    for index, (question, number) in enumerate(zip(original_questions, numbers)):
         answer_item = answers[index] if index < len(answers) else None
         if not isinstance(answer_item, dict):
-            raise ValueError(f"Missing structured answer for question {index + 1}")
+            results.append((None, f"Missing structured answer for question {number}"))
+            continue
 
         answer_text = answer_item.get("answer")
         if not isinstance(answer_text, str) or not answer_text.strip():
-            raise ValueError(f"Missing answer text for question {index + 1}")
-
-        normalized_answers.append(
-            {
-                "question": str(answer_item.get("question") or question).strip(),
-                "answer": strip_em_dashes(answer_text.strip()),
-            }
+            results.append((None, f"Missing answer text for question {number}"))
+            continue
+
+        results.append(
+            (
+                {
+                    "question": str(answer_item.get("question") or question).strip(),
+                    "answer": strip_em_dashes(answer_text.strip()),
+                },
+                None,
+            )
         )
 
+    return results
+
+
+@stage("normalize_question_answers")
+def normalize_question_answers(response_payload, original_questions):
+    normalized_answers = []
+    for answer, error in validate_question_answers(response_payload, original_questions):
+        if error:
+            raise ValueError(error)
+        normalized_answers.append(answer)
     return normalized_answers
 
 
-def generate_cover_letter(job_description, company_name, custom_instructions, personal_info, model=None):
-    """Generate a cover letter using OpenRouter chat completions."""
+class AnswerStreamParser:
+    """
+    Pull answer objects out of a streamed {"answers": [...]} body as they close.
+
+    feed() returns (index, item) pairs for every answer object completed by the
+    delta; item is None when the object is not valid JSON.
+    """
+
+    ANSWERS_PATTERN = re.compile(r'"answers"\s*:\s*\[')
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+        self.count = 0
+        self.closed = False
+
+    def feed(self, delta):
+        self.buffer += delta
+        if self.position is None:
+            match = self.ANSWERS_PATTERN.search(self.buffer)
+            if not match:
+                return []
+            self.position = match.end()
+
+        items = []
+        buffer = self.buffer
+        while self.position < len(buffer) and not self.closed:
+            char = buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.object_start = self.position
+                self.depth += 1
+            elif char == "}" and self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        item = json.loads(buffer[self.object_start : self.position + 1])
+                    except json.JSONDecodeError:
+                        item = None
+                    items.append((self.count, item))
+                    self.count += 1
+            elif char == "]" and self.depth == 0:
+                self.closed = True
+            self.position += 1
+        return items
+
+
+def streamed_answer_events(parser, delta, parsed_questions):
+    """Validate each answer completed by `delta` and return its ("answer", ...) event."""
+    events = []
+    for index, item in parser.feed(delta):
+        if index >= len(parsed_questions):
+            continue
+        [(answer, error)] = validate_question_answers({"answers": [item]}, [parsed_questions[index]], [index + 1])
+        if error:
+            # The final validation of the full body reports it.
+            logger.warning(f"Skipping streamed answer: {error}")
+            continue
+        events.append(("answer", {"index": index, **answer}))
+    return events
+
+
+def build_response_cache_key(kind, openrouter_request, **extra):
+    """Key a generation on everything that shapes its output, including the resume and project bank."""
+    return make_cache_key(
+        kind,
+        **extra,
+        model=openrouter_request["selected_model"],
+        system_instruction=openrouter_request["system_instruction"],
+        prompt=openrouter_request["prompt"],
+        web_search=openrouter_request["enable_web_search"],
+        resume=get_resume_fingerprint(),
+        projects=get_project_index()["fingerprint"],
+    )
+
+
+def resolve_company_research(company_name, selected_model, web_search_decision, refresh_research, debug_info=None):
+    """
+    Replace the search tool with the shared company research for a request plan_company_research selected.
+
+    Returns (enable_web_search, company_research). Falls back to the search
+    tool when research fails or finds nothing.
+    """
+    def fetch():
+        # Research is about the company, not the candidate, so the resume stays out.
+        with usage_scope("company_research"):
+            return call_openrouter(
+                RESEARCH_SYSTEM_INSTRUCTION,
+                build_research_prompt(company_name),
+                selected_model,
+                enable_web_search=True,
+                attach_resume=False,
+            )
+
     try:
-        logger.info("Received processing request via service")
-        logger.debug(f"Job description length: {len(job_description)}")
-        logger.debug(f"Company name: {company_name}")
-        logger.debug(f"Custom instructions length: {len(custom_instructions)}")
-        logger.debug(f"Personal info keys: {list((personal_info or {}).keys())}")
+        company_research, cache_status = get_company_research(company_name, fetch, refresh_research)
+    except Exception as exc:
+        logger.warning(f"Company research failed, attaching the search tool instead: {exc}")
+        return True, None
+
+    if debug_info is not None:
+        debug_info["companyResearch"] = {
+            "company": normalize_company_name(company_name),
+            "cache": cache_status,
+            "found": company_research is not None,
+        }
+    if company_research is None:
+        return True, None
+
+    web_search_decision["source"] = "company research"
+    return False, company_research
+
+
+def plan_company_research(company_name, web_search_decision, refresh_research):
+    """Return the company research step a request will need, or None when it will not use research."""
+    if not web_search_decision["enabled"] or not is_company_research_enabled() or not (company_name or "").strip():
+        return None
+    return {"company_name": company_name, "web_search_decision": web_search_decision, "refresh": refresh_research}
+
+
+def resolve_pending_research(prepared, text_key, debug_info=None):
+    """
+    Return a copy of a prepared request or question context with its company research filled in.
+
+    Preparation leaves a placeholder where the research goes, and the response
+    cache key is built from that, so the research call is made only after the
+    response cache misses. `text_key` names the field holding the placeholder.
+    """
+    resolved = dict(prepared)
+    plan = resolved.pop("research", None)
+    if plan is None:
+        return resolved
+
+    enable_web_search, company_research = resolve_company_research(
+        plan["company_name"], resolved["selected_model"], plan["web_search_decision"], plan["refresh"], debug_info
+    )
+    section = f"\n\nCompany Research:\n{company_research}" if company_research else ""
+    resolved[text_key] = resolved[text_key].replace(PENDING_RESEARCH_SECTION, section)
+    resolved["enable_web_search"] = enable_web_search
+    return resolved
+
+
+def prepare_cover_letter_request(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    model=None,
+    project_limit=None,
+    debug_info=None,
+    web_search=None,
+    refresh_research=False,
+):
+    """
+    Build the OpenRouter call arguments for a cover letter.
+
+    When company research is wanted the request carries a "research" step;
+    pass it through resolve_pending_research before calling OpenRouter.
+    """
+    logger.info("Received processing request via service")
+    logger.debug(f"Job description length: {len(job_description)}")
+    logger.debug(f"Company name: {company_name}")
+    logger.debug(f"Custom instructions length: {len(custom_instructions)}")
+    logger.debug(f"Personal info keys: {list((personal_info or {}).keys())}")
+
+    selected_model = model or get_default_model()
+    logger.debug(f"Selected model: {selected_model}")
+
+    _, web_search_decision = decide_for_cover_letter(job_description, company_name, custom_instructions, web_search)
+    research = plan_company_research(company_name, web_search_decision, refresh_research)
+    if debug_info is not None:
+        debug_info["webSearch"] = web_search_decision
+
+    system_instruction = load_instruction("system_instruction.txt")
+    shared_context = build_application_context(
+        job_description,
+        company_name,
+        custom_instructions,
+        personal_info,
+        project_limit=project_limit,
+        debug_info=debug_info,
+        company_research=PENDING_RESEARCH if research else None,
+    )
+    prompt = "\n\n".join(
+        [
+            f"Write a professional cover letter for a job application to {company_name}.",
+            "Return only the main body text of the cover letter.",
+            "Do not include formatting, header, address, date, greeting, or signature.",
+            shared_context,
+        ]
+    )
+
+    openrouter_request = {
+        "system_instruction": system_instruction,
+        "prompt": prompt,
+        "selected_model": selected_model,
+        "enable_web_search": web_search_decision["enabled"],
+    }
+    if research:
+        openrouter_request["research"] = research
+    return openrouter_request
+
+
+def with_usage(debug_info):
+    """Add the token usage of the current request to its debug info."""
+    usage = current_usage_summary()
+    if usage is not None:
+        debug_info["usage"] = usage
+    return debug_info
+
+
+def build_cover_letter_result(cover_letter_text, company_name, personal_info, debug_info=None, cache_status=None):
+    result = {
+        "coverLetter": cover_letter_text,
+        "personalInfo": personal_info,
+        "companyName": company_name,
+    }
+    if cache_status is not None:
+        result["cache"] = cache_status
+    if debug_info is not None:
+        result["debug"] = with_usage(debug_info)
+    return result
 
-        selected_model = model or get_default_model()
-        logger.debug(f"Selected model: {selected_model}")
 
-        system_instruction = load_instruction("system_instruction.txt")
-        shared_context = build_application_context(
+@track_usage("cover_letter")
+def generate_cover_letter(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    model=None,
+    project_limit=None,
+    debug=False,
+    use_cache=True,
+    web_search=None,
+    refresh_research=False,
+):
+    """Generate a cover letter using OpenRouter chat completions."""
+    try:
+        debug_info = {} if debug else None
+        openrouter_request = prepare_cover_letter_request(
             job_description,
             company_name,
             custom_instructions,
             personal_info,
+            model,
+            project_limit,
+            debug_info,
+            web_search,
+            refresh_research,
         )
-        prompt = "\n\n".join(
-            [
-                f"Write a professional cover letter for a job application to {company_name}.",
-                "Return only the main body text of the cover letter.",
-                "Do not include formatting, header, address, date, greeting, or signature.",
-                shared_context,
-            ]
+        cover_letter_text, cache_status = run_cached(
+            build_response_cache_key("cover_letter", openrouter_request),
+            lambda: call_openrouter(**resolve_pending_research(openrouter_request, "prompt", debug_info)),
+            use_cache and not refresh_research,
         )
+        return build_cover_letter_result(cover_letter_text, company_name, personal_info, debug_info, cache_status)
+    except Exception as exc:
+        logger.error(f"Error generating cover letter: {exc}")
+        logger.error(traceback.format_exc())
+        return {"error": str(exc), "traceback": traceback.format_exc()}
 
-        cover_letter_text = call_openrouter(
-            system_instruction,
-            prompt,
-            selected_model,
-            enable_web_search=True,
+
+@track_usage("cover_letter")
+async def generate_cover_letter_async(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    model=None,
+    project_limit=None,
+    debug=False,
+    use_cache=True,
+    web_search=None,
+    refresh_research=False,
+):
+    """Async variant of generate_cover_letter for the ASGI serving mode."""
+    try:
+        debug_info = {} if debug else None
+        # Preparation ranks the project bank and reads the instruction files.
+        openrouter_request = await asyncio.to_thread(
+            prepare_cover_letter_request,
+            job_description,
+            company_name,
+            custom_instructions,
+            personal_info,
+            model,
+            project_limit,
+            debug_info,
+            web_search,
+            refresh_research,
         )
-        return {
-            "coverLetter": cover_letter_text,
-            "personalInfo": personal_info,
-            "companyName": company_name,
-        }
+
+        async def compute():
+            # The company research call is blocking.
+            resolved = await asyncio.to_thread(resolve_pending_research, openrouter_request, "prompt", debug_info)
+            return await call_openrouter_async(**resolved)
+
+        cover_letter_text, cache_status = await run_cached_async(
+            build_response_cache_key("cover_letter", openrouter_request),
+            compute,
+            use_cache and not refresh_research,
+        )
+        return build_cover_letter_result(cover_letter_text, company_name, personal_info, debug_info, cache_status)
     except Exception as exc:
         logger.error(f"Error generating cover letter: {exc}")
         logger.error(traceback.format_exc())
         return {"error": str(exc), "traceback": traceback.format_exc()}
 
 
+def prepare_question_answers_context(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    parsed_questions,
+    model=None,
+    project_limit=None,
+    debug_info=None,
+    web_search=None,
+    refresh_research=False,
+):
+    """
+    Decide on web search and build the shared context for a set of questions.
+
+    Done once per request: chunks of a fanned-out request reuse the result, so
+    they share one search decision and one company research lookup. Company
+    research is left pending; see resolve_pending_research.
+    """
+    selected_model = model or get_default_model()
+    logger.debug(f"Selected model: {selected_model}")
+
+    _, web_search_decision = decide_for_questions(parsed_questions, company_name, web_search)
+    research = plan_company_research(company_name, web_search_decision, refresh_research)
+    if debug_info is not None:
+        debug_info["webSearch"] = web_search_decision
+
+    shared_context = build_application_context(
+        job_description,
+        company_name,
+        custom_instructions,
+        personal_info,
+        ranking_query="\n".join([*parsed_questions, job_description or ""]),
+        project_limit=project_limit,
+        debug_info=debug_info,
+        company_research=PENDING_RESEARCH if research else None,
+    )
+    question_context = {
+        "company_name": company_name,
+        "shared_context": shared_context,
+        "selected_model": selected_model,
+        "enable_web_search": web_search_decision["enabled"],
+    }
+    if research:
+        question_context["research"] = research
+    return question_context
+
+
+def build_question_answers_request(question_context, parsed_questions):
+    """Build the OpenRouter call arguments for some of the questions of a prepared request."""
+    company_name = question_context["company_name"]
+    system_instruction = load_instruction("question_answer_system_instruction.txt")
+    questions_block = "\n".join(
+        f"{index + 1}. {question}" for index, question in enumerate(parsed_questions)
+    )
+    prompt = "\n\n".join(
+        [
+            f"Answer the following job application questions for {company_name} in first person as Devang Borkar.",
+            "Return valid JSON only using this schema:",
+            '{"answers":[{"question":"<original question>","answer":"<answer text>"}]}',
+            "Preserve the original question order.",
+            question_context["shared_context"],
+            f"Questions:\n{questions_block}",
+        ]
+    )
+
+    openrouter_request = {
+        "system_instruction": system_instruction,
+        "prompt": prompt,
+        "selected_model": question_context["selected_model"],
+        "enable_web_search": question_context["enable_web_search"],
+    }
+    if "research" in question_context:
+        openrouter_request["research"] = question_context["research"]
+    return openrouter_request
+
+
+def prepare_question_answers_request(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    parsed_questions,
+    model=None,
+    project_limit=None,
+    debug_info=None,
+    web_search=None,
+    refresh_research=False,
+):
+    """Build the OpenRouter call arguments for a batch of application questions."""
+    question_context = prepare_question_answers_context(
+        job_description,
+        company_name,
+        custom_instructions,
+        personal_info,
+        parsed_questions,
+        model,
+        project_limit,
+        debug_info,
+        web_search,
+        refresh_research,
+    )
+    return build_question_answers_request(question_context, parsed_questions)
+
+
+def answers_from_response(response_text, parsed_questions):
+    response_payload = parse_json_response(response_text)
+    return normalize_question_answers(response_payload, parsed_questions)
+
+
+def build_question_answers_result(normalized_answers, company_name, debug_info=None, cache_status=None):
+    result = {
+        "answers": normalized_answers,
+        "companyName": company_name,
+    }
+    if cache_status is not None:
+        result["cache"] = cache_status
+    if debug_info is not None:
+        result["debug"] = with_usage(debug_info)
+    return result
+
+
+def chunk_question_positions(positions, chunk_size):
+    return [positions[start : start + chunk_size] for start in range(0, len(positions), chunk_size)]
+
+
+def merge_question_chunk(answers, errors, positions, chunk_results):
+    """Store a chunk's valid answers in place and return the positions that still need an answer."""
+    failed = []
+    for position, (answer, error) in zip(positions, chunk_results):
+        if error:
+            errors[position] = error
+            failed.append(position)
+        else:
+            answers[position] = answer
+            errors.pop(position, None)
+    return failed
+
+
+def finish_question_fanout(answers, errors, pending):
+    if pending:
+        raise ValueError("; ".join(errors[position] for position in pending))
+    return answers
+
+
+def answer_question_chunk(question_context, parsed_questions, positions):
+    """Answer one chunk of questions; a failed call marks every question in the chunk as failed."""
+    chunk_questions = [parsed_questions[position] for position in positions]
+    question_numbers = [position + 1 for position in positions]
+    try:
+        openrouter_request = build_question_answers_request(question_context, chunk_questions)
+        response_payload = parse_json_response(call_openrouter(**openrouter_request))
+    except Exception as exc:
+        logger.warning(f"Question chunk {question_numbers} failed: {exc}")
+        return [(None, f"Question {number}: {exc}") for number in question_numbers]
+    with stage("normalize_question_answers"):
+        return validate_question_answers(response_payload, chunk_questions, question_numbers)
+
+
+async def answer_question_chunk_async(question_context, parsed_questions, positions):
+    chunk_questions = [parsed_questions[position] for position in positions]
+    question_numbers = [position + 1 for position in positions]
+    try:
+        openrouter_request = build_question_answers_request(question_context, chunk_questions)
+        response_payload = parse_json_response(await call_openrouter_async(**openrouter_request))
+    except Exception as exc:
+        logger.warning(f"Question chunk {question_numbers} failed: {exc}")
+        return [(None, f"Question {number}: {exc}") for number in question_numbers]
+    with stage("normalize_question_answers"):
+        return validate_question_answers(response_payload, chunk_questions, question_numbers)
+
+
+def fan_out_question_answers(question_context, parsed_questions, chunk_size, concurrency=None, retry_rounds=None):
+    """
+    Answer questions in chunks of chunk_size on concurrent calls, then merge in order.
+
+    Questions whose answers fail validation are re-asked, in fresh chunks, up to
+    retry_rounds more times; valid answers from earlier rounds are kept. Every
+    chunk reuses question_context, so the request makes one web search decision
+    and builds its context once.
+    """
+    concurrency = concurrency or get_question_concurrency()
+    retry_rounds = get_question_retry_rounds() if retry_rounds is None else retry_rounds
+    answers = [None] * len(parsed_questions)
+    errors = {}
+    pending = list(range(len(parsed_questions)))
+
+    for attempt in range(retry_rounds + 1):
+        if attempt:
+            logger.warning(f"Retrying {len(pending)} question(s) that failed validation (round {attempt})")
+        chunks = chunk_question_positions(pending, chunk_size)
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as executor:
+            chunk_results = list(
+                executor.map(
+                    lambda positions: context.copy().run(
+                        answer_question_chunk, question_context, parsed_questions, positions
+                    ),
+                    chunks,
+                )
+            )
+        pending = [
+            position
+            for positions, results in zip(chunks, chunk_results)
+            for position in merge_question_chunk(answers, errors, positions, results)
+        ]
+        if not pending:
+            break
+
+    return finish_question_fanout(answers, errors, pending)
+
+
+async def fan_out_question_answers_async(
+    question_context, parsed_questions, chunk_size, concurrency=None, retry_rounds=None
+):
+    """Async variant of fan_out_question_answers; a semaphore bounds concurrent calls."""
+    semaphore = asyncio.Semaphore(concurrency or get_question_concurrency())
+    retry_rounds = get_question_retry_rounds() if retry_rounds is None else retry_rounds
+    answers = [None] * len(parsed_questions)
+    errors = {}
+    pending = list(range(len(parsed_questions)))
+
+    async def answer_chunk(positions):
+        async with semaphore:
+            return await answer_question_chunk_async(question_context, parsed_questions, positions)
+
+    for attempt in range(retry_rounds + 1):
+        if attempt:
+            logger.warning(f"Retrying {len(pending)} question(s) that failed validation (round {attempt})")
+        chunks = chunk_question_positions(pending, chunk_size)
+        chunk_results = await asyncio.gather(*(answer_chunk(positions) for positions in chunks))
+        pending = [
+            position
+            for positions, results in zip(chunks, chunk_results)
+            for position in merge_question_chunk(answers, errors, positions, results)
+        ]
+        if not pending:
+            break
+
+    return finish_question_fanout(answers, errors, pending)
+
+
+@track_usage("question_answers")
 def generate_job_question_answers(
     job_description,
     company_name,
@@ -383,8 +1313,19 @@ def generate_job_question_answers(
     personal_info,
     questions,
     model=None,
+    project_limit=None,
+    debug=False,
+    use_cache=True,
+    chunk_size=None,
+    web_search=None,
+    refresh_research=False,
 ):
-    """Generate answers to job application questions using shared candidate context."""
+    """
+    Generate answers to job application questions using shared candidate context.
+
+    With a chunk_size (argument or QUESTION_CHUNK_SIZE) the questions are fanned
+    out over concurrent calls; see fan_out_question_answers.
+    """
     try:
         parsed_questions = parse_questions(questions)
         logger.info("Received job question answering request via service")
@@ -393,44 +1334,371 @@ def generate_job_question_answers(
         if not parsed_questions:
             return {"error": "Please provide at least one application question"}
 
-        selected_model = model or get_default_model()
-        logger.debug(f"Selected model: {selected_model}")
+        debug_info = {} if debug else None
+        question_context = prepare_question_answers_context(
+            job_description,
+            company_name,
+            custom_instructions,
+            personal_info,
+            parsed_questions,
+            model,
+            project_limit,
+            debug_info,
+            web_search,
+            refresh_research,
+        )
+        openrouter_request = build_question_answers_request(question_context, parsed_questions)
+        chunk_size = get_question_chunk_size() if chunk_size is None else chunk_size
+        if chunk_size:
+            cache_key = build_response_cache_key("question_answers", openrouter_request, chunk_size=chunk_size)
+            compute = lambda: fan_out_question_answers(
+                resolve_pending_research(question_context, "shared_context", debug_info), parsed_questions, chunk_size
+            )
+        else:
+            cache_key = build_response_cache_key("question_answers", openrouter_request)
+            compute = lambda: answers_from_response(
+                call_openrouter(**resolve_pending_research(openrouter_request, "prompt", debug_info)), parsed_questions
+            )
+
+        normalized_answers, cache_status = run_cached(cache_key, compute, use_cache and not refresh_research)
+        return build_question_answers_result(normalized_answers, company_name, debug_info, cache_status)
+    except Exception as exc:
+        logger.error(f"Error generating job question answers: {exc}")
+        logger.error(traceback.format_exc())
+        return {"error": str(exc), "traceback": traceback.format_exc()}
+
+
+@track_usage("question_answers")
+async def generate_job_question_answers_async(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    questions,
+    model=None,
+    project_limit=None,
+    debug=False,
+    use_cache=True,
+    chunk_size=None,
+    web_search=None,
+    refresh_research=False,
+):
+    """Async variant of generate_job_question_answers for the ASGI serving mode."""
+    try:
+        parsed_questions = parse_questions(questions)
+        logger.info("Received job question answering request via async service")
+        logger.debug(f"Parsed {len(parsed_questions)} questions")
+
+        if not parsed_questions:
+            return {"error": "Please provide at least one application question"}
+
+        debug_info = {} if debug else None
+        question_context = await asyncio.to_thread(
+            prepare_question_answers_context,
+            job_description,
+            company_name,
+            custom_instructions,
+            personal_info,
+            parsed_questions,
+            model,
+            project_limit,
+            debug_info,
+            web_search,
+            refresh_research,
+        )
+        openrouter_request = build_question_answers_request(question_context, parsed_questions)
+        chunk_size = get_question_chunk_size() if chunk_size is None else chunk_size
+        if chunk_size:
+            cache_key = build_response_cache_key("question_answers", openrouter_request, chunk_size=chunk_size)
+
+            async def compute_answers():
+                resolved_context = await asyncio.to_thread(
+                    resolve_pending_research, question_context, "shared_context", debug_info
+                )
+                return await fan_out_question_answers_async(resolved_context, parsed_questions, chunk_size)
+        else:
+            cache_key = build_response_cache_key("question_answers", openrouter_request)
+
+            async def compute_answers():
+                resolved = await asyncio.to_thread(resolve_pending_research, openrouter_request, "prompt", debug_info)
+                response_text = await call_openrouter_async(**resolved)
+                return answers_from_response(response_text, parsed_questions)
+
+        normalized_answers, cache_status = await run_cached_async(
+            cache_key, compute_answers, use_cache and not refresh_research
+        )
+        return build_question_answers_result(normalized_answers, company_name, debug_info, cache_status)
+    except Exception as exc:
+        logger.error(f"Error generating job question answers: {exc}")
+        logger.error(traceback.format_exc())
+        return {"error": str(exc), "traceback": traceback.format_exc()}
+
+
+@track_usage("cover_letter")
+def stream_cover_letter(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    model=None,
+    project_limit=None,
+    debug=False,
+    use_cache=True,
+    web_search=None,
+    refresh_research=False,
+):
+    """
+    Stream a cover letter as (event, data) pairs.
 
-        system_instruction = load_instruction("question_answer_system_instruction.txt")
-        shared_context = build_application_context(
+    Yields ("chunk", {"text": ...}) for each piece of text as it arrives, then
+    either ("done", <same shape as generate_cover_letter>) or ("error", {...}).
+    """
+    try:
+        debug_info = {} if debug else None
+        openrouter_request = prepare_cover_letter_request(
             job_description,
             company_name,
             custom_instructions,
             personal_info,
+            model,
+            project_limit,
+            debug_info,
+            web_search,
+            refresh_research,
         )
-        questions_block = "\n".join(
-            f"{index + 1}. {question}" for index, question in enumerate(parsed_questions)
+        events = stream_cached(
+            build_response_cache_key("cover_letter", openrouter_request),
+            lambda: stream_openrouter(**resolve_pending_research(openrouter_request, "prompt", debug_info)),
+            lambda text: text,
+            use_cache and not refresh_research,
         )
-        prompt = "\n\n".join(
-            [
-                f"Answer the following job application questions for {company_name} in first person as Devang Borkar.",
-                "Return valid JSON only using this schema:",
-                '{"answers":[{"question":"<original question>","answer":"<answer text>"}]}',
-                "Preserve the original question order.",
-                shared_context,
-                f"Questions:\n{questions_block}",
-            ]
+        streamed = False
+        for kind, payload in events:
+            if kind == "text":
+                streamed = True
+                yield "chunk", {"text": payload}
+                continue
+            cover_letter_text, cache_status = payload
+            if not streamed:
+                # A cached result, or one another worker produced, arrives whole.
+                cover_letter_text = strip_em_dashes(cover_letter_text)
+                yield "chunk", {"text": cover_letter_text}
+            yield "done", build_cover_letter_result(
+                cover_letter_text, company_name, personal_info, debug_info, cache_status
+            )
+    except Exception as exc:
+        logger.error(f"Error streaming cover letter: {exc}")
+        logger.error(traceback.format_exc())
+        yield "error", {"error": str(exc)}
+
+
+@track_usage("cover_letter")
+async def stream_cover_letter_async(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    model=None,
+    project_limit=None,
+    debug=False,
+    use_cache=True,
+    web_search=None,
+    refresh_research=False,
+):
+    """Async variant of stream_cover_letter for the ASGI serving mode."""
+    try:
+        debug_info = {} if debug else None
+        openrouter_request = await asyncio.to_thread(
+            prepare_cover_letter_request,
+            job_description,
+            company_name,
+            custom_instructions,
+            personal_info,
+            model,
+            project_limit,
+            debug_info,
+            web_search,
+            refresh_research,
         )
 
-        response_text = call_openrouter(
-            system_instruction,
-            prompt,
-            selected_model,
-            enable_web_search=should_enable_question_web_search(parsed_questions),
+        async def open_stream():
+            # The company research call is blocking.
+            resolved = await asyncio.to_thread(resolve_pending_research, openrouter_request, "prompt", debug_info)
+            async for text in stream_openrouter_async(**resolved):
+                yield text
+
+        events = stream_cached_async(
+            build_response_cache_key("cover_letter", openrouter_request),
+            open_stream,
+            lambda text: text,
+            use_cache and not refresh_research,
         )
-        response_payload = parse_json_response(response_text)
-        normalized_answers = normalize_question_answers(response_payload, parsed_questions)
+        streamed = False
+        async for kind, payload in events:
+            if kind == "text":
+                streamed = True
+                yield "chunk", {"text": payload}
+                continue
+            cover_letter_text, cache_status = payload
+            if not streamed:
+                cover_letter_text = strip_em_dashes(cover_letter_text)
+                yield "chunk", {"text": cover_letter_text}
+            yield "done", build_cover_letter_result(
+                cover_letter_text, company_name, personal_info, debug_info, cache_status
+            )
+    except Exception as exc:
+        logger.error(f"Error streaming cover letter: {exc}")
+        logger.error(traceback.format_exc())
+        yield "error", {"error": str(exc)}
 
-        return {
-            "answers": normalized_answers,
-            "companyName": company_name,
-        }
+
+def prepare_question_answers_stream(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    questions,
+    model,
+    project_limit,
+    debug,
+    web_search,
+    refresh_research,
+):
+    parsed_questions = parse_questions(questions)
+    logger.debug(f"Parsed {len(parsed_questions)} questions for streaming")
+    if not parsed_questions:
+        raise ValueError("Please provide at least one application question")
+
+    debug_info = {} if debug else None
+    openrouter_request = prepare_question_answers_request(
+        job_description,
+        company_name,
+        custom_instructions,
+        personal_info,
+        parsed_questions,
+        model,
+        project_limit,
+        debug_info,
+        web_search,
+        refresh_research,
+    )
+    return parsed_questions, debug_info, openrouter_request
+
+
+@track_usage("question_answers")
+def stream_job_question_answers(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    questions,
+    model=None,
+    project_limit=None,
+    debug=False,
+    use_cache=True,
+    web_search=None,
+    refresh_research=False,
+):
+    """
+    Stream answers to application questions as (event, data) pairs.
+
+    Yields ("answer", {"index", "question", "answer"}) as soon as each answer
+    object closes in the model output, then either ("done", <same shape as
+    generate_job_question_answers>) or ("error", {...}).
+    """
+    try:
+        parsed_questions, debug_info, openrouter_request = prepare_question_answers_stream(
+            job_description,
+            company_name,
+            custom_instructions,
+            personal_info,
+            questions,
+            model,
+            project_limit,
+            debug,
+            web_search,
+            refresh_research,
+        )
+        events = stream_cached(
+            build_response_cache_key("question_answers", openrouter_request),
+            lambda: stream_openrouter(**resolve_pending_research(openrouter_request, "prompt", debug_info)),
+            lambda text: answers_from_response(text, parsed_questions),
+            use_cache and not refresh_research,
+        )
+        parser = AnswerStreamParser()
+        streamed = False
+        for kind, payload in events:
+            if kind == "text":
+                streamed = True
+                yield from streamed_answer_events(parser, payload, parsed_questions)
+                continue
+            normalized_answers, cache_status = payload
+            if not streamed:
+                # A cached result, or one another worker produced, arrives whole.
+                for index, answer in enumerate(normalized_answers):
+                    yield "answer", {"index": index, **answer}
+            yield "done", build_question_answers_result(normalized_answers, company_name, debug_info, cache_status)
     except Exception as exc:
-        logger.error(f"Error generating job question answers: {exc}")
+        logger.error(f"Error streaming job question answers: {exc}")
         logger.error(traceback.format_exc())
-        return {"error": str(exc), "traceback": traceback.format_exc()}
+        yield "error", {"error": str(exc)}
+
+
+@track_usage("question_answers")
+async def stream_job_question_answers_async(
+    job_description,
+    company_name,
+    custom_instructions,
+    personal_info,
+    questions,
+    model=None,
+    project_limit=None,
+    debug=False,
+    use_cache=True,
+    web_search=None,
+    refresh_research=False,
+):
+    """Async variant of stream_job_question_answers for the ASGI serving mode."""
+    try:
+        parsed_questions, debug_info, openrouter_request = await asyncio.to_thread(
+            prepare_question_answers_stream,
+            job_description,
+            company_name,
+            custom_instructions,
+            personal_info,
+            questions,
+            model,
+            project_limit,
+            debug,
+            web_search,
+            refresh_research,
+        )
+
+        async def open_stream():
+            resolved = await asyncio.to_thread(resolve_pending_research, openrouter_request, "prompt", debug_info)
+            async for text in stream_openrouter_async(**resolved):
+                yield text
+
+        events = stream_cached_async(
+            build_response_cache_key("question_answers", openrouter_request),
+            open_stream,
+            lambda text: answers_from_response(text, parsed_questions),
+            use_cache and not refresh_research,
+        )
+        parser = AnswerStreamParser()
+        streamed = False
+        async for kind, payload in events:
+            if kind == "text":
+                streamed = True
+                for event in streamed_answer_events(parser, payload, parsed_questions):
+                    yield event
+                continue
+            normalized_answers, cache_status = payload
+            if not streamed:
+                for index, answer in enumerate(normalized_answers):
+                    yield "answer", {"index": index, **answer}
+            yield "done", build_question_answers_result(normalized_answers, company_name, debug_info, cache_status)
+    except Exception as exc:
+        logger.error(f"Error streaming job question answers: {exc}")
+        logger.error(traceback.format_exc())
+        yield "error", {"error": str(exc)}
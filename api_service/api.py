@@ -5,8 +5,9 @@ import traceback
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 
-from api_service.ai_service import generate_cover_letter, generate_job_question_answers
+from api_service.ai_service import generate_cover_letter, generate_job_question_answers, preload_resume
 from api_service.model_config import get_default_model, get_models, is_allowed_model, load_model_config
+from api_service.project_index import preload_project_index
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -22,6 +23,8 @@ app = Flask(__name__)
 CORS(app)
 
 load_model_config()
+preload_resume()
+preload_project_index()
 
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
 if not OPENROUTER_API_KEY:
@@ -0,0 +1,88 @@
+"""
+Company research shared by every generation for the same company.
+
+One web-search call summarizes the company; the summary is stored in the
+shared response cache under the normalized company name with its own TTL, so
+a cover letter and the follow-up question answers (on any worker) reuse it as
+plain prompt context instead of each attaching the search tool.
+"""
+import logging
+import os
+import re
+from typing import Callable, Optional, Tuple
+
+from api_service.response_cache import is_response_cache_enabled, make_cache_key, run_cached
+
+logger = logging.getLogger("api_service")
+
+DEFAULT_RESEARCH_TTL = 3 * 24 * 3600
+COMPANY_SUFFIX_PATTERN = re.compile(
+    r"\b(?:inc|incorporated|llc|ltd|limited|corp|corporation|co|company|gmbh|plc|ag|sa|bv|pvt)\b\.?",
+    re.IGNORECASE,
+)
+NON_WORD_PATTERN = re.compile(r"[^a-z0-9]+")
+
+RESEARCH_SYSTEM_INSTRUCTION = (
+    "You research companies for job applicants. Use web search and report only facts you found."
+)
+RESEARCH_PROMPT_TEMPLATE = "\n".join(
+    [
+        "Summarize the company {company_name} for someone writing a job application.",
+        "Cover what the company does, its main products or customers, its stated mission or values,",
+        "and notable news from the last year. Use at most 150 words of plain text without headings.",
+        "If you cannot find the company, reply with exactly: UNKNOWN",
+    ]
+)
+
+
+def is_company_research_enabled() -> bool:
+    # Without the shared cache every request would pay for its own research call.
+    enabled = os.environ.get("COMPANY_RESEARCH_ENABLED", "1").lower() not in {"0", "false", "no"}
+    return enabled and is_response_cache_enabled()
+
+
+def get_research_ttl() -> float:
+    try:
+        return float(os.environ.get("COMPANY_RESEARCH_TTL", DEFAULT_RESEARCH_TTL))
+    except ValueError:
+        logger.warning("COMPANY_RESEARCH_TTL is not a number; using the default")
+        return float(DEFAULT_RESEARCH_TTL)
+
+
+def normalize_company_name(company_name: str) -> str:
+    """Lowercase, drop legal suffixes and punctuation: "Acme, Inc." and "acme" share research."""
+    without_suffix = COMPANY_SUFFIX_PATTERN.sub(" ", (company_name or "").lower())
+    return NON_WORD_PATTERN.sub(" ", without_suffix).strip()
+
+
+def build_research_prompt(company_name: str) -> str:
+    return RESEARCH_PROMPT_TEMPLATE.format(company_name=company_name.strip())
+
+
+def get_company_research(
+    company_name: str, fetch: Callable[[], str], refresh: bool = False
+) -> Tuple[Optional[str], str]:
+    """
+    Return (research_text, cache_status) for a company.
+
+    `fetch` runs the web-search call on a miss; refresh skips the lookup and
+    replaces the stored summary. Research text is None when the company could
+    not be found.
+    """
+    normalized_name = normalize_company_name(company_name)
+    if not normalized_name:
+        raise ValueError("Company name is required for company research")
+
+    def compute() -> str:
+        logger.info(f"Researching company: {normalized_name}")
+        return fetch().strip()
+
+    research_text, cache_status = run_cached(
+        make_cache_key("company_research", company=normalized_name),
+        compute,
+        use_cache=not refresh,
+        ttl=get_research_ttl(),
+    )
+    if not research_text or research_text.upper() == "UNKNOWN":
+        return None, cache_status
+    return research_text, cache_status
@@ -0,0 +1,153 @@
+"""
+Hedged OpenRouter calls for models with long latency tails.
+
+When a hedged model has not answered by its deadline (a percentile of its
+recent latencies), or fails before it, the same request is sent to the
+configured fallback model and the first valid response wins. The losing
+request is cancelled, which closes its connection and frees its rate-limit
+slot. A blocking httpx call cannot be interrupted from another thread, so sync
+callers run the race on a shared background event loop.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger("api_service")
+
+LATENCY_WINDOW = 200
+
+_LATENCIES_LOCK = threading.Lock()
+_LATENCIES: Dict[str, Deque[float]] = {}
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, Dict[str, int]] = {}
+
+_LOOP_LOCK = threading.Lock()
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_PID: Optional[int] = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """The event loop that runs sync callers' hedged calls, started on first use in each process."""
+    global _LOOP, _LOOP_PID
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP_PID != os.getpid():
+            _LOOP = asyncio.new_event_loop()
+            _LOOP_PID = os.getpid()
+            threading.Thread(target=_LOOP.run_forever, name="hedge-loop", daemon=True).start()
+        return _LOOP
+
+
+def _count(model: str, name: str) -> None:
+    with _STATS_LOCK:
+        stats = _STATS.setdefault(
+            model, {"calls": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0, "failures": 0}
+        )
+        stats[name] += 1
+
+
+def record_latency(model: str, seconds: float) -> None:
+    with _LATENCIES_LOCK:
+        _LATENCIES.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def get_hedge_delay(model: str, settings: Dict[str, Any]) -> float:
+    """Seconds to wait for the primary before hedging: the configured latency percentile once enough samples exist."""
+    with _LATENCIES_LOCK:
+        samples = list(_LATENCIES.get(model, ()))
+    if len(samples) < settings["min_samples"]:
+        return float(settings["initial_delay"])
+    return max(float(np.percentile(samples, settings["percentile"])), float(settings["min_delay"]))
+
+
+def _record_lost_primary(model: str, started: float) -> None:
+    # The primary lost to the hedge, so its latency is at least this long.
+    # Dropping the sample would pull the percentile, and with it the deadline,
+    # lower with every hedge win.
+    record_latency(model, time.perf_counter() - started)
+
+
+async def hedged_call_async(model: str, settings: Dict[str, Any], call: Callable[[str], Awaitable[Any]]) -> Any:
+    """
+    Await call(model), hedging to settings["fallback"] after the deadline or when the primary fails first.
+
+    `call` must raise for an invalid response so the other request can still
+    win. The losing request is cancelled. If both fail, the primary's error is
+    raised.
+    """
+
+    async def timed(target: str) -> Any:
+        started = time.perf_counter()
+        result = await call(target)
+        record_latency(target, time.perf_counter() - started)
+        return result
+
+    fallback = settings["fallback"]
+    _count(model, "calls")
+    delay = get_hedge_delay(model, settings)
+    started = time.perf_counter()
+    primary = asyncio.ensure_future(timed(model))
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done and primary.exception() is None:
+            return primary.result()
+
+        if done:
+            logger.info(f"Hedging {model} to {fallback} after it failed: {primary.exception()}")
+        else:
+            logger.info(f"Hedging {model} to {fallback} after {delay:.1f}s")
+        _count(model, "hedged")
+        tasks.append(asyncio.ensure_future(timed(fallback)))
+        pending = {task for task in tasks if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    _count(model, "primary_wins" if task is primary else "hedge_wins")
+                    if task is not primary and primary in pending:
+                        _record_lost_primary(model, started)
+                    return task.result()
+
+        _count(model, "failures")
+        return primary.result()
+    finally:
+        # Also covers the caller being cancelled while waiting.
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def hedged_call(model: str, settings: Dict[str, Any], call: Callable[[str], Awaitable[Any]]) -> Any:
+    """Run hedged_call_async from sync code on the shared hedging loop and block until it finishes."""
+    # The coroutine is scheduled with a copy of this thread's context, so usage is attributed to the caller's request.
+    future = asyncio.run_coroutine_threadsafe(hedged_call_async(model, settings, call), _get_loop())
+    try:
+        return future.result()
+    except BaseException:
+        # E.g. the worker timing out the request: stop both calls instead of leaving them running.
+        future.cancel()
+        raise
+
+
+def get_hedging_stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        stats = {model: dict(counts) for model, counts in _STATS.items()}
+    with _LATENCIES_LOCK:
+        latencies = {model: list(samples) for model, samples in _LATENCIES.items()}
+
+    for model, counts in stats.items():
+        counts["hedge_rate"] = round(counts["hedged"] / counts["calls"], 4) if counts["calls"] else 0.0
+        counts["hedge_win_rate"] = round(counts["hedge_wins"] / counts["hedged"], 4) if counts["hedged"] else 0.0
+
+    latency_ms = {}
+    for model, samples in latencies.items():
+        if samples:
+            p50, p95 = np.percentile(samples, [50, 95])
+            latency_ms[model] = {"samples": len(samples), "p50": round(p50 * 1000), "p95": round(p95 * 1000)}
+    return {"models": stats, "latency_ms": latency_ms, "pid": os.getpid()}
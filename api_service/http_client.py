@@ -0,0 +1,249 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import httpx
+
+from api_service.model_config import get_http_settings, get_model_timeout
+
+logger = logging.getLogger("api_service")
+
+_CLIENT_LOCK = threading.Lock()
+_CLIENT: Optional[httpx.Client] = None
+_CLIENT_PID: Optional[int] = None
+# One AsyncClient per event loop: connections cannot be shared across loops.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+_STATS_LOCK = threading.Lock()
+_POOL_STATS: Dict[str, int] = {
+    "requests": 0,
+    "connections_opened": 0,
+    "connections_reused": 0,
+    "tls_handshakes": 0,
+    "failed_requests": 0,
+    "clients_created": 0,
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client_kwargs() -> Dict[str, Any]:
+    settings = get_http_settings()
+    http2 = bool(settings["http2"])
+    if http2 and not _http2_available():
+        logger.warning("openrouter.http.http2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=int(settings["max_connections"]),
+            max_keepalive_connections=int(settings["max_keepalive_connections"]),
+            keepalive_expiry=float(settings["keepalive_expiry"]),
+        ),
+        "timeout": httpx.Timeout(float(settings["timeout"]), connect=float(settings["connect_timeout"])),
+    }
+
+
+def _reset_after_fork() -> None:
+    """Drop the parent's client in a forked child without closing shared sockets."""
+    global _CLIENT, _CLIENT_PID, _ASYNC_CLIENTS
+    _CLIENT = None
+    _CLIENT_PID = None
+    _ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide pooled client, creating it lazily per process."""
+    global _CLIENT, _CLIENT_PID
+    current_pid = os.getpid()
+    client = _CLIENT
+    if client is not None and _CLIENT_PID == current_pid:
+        return client
+
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT_PID != current_pid:
+            client_kwargs = _build_client_kwargs()
+            _CLIENT = httpx.Client(**client_kwargs)
+            _CLIENT_PID = current_pid
+            _increment_stat("clients_created")
+            logger.info(
+                f"Created pooled OpenRouter client for pid {current_pid} "
+                f"(http2={client_kwargs['http2']}, limits={client_kwargs['limits']})"
+            )
+        return _CLIENT
+
+
+def close_http_client() -> None:
+    global _CLIENT, _CLIENT_PID
+    with _CLIENT_LOCK:
+        if _CLIENT is not None and _CLIENT_PID == os.getpid():
+            _CLIENT.close()
+        _CLIENT = None
+        _CLIENT_PID = None
+
+
+atexit.register(close_http_client)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the pooled async client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        client_kwargs = _build_client_kwargs()
+        client = httpx.AsyncClient(**client_kwargs)
+        _ASYNC_CLIENTS[loop] = client
+        _increment_stat("clients_created")
+        logger.info(
+            f"Created pooled async OpenRouter client for pid {os.getpid()} "
+            f"(http2={client_kwargs['http2']}, limits={client_kwargs['limits']})"
+        )
+    return client
+
+
+async def aclose_async_http_client() -> None:
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def get_request_timeout(model: str) -> httpx.Timeout:
+    settings = get_http_settings()
+    return httpx.Timeout(get_model_timeout(model), connect=float(settings["connect_timeout"]))
+
+
+def _increment_stat(name: str, amount: int = 1) -> None:
+    with _STATS_LOCK:
+        _POOL_STATS[name] += amount
+
+
+class _ConnectionTracer:
+    """Collect httpcore trace events for one request to tell new connections from reused ones."""
+
+    def __init__(self):
+        self.opened = False
+        self.tls_handshake = False
+
+    def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.opened = True
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshake = True
+
+    async def async_trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self(event_name, info)
+
+    def record(self) -> None:
+        with _STATS_LOCK:
+            _POOL_STATS["requests"] += 1
+            if self.opened:
+                _POOL_STATS["connections_opened"] += 1
+            else:
+                _POOL_STATS["connections_reused"] += 1
+            if self.tls_handshake:
+                _POOL_STATS["tls_handshakes"] += 1
+
+
+def post(url: str, model: str, **kwargs: Any) -> httpx.Response:
+    """POST through the pooled client using the per-model timeout."""
+    tracer = _ConnectionTracer()
+    try:
+        response = get_http_client().post(
+            url,
+            timeout=get_request_timeout(model),
+            extensions={"trace": tracer},
+            **kwargs,
+        )
+    except httpx.HTTPError:
+        _increment_stat("failed_requests")
+        raise
+
+    tracer.record()
+    return response
+
+
+async def apost(url: str, model: str, **kwargs: Any) -> httpx.Response:
+    """Async counterpart of post() using the loop-bound pooled client."""
+    tracer = _ConnectionTracer()
+    try:
+        response = await get_async_http_client().post(
+            url,
+            timeout=get_request_timeout(model),
+            extensions={"trace": tracer.async_trace},
+            **kwargs,
+        )
+    except httpx.HTTPError:
+        _increment_stat("failed_requests")
+        raise
+
+    tracer.record()
+    return response
+
+
+@contextmanager
+def stream(method: str, url: str, model: str, **kwargs: Any) -> Iterator[httpx.Response]:
+    """Open a streaming request through the pooled client using the per-model timeout."""
+    tracer = _ConnectionTracer()
+    try:
+        with get_http_client().stream(
+            method,
+            url,
+            timeout=get_request_timeout(model),
+            extensions={"trace": tracer},
+            **kwargs,
+        ) as response:
+            tracer.record()
+            yield response
+    except httpx.HTTPError:
+        _increment_stat("failed_requests")
+        raise
+
+
+@asynccontextmanager
+async def astream(method: str, url: str, model: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+    """Async counterpart of stream() using the loop-bound pooled client."""
+    tracer = _ConnectionTracer()
+    try:
+        async with get_async_http_client().stream(
+            method,
+            url,
+            timeout=get_request_timeout(model),
+            extensions={"trace": tracer.async_trace},
+            **kwargs,
+        ) as response:
+            tracer.record()
+            yield response
+    except httpx.HTTPError:
+        _increment_stat("failed_requests")
+        raise
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        stats: Dict[str, Any] = dict(_POOL_STATS)
+
+    stats["pid"] = os.getpid()
+    stats["reuse_ratio"] = (
+        round(stats["connections_reused"] / stats["requests"], 4) if stats["requests"] else None
+    )
+    stats["settings"] = get_http_settings()
+    return stats
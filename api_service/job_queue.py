@@ -0,0 +1,351 @@
+"""
+Durable background jobs for long generations.
+
+Jobs live in a SQLite file shared by every worker on the host, so a submitted
+job survives a worker restart. Background threads in each worker claim queued
+jobs under a lease that they renew while the job runs; if a worker dies, the
+lease expires and another worker picks the job up again, up to max_attempts.
+What a job does is decided by the handler registered for its type.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from api_service.response_cache import ROOT_DIR
+
+logger = logging.getLogger("api_service")
+
+DEFAULT_QUEUE_PATH = os.path.join(ROOT_DIR, "cache", "jobs.sqlite3")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = {SUCCEEDED, FAILED}
+
+# How often idle workers look for jobs submitted by other processes.
+POLL_INTERVAL = 1.0
+PURGE_INTERVAL = 300.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at);
+"""
+
+_COLUMNS = (
+    "id, type, payload, status, result, error, attempts, lease_expires_at, created_at, started_at, finished_at"
+)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"{name} is not a number; using {default}")
+        return default
+
+
+def _row_to_job(row: Any) -> Dict[str, Any]:
+    (job_id, job_type, payload, status, result, error, attempts, lease_expires_at, created_at, started_at,
+     finished_at) = row
+    return {
+        "id": job_id,
+        "type": job_type,
+        "payload": json.loads(payload),
+        "status": status,
+        "result": json.loads(result) if result is not None else None,
+        "error": error,
+        "attempts": attempts,
+        "leaseExpiresAt": lease_expires_at,
+        "createdAt": created_at,
+        "startedAt": started_at,
+        "finishedAt": finished_at,
+    }
+
+
+class JobQueue:
+    def __init__(self, path: str, lease_seconds: float, max_attempts: int, retention: float):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def submit(self, job_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            "INSERT INTO jobs (id, type, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, job_type, json.dumps(payload, ensure_ascii=False), QUEUED, time.time()),
+        )
+        logger.info(f"Queued {job_type} job {job_id}")
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Lease the oldest runnable job: queued, or running under a lease its worker stopped renewing."""
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE status = ? OR (status = ? AND lease_expires_at <= ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            job = _row_to_job(row)
+            if job["status"] == RUNNING and job["attempts"] >= self.max_attempts:
+                logger.error(f"Job {job['id']} lost its worker {job['attempts']} times; giving up")
+                connection.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, finished_at = ? WHERE id = ?",
+                    (FAILED, "Job was interrupted too many times", now, job["id"]),
+                )
+                return None
+
+            if job["status"] == RUNNING:
+                logger.warning(f"Reclaiming job {job['id']} after its worker's lease expired")
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires_at = ?, "
+                "started_at = ? WHERE id = ?",
+                (RUNNING, owner, now + self.lease_seconds, now, job["id"]),
+            )
+            job.update(status=RUNNING, attempts=job["attempts"] + 1, startedAt=now)
+            return job
+        finally:
+            connection.execute("COMMIT")
+
+    def renew(self, job_ids: List[str], owner: str) -> None:
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" for _ in job_ids)
+        self._connection().execute(
+            f"UPDATE jobs SET lease_expires_at = ? WHERE lease_owner = ? AND status = ? AND id IN ({placeholders})",
+            (time.time() + self.lease_seconds, owner, RUNNING, *job_ids),
+        )
+
+    def finish(self, job_id: str, owner: str, result: Any = None, error: Optional[str] = None) -> None:
+        """Record the outcome, unless the lease was lost and another worker now owns the job."""
+        updated = self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, lease_owner = NULL, finished_at = ? "
+            "WHERE id = ? AND lease_owner = ?",
+            (
+                FAILED if error else SUCCEEDED,
+                json.dumps(result, ensure_ascii=False) if result is not None else None,
+                error,
+                time.time(),
+                job_id,
+                owner,
+            ),
+        ).rowcount
+        if not updated:
+            logger.warning(f"Discarding the outcome of job {job_id}: its lease moved to another worker")
+
+    def purge(self) -> int:
+        """Delete finished jobs older than the retention period."""
+        removed = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (SUCCEEDED, FAILED, time.time() - self.retention),
+        ).rowcount
+        if removed:
+            logger.info(f"Purged {removed} finished jobs")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        counts.update(dict(rows))
+        oldest = self._connection().execute(
+            "SELECT MIN(created_at) FROM jobs WHERE status = ?", (QUEUED,)
+        ).fetchone()[0]
+        return {"jobs": counts, "oldest_queued_age_seconds": round(time.time() - oldest, 1) if oldest else None}
+
+
+_QUEUE: Optional[JobQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+_WORKERS_LOCK = threading.Lock()
+_WORKERS_PID: Optional[int] = None
+_OWNER = ""
+_WAKE = threading.Event()
+_RUNNING_LOCK = threading.Lock()
+_RUNNING: Dict[str, str] = {}
+
+
+def get_job_queue() -> JobQueue:
+    global _QUEUE
+    if _QUEUE is None:
+        with _QUEUE_LOCK:
+            if _QUEUE is None:
+                _QUEUE = JobQueue(
+                    path=os.environ.get("JOB_QUEUE_PATH", DEFAULT_QUEUE_PATH),
+                    lease_seconds=_env_number("JOB_LEASE_SECONDS", 60),
+                    max_attempts=int(_env_number("JOB_MAX_ATTEMPTS", 3)),
+                    retention=_env_number("JOB_RETENTION", 24 * 3600),
+                )
+    return _QUEUE
+
+
+def register_job_handler(job_type: str, handler: Callable[[Dict[str, Any]], Any]) -> None:
+    """
+    Register what a job type does. The handler gets the submitted payload and
+    returns a JSON-serializable result; a dict with an "error" key, or an
+    exception, fails the job.
+    """
+    _HANDLERS[job_type] = handler
+
+
+def is_job_type(job_type: Any) -> bool:
+    return job_type in _HANDLERS
+
+
+def submit_job(job_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    if job_type not in _HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+    job = get_job_queue().submit(job_type, payload)
+    _WAKE.set()
+    return job
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return get_job_queue().get(job_id)
+
+
+def _run_job(job: Dict[str, Any]) -> None:
+    queue = get_job_queue()
+    with _RUNNING_LOCK:
+        _RUNNING[job["id"]] = job["type"]
+    started = time.perf_counter()
+    try:
+        result = _HANDLERS[job["type"]](job["payload"])
+        error = result.get("error") if isinstance(result, dict) else None
+    except Exception as exc:
+        logger.exception(f"Job {job['id']} raised")
+        result, error = None, str(exc)
+    finally:
+        with _RUNNING_LOCK:
+            _RUNNING.pop(job["id"], None)
+
+    queue.finish(job["id"], _OWNER, result=None if error else result, error=error)
+    outcome = "failed" if error else "succeeded"
+    logger.info(f"Job {job['id']} ({job['type']}) {outcome} in {time.perf_counter() - started:.2f}s")
+
+
+def _work_once(queue: JobQueue) -> bool:
+    """Claim and run one job; False when the queue had nothing for this worker."""
+    try:
+        job = queue.claim(_OWNER)
+    except sqlite3.Error as exc:
+        logger.warning(f"Job claim failed: {exc}")
+        return False
+
+    if job is None:
+        return False
+    if job["type"] not in _HANDLERS:
+        queue.finish(job["id"], _OWNER, error=f"No handler registered for job type {job['type']}")
+        return True
+    _run_job(job)
+    return True
+
+
+def _worker_loop() -> None:
+    queue = get_job_queue()
+    while True:
+        try:
+            worked = _work_once(queue)
+        except Exception:
+            # A dead worker thread is never restarted, so keep going; an unfinished
+            # job is picked up again once its lease expires.
+            logger.exception("Job worker iteration failed")
+            worked = False
+
+        if not worked:
+            _WAKE.wait(POLL_INTERVAL)
+            _WAKE.clear()
+
+
+def _heartbeat_loop() -> None:
+    """Renew the leases of this process's running jobs and purge old jobs now and then."""
+    queue = get_job_queue()
+    last_purge = 0.0
+    while True:
+        time.sleep(queue.lease_seconds / 3)
+        with _RUNNING_LOCK:
+            job_ids = list(_RUNNING)
+        try:
+            queue.renew(job_ids, _OWNER)
+            if time.monotonic() - last_purge >= PURGE_INTERVAL:
+                queue.purge()
+                last_purge = time.monotonic()
+        except sqlite3.Error as exc:
+            logger.warning(f"Job lease renewal failed: {exc}")
+        except Exception:
+            logger.exception("Job heartbeat failed")
+
+
+def start_job_workers() -> None:
+    """Start this process's job worker threads once (JOB_WORKERS, default 2; 0 only submits)."""
+    global _WORKERS_PID, _OWNER
+    with _WORKERS_LOCK:
+        if _WORKERS_PID == os.getpid():
+            return
+        _WORKERS_PID = os.getpid()
+        _OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        with _RUNNING_LOCK:
+            _RUNNING.clear()
+
+        worker_count = int(_env_number("JOB_WORKERS", 2))
+        if worker_count <= 0:
+            return
+        for index in range(worker_count):
+            threading.Thread(target=_worker_loop, name=f"job-worker-{index}", daemon=True).start()
+        threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True).start()
+        logger.info(f"Started {worker_count} job workers as {_OWNER}")
+
+
+def get_job_queue_stats() -> Dict[str, Any]:
+    stats = get_job_queue().stats()
+    with _RUNNING_LOCK:
+        stats["running_here"] = len(_RUNNING)
+    stats["pid"] = os.getpid()
+    return stats
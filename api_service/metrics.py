@@ -0,0 +1,133 @@
+"""
+Prometheus metrics and Server-Timing for the request pipeline stages.
+
+Each stage (building the application context, the OpenRouter call, parsing
+and normalizing answers, the ReportLab build) records a latency histogram,
+an in-flight gauge and an error counter. Under gunicorn the workers write
+their samples to PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py) and
+/metrics merges them, so the numbers cover every worker rather than the one
+that happened to serve the scrape.
+
+The stages run for the current request are also collected in a context-local
+list so the response can report them in a Server-Timing header.
+"""
+import contextvars
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+STAGE_SECONDS = Histogram(
+    "cover_letter_stage_seconds",
+    "Time spent in one stage of a request",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_IN_FLIGHT = Gauge(
+    "cover_letter_stage_in_flight",
+    "Stages currently running",
+    ["stage"],
+    multiprocess_mode="livesum",
+)
+STAGE_ERRORS = Counter(
+    "cover_letter_stage_errors",
+    "Stages that raised, by exception type",
+    ["stage", "error"],
+)
+
+# Cleared by disable_metrics() in processes that must not record samples.
+_RECORDING = True
+
+_TIMINGS: "contextvars.ContextVar[Optional[List[Tuple[str, float]]]]" = contextvars.ContextVar(
+    "stage_timings", default=None
+)
+
+
+def is_multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as pipeline stage `name`; also usable as a decorator on plain functions."""
+    recording = _RECORDING
+    if recording:
+        STAGE_IN_FLIGHT.labels(name).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        if recording:
+            STAGE_ERRORS.labels(name, type(exc).__name__).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        if recording:
+            STAGE_IN_FLIGHT.labels(name).dec()
+            STAGE_SECONDS.labels(name).observe(elapsed)
+        timings = _TIMINGS.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """Start collecting stage timings for the current request and return the list they go into."""
+    timings: List[Tuple[str, float]] = []
+    _TIMINGS.set(timings)
+    return timings
+
+
+def format_server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Server-Timing value with one entry per stage; repeated stages are summed and counted."""
+    totals: "OrderedDict[str, List[float]]" = OrderedDict()
+    for name, seconds in list(timings):
+        total = totals.setdefault(name, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+
+    entries = []
+    for name, (seconds, count) in totals.items():
+        entry = f"{name};dur={seconds * 1000:.1f}"
+        if count > 1:
+            entry += f';desc="{count} calls"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """The Prometheus text exposition, merged across worker processes when running multiprocess."""
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+
+def disable_metrics() -> None:
+    """
+    Stop recording Prometheus samples in this process; Server-Timing still works.
+
+    For processes gunicorn does not track (PDF render pools, the batch
+    runner): their pids are never passed to mark_process_dead, so they must
+    not write samples to PROMETHEUS_MULTIPROC_DIR. Every metric here has
+    labels, and prometheus_client creates no sample files until a labelled
+    child is used, so importing this module first is harmless.
+    """
+    global _RECORDING
+    _RECORDING = False
@@ -1,6 +1,11 @@
 import os
 from typing import Any, Dict, List, Optional
-import yaml
+
+try:
+    import yaml
+except ImportError:
+    # Parsed with _fallback_parse_model_yaml instead.
+    yaml = None
 
 
 
@@ -9,52 +14,142 @@ DEFAULT_CONFIG_PATH = os.path.join(ROOT_DIR, "config", "model.yaml")
 
 _CONFIG: Optional[Dict[str, Any]] = None
 
-
-def _parse_scalar(value: str) -> str:
+DEFAULT_HTTP_SETTINGS: Dict[str, Any] = {
+    "http2": False,
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 60.0,
+    "connect_timeout": 10.0,
+    "timeout": 120.0,
+}
+
+
+DEFAULT_RETRY_SETTINGS: Dict[str, Any] = {
+    "max_attempts": 3,
+    "base_delay": 0.5,
+    "max_delay": 8.0,
+    "max_retry_after": 20.0,
+}
+
+DEFAULT_CIRCUIT_BREAKER_SETTINGS: Dict[str, Any] = {
+    "failure_threshold": 5,
+    "reset_timeout": 30.0,
+}
+
+DEFAULT_RATE_LIMIT_SETTINGS: Dict[str, Any] = {
+    "requests_per_minute": 60.0,
+    "burst": 10,
+    "max_in_flight": 8,
+    "max_wait": 30.0,
+}
+
+DEFAULT_HEDGE_SETTINGS: Dict[str, Any] = {
+    "percentile": 95,
+    "initial_delay": 10.0,
+    "min_delay": 1.0,
+    "min_samples": 20,
+}
+
+
+def _strip_comment(value: str) -> str:
+    """Drop a trailing "# ..." comment from an unquoted value."""
+    stripped = value.strip()
+    if stripped.startswith("#"):
+        return ""
+    if stripped[:1] in {"'", '"'}:
+        return stripped
+    return stripped.split(" #", 1)[0].rstrip()
+
+
+def _parse_scalar(value: str) -> Any:
     parsed = value.strip()
     if len(parsed) >= 2 and parsed[0] == parsed[-1] and parsed[0] in {"'", '"'}:
         return parsed[1:-1]
+    if parsed.lower() in {"true", "false"}:
+        return parsed.lower() == "true"
+    for number_type in (int, float):
+        try:
+            return number_type(parsed)
+        except ValueError:
+            continue
     return parsed
 
 
 def _fallback_parse_model_yaml(raw_text: str) -> Dict[str, Any]:
     """
     Minimal YAML parser for environments without PyYAML.
-    Supports only the config shape used by this project.
+    Supports only the config shape used by this project: nested mappings,
+    lists of mappings, and scalar values.
     """
-    in_openrouter = False
-    openrouter: Dict[str, Any] = {}
-    models: List[Dict[str, str]] = []
-
-    for line in raw_text.splitlines():
+    root: Dict[str, Any] = {}
+    # Each frame is (indent, container); the container is a dict or a list.
+    stack: List[Any] = [(-1, root)]
+
+    lines = [
+        line.rstrip()
+        for line in raw_text.splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+    for position, line in enumerate(lines):
+        indent = len(line) - len(line.lstrip())
         stripped = line.strip()
-        if not stripped or stripped.startswith("#"):
-            continue
-        if stripped == "openrouter:":
-            in_openrouter = True
-            continue
-        if not in_openrouter:
-            continue
 
-        if stripped.startswith("base_url:"):
-            openrouter["base_url"] = _parse_scalar(stripped.split(":", 1)[1])
-        elif stripped.startswith("default_model:"):
-            openrouter["default_model"] = _parse_scalar(stripped.split(":", 1)[1])
-        elif stripped == "models:":
+        while len(stack) > 1 and indent <= stack[-1][0]:
+            stack.pop()
+        container = stack[-1][1]
+
+        if stripped.startswith("- "):
+            if not isinstance(container, list):
+                raise ValueError(f"unexpected list item in model config: {stripped}")
+            item: Dict[str, Any] = {}
+            container.append(item)
+            stack.append((indent, item))
+            stripped = stripped[2:].strip()
+            indent += 2
+            container = item
+
+        if ":" not in stripped:
+            raise ValueError(f"unsupported line in model config: {stripped}")
+
+        key, value = stripped.split(":", 1)
+        key = key.strip()
+        value = _strip_comment(value)
+        if value:
+            container[key] = _parse_scalar(value)
             continue
-        elif stripped.startswith("- label:"):
-            models.append({"label": _parse_scalar(stripped.split(":", 1)[1])})
-        elif stripped.startswith("label:"):
-            if not models:
-                models.append({})
-            models[-1]["label"] = _parse_scalar(stripped.split(":", 1)[1])
-        elif stripped.startswith("slug:"):
-            if not models:
-                raise ValueError("openrouter.models entry is missing label before slug")
-            models[-1]["slug"] = _parse_scalar(stripped.split(":", 1)[1])
 
-    openrouter["models"] = models
-    return {"openrouter": openrouter}
+        next_line = lines[position + 1].strip() if position + 1 < len(lines) else ""
+        child: Any = [] if next_line.startswith("- ") else {}
+        container[key] = child
+        stack.append((indent, child))
+
+    return root
+
+
+def _validate_positive_number(value: Any, field_name: str) -> None:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"{field_name} must be a positive number")
+
+
+def _validate_settings_block(settings_cfg: Any, defaults: Dict[str, Any], field_name: str) -> None:
+    """Check a settings mapping against its defaults: known keys, booleans stay booleans, numbers are positive."""
+    if not isinstance(settings_cfg, dict):
+        raise ValueError(f"{field_name} must be an object")
+
+    for key, value in settings_cfg.items():
+        if key not in defaults:
+            raise ValueError(f"unknown {field_name} setting: {key}")
+        if isinstance(defaults[key], bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"{field_name}.{key} must be a boolean")
+        else:
+            _validate_positive_number(value, f"{field_name}.{key}")
+
+
+def _validate_hedge_settings(hedge_cfg: Any, field_name: str) -> None:
+    _validate_settings_block(hedge_cfg, DEFAULT_HEDGE_SETTINGS, field_name)
+    if hedge_cfg.get("percentile", DEFAULT_HEDGE_SETTINGS["percentile"]) >= 100:
+        raise ValueError(f"{field_name}.percentile must be below 100")
 
 
 def _validate_model_config(config: Dict[str, Any]) -> None:
@@ -70,6 +165,17 @@ def _validate_model_config(config: Dict[str, Any]) -> None:
     if not isinstance(default_model, str) or not default_model.strip():
         raise ValueError("openrouter.default_model is required and must be a non-empty string")
 
+    for key, defaults in (
+        ("http", DEFAULT_HTTP_SETTINGS),
+        ("retry", DEFAULT_RETRY_SETTINGS),
+        ("circuit_breaker", DEFAULT_CIRCUIT_BREAKER_SETTINGS),
+    ):
+        if key in openrouter_cfg:
+            _validate_settings_block(openrouter_cfg[key], defaults, f"openrouter.{key}")
+    max_attempts = (openrouter_cfg.get("retry") or {}).get("max_attempts", 1)
+    if not isinstance(max_attempts, int):
+        raise ValueError("openrouter.retry.max_attempts must be an integer")
+
     models = openrouter_cfg.get("models")
     if not isinstance(models, list) or not models:
         raise ValueError("openrouter.models must be a non-empty list")
@@ -87,6 +193,16 @@ def _validate_model_config(config: Dict[str, Any]) -> None:
             raise ValueError(f"openrouter.models[{idx}].slug must be a non-empty string")
         if slug in seen_slugs:
             raise ValueError(f"duplicate model slug in config: {slug}")
+        if "timeout" in model:
+            _validate_positive_number(model["timeout"], f"openrouter.models[{idx}].timeout")
+        if "rate_limit" in model:
+            _validate_settings_block(
+                model["rate_limit"], DEFAULT_RATE_LIMIT_SETTINGS, f"openrouter.models[{idx}].rate_limit"
+            )
+        if "hedge" in model:
+            if "fallback" not in model:
+                raise ValueError(f"openrouter.models[{idx}].hedge requires a fallback model")
+            _validate_hedge_settings(model["hedge"], f"openrouter.models[{idx}].hedge")
 
         seen_slugs.add(slug)
 
@@ -95,10 +211,25 @@ def _validate_model_config(config: Dict[str, Any]) -> None:
             f"openrouter.default_model '{default_model}' must be present in openrouter.models"
         )
 
+    for idx, model in enumerate(models):
+        fallback = model.get("fallback")
+        if fallback is None:
+            continue
+        if fallback not in seen_slugs:
+            raise ValueError(f"openrouter.models[{idx}].fallback '{fallback}' must be present in openrouter.models")
+        if fallback == model["slug"]:
+            raise ValueError(f"openrouter.models[{idx}].fallback must differ from its own slug")
+
 
-def load_model_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
+def get_config_path() -> str:
+    """MODEL_CONFIG_PATH when set (e.g. a benchmark config pointing at a local mock), else config/model.yaml."""
+    return os.environ.get("MODEL_CONFIG_PATH") or DEFAULT_CONFIG_PATH
+
+
+def load_model_config(config_path: Optional[str] = None) -> Dict[str, Any]:
     global _CONFIG
 
+    config_path = config_path or get_config_path()
     with open(config_path, "r", encoding="utf-8") as handle:
         raw_text = handle.read()
 
@@ -140,3 +271,60 @@ def is_allowed_model(slug: str) -> bool:
         return False
     allowed = {item["slug"] for item in get_models()}
     return slug in allowed
+
+
+def get_http_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_HTTP_SETTINGS)
+    settings.update(_get_config()["openrouter"].get("http") or {})
+    return settings
+
+
+def get_retry_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_RETRY_SETTINGS)
+    settings.update(_get_config()["openrouter"].get("retry") or {})
+    return settings
+
+
+def get_circuit_breaker_settings() -> Dict[str, Any]:
+    settings = dict(DEFAULT_CIRCUIT_BREAKER_SETTINGS)
+    settings.update(_get_config()["openrouter"].get("circuit_breaker") or {})
+    return settings
+
+
+def get_model_settings(slug: str) -> Dict[str, Any]:
+    for item in _get_config()["openrouter"]["models"]:
+        if item["slug"] == slug:
+            return item
+    return {}
+
+
+def get_model_timeout(slug: str) -> float:
+    timeout = get_model_settings(slug).get("timeout")
+    if timeout is None:
+        timeout = get_http_settings()["timeout"]
+    return float(timeout)
+
+
+def get_model_fallback(slug: str) -> Optional[str]:
+    return get_model_settings(slug).get("fallback")
+
+
+def get_hedge_settings(slug: str) -> Optional[Dict[str, Any]]:
+    """Hedging settings for a model, or None when the model is not hedged."""
+    hedge_cfg = get_model_settings(slug).get("hedge")
+    if hedge_cfg is None:
+        return None
+    settings = dict(DEFAULT_HEDGE_SETTINGS)
+    settings.update(hedge_cfg)
+    settings["fallback"] = get_model_fallback(slug)
+    return settings
+
+
+def get_rate_limit_settings(slug: str) -> Optional[Dict[str, Any]]:
+    """Client-side rate limit for a model, or None when the model is not limited."""
+    rate_limit_cfg = get_model_settings(slug).get("rate_limit")
+    if rate_limit_cfg is None:
+        return None
+    settings = dict(DEFAULT_RATE_LIMIT_SETTINGS)
+    settings.update(rate_limit_cfg)
+    return settings
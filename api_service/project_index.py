@@ -0,0 +1,323 @@
+"""
+Parsed, cached index of the project evidence bank in static/constants.js.
+
+The projects array is parsed once into plain Python objects and reused until
+the source file changes. `python -m api_service.project_index` precompiles the
+index to a JSON artifact so deployments can skip parsing entirely.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("api_service")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONSTANTS_PATH = os.path.join(ROOT_DIR, "static", "constants.js")
+DEFAULT_ARTIFACT_PATH = os.path.join(ROOT_DIR, "static", "projects.index.json")
+PROJECTS_START_PATTERN = re.compile(r"export\s+const\s+projects\s*=\s*\[")
+
+_INDEX: Optional[Dict[str, Any]] = None
+_INDEX_LOCK = threading.Lock()
+
+
+class ProjectIndexError(ValueError):
+    """Raised when the project bank cannot be parsed into a valid index."""
+
+
+class _JsLiteralParser:
+    """Parse the subset of JavaScript literals used by constants.js (objects, arrays, strings, numbers)."""
+
+    IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*")
+    NUMBER_PATTERN = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+    KEYWORDS = {"true": True, "false": False, "null": None}
+    ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+
+    def __init__(self, text: str, position: int):
+        self.text = text
+        self.position = position
+
+    def error(self, message: str) -> ProjectIndexError:
+        line = self.text.count("\n", 0, self.position) + 1
+        return ProjectIndexError(f"constants.js line {line}: {message}")
+
+    def skip_whitespace(self) -> None:
+        text = self.text
+        while self.position < len(text):
+            if text[self.position].isspace():
+                self.position += 1
+            elif text.startswith("//", self.position):
+                end = text.find("\n", self.position)
+                self.position = len(text) if end == -1 else end
+            elif text.startswith("/*", self.position):
+                end = text.find("*/", self.position + 2)
+                if end == -1:
+                    raise self.error("unterminated block comment")
+                self.position = end + 2
+            else:
+                return
+
+    def peek(self) -> str:
+        self.skip_whitespace()
+        if self.position >= len(self.text):
+            raise self.error("unexpected end of file")
+        return self.text[self.position]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"expected '{char}' but found '{self.text[self.position]}'")
+        self.position += 1
+
+    def parse_value(self) -> Any:
+        char = self.peek()
+        if char == "{":
+            return self.parse_object()
+        if char == "[":
+            return self.parse_array()
+        if char in {'"', "'", "`"}:
+            return self.parse_string()
+
+        number_match = self.NUMBER_PATTERN.match(self.text, self.position)
+        if number_match:
+            self.position = number_match.end()
+            literal = number_match.group(0)
+            return float(literal) if any(c in literal for c in ".eE") else int(literal)
+
+        identifier_match = self.IDENTIFIER_PATTERN.match(self.text, self.position)
+        if identifier_match and identifier_match.group(0) in self.KEYWORDS:
+            self.position = identifier_match.end()
+            return self.KEYWORDS[identifier_match.group(0)]
+
+        raise self.error(f"unsupported value starting with '{char}'")
+
+    def parse_string(self) -> str:
+        quote = self.text[self.position]
+        self.position += 1
+        chunks = []
+        while self.position < len(self.text):
+            char = self.text[self.position]
+            if char == quote:
+                self.position += 1
+                return "".join(chunks)
+            if char == "\\":
+                escaped = self.text[self.position + 1 : self.position + 2]
+                if escaped == "u":
+                    chunks.append(chr(int(self.text[self.position + 2 : self.position + 6], 16)))
+                    self.position += 6
+                    continue
+                chunks.append(self.ESCAPES.get(escaped, escaped))
+                self.position += 2
+                continue
+            if quote == "`" and self.text.startswith("${", self.position):
+                raise self.error("template literal interpolation is not supported")
+            if char == "\n" and quote != "`":
+                raise self.error("unterminated string literal")
+            chunks.append(char)
+            self.position += 1
+        raise self.error("unterminated string literal")
+
+    def parse_key(self) -> str:
+        char = self.peek()
+        if char in {'"', "'"}:
+            return self.parse_string()
+        identifier_match = self.IDENTIFIER_PATTERN.match(self.text, self.position)
+        if not identifier_match:
+            raise self.error(f"expected object key but found '{char}'")
+        self.position = identifier_match.end()
+        return identifier_match.group(0)
+
+    def parse_object(self) -> Dict[str, Any]:
+        self.expect("{")
+        result: Dict[str, Any] = {}
+        while self.peek() != "}":
+            key = self.parse_key()
+            self.expect(":")
+            result[key] = self.parse_value()
+            if self.peek() == ",":
+                self.position += 1
+            elif self.peek() != "}":
+                raise self.error("expected ',' or '}' in object")
+        self.position += 1
+        return result
+
+    def parse_array(self) -> List[Any]:
+        self.expect("[")
+        result: List[Any] = []
+        while self.peek() != "]":
+            result.append(self.parse_value())
+            if self.peek() == ",":
+                self.position += 1
+            elif self.peek() != "]":
+                raise self.error("expected ',' or ']' in array")
+        self.position += 1
+        return result
+
+
+def _string_list(project: Dict[str, Any], key: str) -> List[str]:
+    values = project.get(key) or []
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ProjectIndexError(f"project '{project.get('id')}' field '{key}' must be a list of strings")
+    return values
+
+
+def _validate_projects(projects: Any) -> List[Dict[str, Any]]:
+    if not isinstance(projects, list) or not projects:
+        raise ProjectIndexError("projects must be a non-empty array")
+
+    seen_ids = set()
+    for idx, project in enumerate(projects):
+        if not isinstance(project, dict):
+            raise ProjectIndexError(f"projects[{idx}] must be an object")
+        for key in ("id", "title"):
+            if not isinstance(project.get(key), str) or not project[key].strip():
+                raise ProjectIndexError(f"projects[{idx}].{key} must be a non-empty string")
+        if project["id"] in seen_ids:
+            raise ProjectIndexError(f"duplicate project id: {project['id']}")
+        seen_ids.add(project["id"])
+        for key in ("evidence", "bestForRoles", "technologies", "highlights"):
+            _string_list(project, key)
+
+    return projects
+
+
+def parse_projects(source_text: str) -> List[Dict[str, Any]]:
+    """Parse and validate the exported projects array from constants.js source."""
+    start_match = PROJECTS_START_PATTERN.search(source_text)
+    if not start_match:
+        raise ProjectIndexError("could not find 'export const projects = [' in constants.js")
+
+    parser = _JsLiteralParser(source_text, start_match.end() - 1)
+    return _validate_projects(parser.parse_array())
+
+
+def _summarize_project(project: Dict[str, Any]) -> Dict[str, Any]:
+    roles = [project["role"]] if isinstance(project.get("role"), str) and project["role"] else []
+    return {
+        "id": project["id"],
+        "title": project["title"],
+        "roles": roles + _string_list(project, "bestForRoles"),
+        "technologies": _string_list(project, "technologies"),
+        "evidence": _string_list(project, "evidence") + _string_list(project, "highlights"),
+    }
+
+
+def build_index(source_text: str) -> Dict[str, Any]:
+    projects = parse_projects(source_text)
+    return {
+        "source_sha256": hashlib.sha256(source_text.encode("utf-8")).hexdigest(),
+        "projects": projects,
+        "entries": [_summarize_project(project) for project in projects],
+    }
+
+
+def _source_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def _load_artifact(artifact_path: str, source_sha256: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(artifact_path):
+        return None
+
+    try:
+        with open(artifact_path, "r", encoding="utf-8") as handle:
+            artifact = json.load(handle)
+        if not isinstance(artifact, dict) or not isinstance(artifact.get("source_sha256"), str):
+            raise ProjectIndexError("artifact must be a JSON object with a source_sha256")
+
+        if source_sha256 is not None and artifact.get("source_sha256") != source_sha256:
+            logger.info(f"Ignoring stale project index artifact: {artifact_path}")
+            return None
+
+        artifact["projects"] = _validate_projects(artifact.get("projects"))
+    except (OSError, ValueError) as exc:
+        # A corrupt artifact is treated like a stale one: rebuild from constants.js.
+        logger.warning(f"Ignoring unreadable project index artifact {artifact_path}: {exc}")
+        return None
+
+    artifact["entries"] = [_summarize_project(project) for project in artifact["projects"]]
+    return artifact
+
+
+def _load_index(signature: Optional[Tuple[int, int]]) -> Dict[str, Any]:
+    source_text = None
+    source_sha256 = None
+    if signature is not None:
+        with open(CONSTANTS_PATH, "r", encoding="utf-8") as handle:
+            source_text = handle.read()
+        source_sha256 = hashlib.sha256(source_text.encode("utf-8")).hexdigest()
+
+    index = _load_artifact(DEFAULT_ARTIFACT_PATH, source_sha256)
+    if index is not None:
+        logger.info(f"Loaded precompiled project index: {DEFAULT_ARTIFACT_PATH}")
+    elif source_text is not None:
+        index = build_index(source_text)
+        logger.info(f"Parsed project index from: {CONSTANTS_PATH}")
+    else:
+        raise ProjectIndexError(f"Constants file not found at: {CONSTANTS_PATH}")
+
+    index["signature"] = signature
+    index["fingerprint"] = index["source_sha256"]
+    # Prompt-ready JSON for each project, serialized once per index version.
+    index["project_blocks"] = [json.dumps(project, indent=2, ensure_ascii=False) for project in index["projects"]]
+    logger.info(f"Project index ready with {len(index['projects'])} projects")
+    return index
+
+
+def get_project_index() -> Dict[str, Any]:
+    """
+    Return the cached project index, reloading it when constants.js changes.
+
+    A reload failure keeps serving the last good index; with no good index
+    the error propagates.
+    """
+    global _INDEX
+    signature = _source_signature(CONSTANTS_PATH)
+    index = _INDEX
+    if index is not None and index["signature"] == signature:
+        return index
+
+    with _INDEX_LOCK:
+        if _INDEX is None or _INDEX["signature"] != signature:
+            try:
+                _INDEX = _load_index(signature)
+            except (OSError, ValueError) as exc:
+                if _INDEX is None:
+                    raise
+                logger.error(f"Failed to reload project index, keeping previous version: {exc}")
+        return _INDEX
+
+
+def preload_project_index() -> Dict[str, Any]:
+    """Build the index at startup; raises if the project bank is missing or malformed."""
+    return get_project_index()
+
+
+def write_artifact(output_path: str = DEFAULT_ARTIFACT_PATH) -> Dict[str, Any]:
+    with open(CONSTANTS_PATH, "r", encoding="utf-8") as handle:
+        index = build_index(handle.read())
+
+    artifact = {"source_sha256": index["source_sha256"], "projects": index["projects"]}
+    with open(output_path, "w", encoding="utf-8") as handle:
+        json.dump(artifact, handle, ensure_ascii=False)
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompile the project evidence bank to JSON.")
+    parser.add_argument("--output", default=DEFAULT_ARTIFACT_PATH, help="Path of the JSON artifact to write")
+    args = parser.parse_args()
+
+    index = write_artifact(args.output)
+    print(f"Wrote {len(index['projects'])} projects to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Local BM25 ranking over the project evidence bank.
+
+The term-weight matrix is built once per project index version, so scoring a
+job description or question set is a single sparse lookup and matrix-vector
+product.
+"""
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from api_service.project_index import get_project_index
+
+logger = logging.getLogger("api_service")
+
+DEFAULT_PROJECT_TOP_K = 8
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Short, high-signal fields are repeated so they outweigh long prose.
+FIELD_WEIGHTS = {
+    "title": 3,
+    "roles": 2,
+    "technologies": 2,
+    "evidence": 1,
+    "description": 1,
+    "problem": 1,
+    "built": 1,
+}
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by for from has have in into is it its of on or our that the their this
+    to was we were will with you your who what when where which why how about across using used
+    """.split()
+)
+
+_MODEL: Optional[Dict[str, Any]] = None
+_MODEL_LOCK = threading.Lock()
+
+
+def get_project_top_k() -> int:
+    """Number of projects sent to the model; 0 sends the full bank."""
+    try:
+        return max(0, int(os.environ.get("PROJECT_TOP_K", DEFAULT_PROJECT_TOP_K)))
+    except ValueError:
+        logger.warning("PROJECT_TOP_K is not an integer; using the default")
+        return DEFAULT_PROJECT_TOP_K
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _document_tokens(project: Dict[str, Any], entry: Dict[str, Any]) -> List[str]:
+    tokens: List[str] = []
+    for field, weight in FIELD_WEIGHTS.items():
+        value = entry.get(field, project.get(field))
+        text = " ".join(value) if isinstance(value, list) else str(value or "")
+        tokens.extend(tokenize(text) * weight)
+    return tokens
+
+
+def _build_model(index: Dict[str, Any]) -> Dict[str, Any]:
+    documents = [
+        Counter(_document_tokens(project, entry))
+        for project, entry in zip(index["projects"], index["entries"])
+    ]
+    vocabulary = {term: position for position, term in enumerate(sorted(set().union(*documents)))}
+
+    term_frequencies = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, counts in enumerate(documents):
+        for term, count in counts.items():
+            term_frequencies[row, vocabulary[term]] = count
+
+    document_lengths = term_frequencies.sum(axis=1, keepdims=True)
+    average_length = float(document_lengths.mean()) or 1.0
+    document_frequencies = np.count_nonzero(term_frequencies, axis=0)
+    idf = np.log1p((len(documents) - document_frequencies + 0.5) / (document_frequencies + 0.5))
+
+    length_norm = BM25_K1 * (1.0 - BM25_B + BM25_B * document_lengths / average_length)
+    weights = term_frequencies * (BM25_K1 + 1.0) / (term_frequencies + length_norm) * idf
+
+    return {
+        "fingerprint": index["fingerprint"],
+        "vocabulary": vocabulary,
+        "weights": weights.astype(np.float32),
+    }
+
+
+def _get_model(index: Dict[str, Any]) -> Dict[str, Any]:
+    global _MODEL
+    model = _MODEL
+    if model is not None and model["fingerprint"] == index["fingerprint"]:
+        return model
+
+    with _MODEL_LOCK:
+        if _MODEL is None or _MODEL["fingerprint"] != index["fingerprint"]:
+            _MODEL = _build_model(index)
+            logger.info(f"Built BM25 project ranking model with {len(_MODEL['vocabulary'])} terms")
+        return _MODEL
+
+
+def score_projects(query: str, index: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Return one BM25 score per project in index order."""
+    index = index or get_project_index()
+    model = _get_model(index)
+    query_counts = Counter(term for term in tokenize(query) if term in model["vocabulary"])
+    if not query_counts:
+        return np.zeros(len(index["projects"]), dtype=np.float32)
+
+    columns = np.fromiter((model["vocabulary"][term] for term in query_counts), dtype=np.int64)
+    counts = np.fromiter(query_counts.values(), dtype=np.float32)
+    return model["weights"][:, columns] @ counts
+
+
+def rank_projects(query: str, top_k: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Select the projects most relevant to `query`.
+
+    Returns the selected positions in original bank order plus a debug list of
+    picks with their scores. With an empty query, or a top_k of 0 or at least
+    the bank size, every project is selected.
+    """
+    index = get_project_index()
+    total = len(index["projects"])
+    top_k = get_project_top_k() if top_k is None else max(0, int(top_k))
+
+    scores = score_projects(query, index)
+    if top_k == 0 or top_k >= total or not scores.any():
+        selected = list(range(total))
+    else:
+        # Stable sort keeps bank order among equal scores.
+        selected = sorted(np.argsort(-scores, kind="stable")[:top_k].tolist())
+
+    picks = sorted(
+        (
+            {
+                "id": index["entries"][position]["id"],
+                "title": index["entries"][position]["title"],
+                "score": round(float(scores[position]), 4),
+            }
+            for position in selected
+        ),
+        key=lambda pick: pick["score"],
+        reverse=True,
+    )
+    return {"index": index, "selected": selected, "total": total, "picks": picks}
@@ -0,0 +1,255 @@
+"""
+Client-side per-model rate limiting for OpenRouter calls.
+
+Each rate-limited model slug gets a token bucket (requests_per_minute with a
+burst allowance) and a cap on requests in flight. A call that finds no slot
+waits up to max_wait seconds instead of sending a request that would only come
+back as a 429. Both sync threads and asyncio tasks can wait on the same gate.
+Gates live in each worker process, so every worker enforces its share of the
+configured limits: the rate, burst and in-flight cap divided by
+WEB_CONCURRENCY, which gunicorn.conf.py sets to the worker count.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from api_service.model_config import get_rate_limit_settings
+
+logger = logging.getLogger("api_service")
+
+WAIT_WINDOW = 200
+# Waits shorter than this are not worth a log line.
+LOG_WAIT_SECONDS = 1.0
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when no request slot for a model frees up within max_wait."""
+
+
+class ModelGate:
+    def __init__(self, model: str):
+        self.model = model
+        self.lock = threading.Lock()
+        self.tokens: Optional[float] = None
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.waiting = 0
+        self.wakers: List[Callable[[], None]] = []
+        self.waits: Deque[float] = deque(maxlen=WAIT_WINDOW)
+        self.counts = {"acquired": 0, "queued": 0, "timeouts": 0, "max_queue_depth": 0}
+
+    def _try_acquire(self, settings: Dict[str, Any]) -> Optional[float]:
+        """Take a slot and return None, or return how long to sleep before trying again (0 = until a release)."""
+        rate = settings["requests_per_minute"] / 60.0
+        burst = float(settings["burst"])
+        now = time.monotonic()
+        if self.tokens is None:
+            self.tokens = burst
+        self.tokens = min(burst, self.tokens + (now - self.refilled_at) * rate)
+        self.refilled_at = now
+
+        if self.in_flight >= settings["max_in_flight"]:
+            return 0.0
+        if self.tokens < 1:
+            return (1 - self.tokens) / rate
+        self.tokens -= 1
+        self.in_flight += 1
+        return None
+
+    def _start_waiting(self, waker: Callable[[], None]) -> None:
+        self.waiting += 1
+        self.wakers.append(waker)
+        self.counts["queued"] += 1
+        self.counts["max_queue_depth"] = max(self.counts["max_queue_depth"], self.waiting)
+
+    def _stop_waiting(self, waker: Callable[[], None], waited: float, acquired: bool) -> None:
+        with self.lock:
+            self.waiting -= 1
+            self.wakers.remove(waker)
+            if not acquired:
+                self.counts["timeouts"] += 1
+        self._record_wait(waited, acquired)
+
+    def _record_wait(self, waited: float, acquired: bool) -> None:
+        with self.lock:
+            self.waits.append(waited)
+            if acquired:
+                self.counts["acquired"] += 1
+        if waited >= LOG_WAIT_SECONDS:
+            logger.info(f"Waited {waited:.2f}s for a {self.model} request slot")
+
+    def _timeout(self, settings: Dict[str, Any]) -> RateLimitTimeout:
+        logger.warning(f"Gave up after {settings['max_wait']}s waiting for a {self.model} request slot")
+        return RateLimitTimeout(
+            f"Model '{self.model}' is busy; no request slot freed up within {settings['max_wait']}s"
+        )
+
+    def acquire(self, settings: Dict[str, Any]) -> None:
+        started = time.monotonic()
+        with self.lock:
+            retry_in = self._try_acquire(settings)
+            if retry_in is None:
+                self.counts["acquired"] += 1
+                self.waits.append(0.0)
+                return
+            event = threading.Event()
+            self._start_waiting(event.set)
+
+        deadline = started + settings["max_wait"]
+        acquired = False
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._timeout(settings)
+                event.wait(min(retry_in or remaining, remaining))
+                event.clear()
+                with self.lock:
+                    retry_in = self._try_acquire(settings)
+                if retry_in is None:
+                    acquired = True
+                    return
+        finally:
+            self._stop_waiting(event.set, time.monotonic() - started, acquired)
+
+    async def acquire_async(self, settings: Dict[str, Any]) -> None:
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(event.set)
+
+        with self.lock:
+            retry_in = self._try_acquire(settings)
+            if retry_in is None:
+                self.counts["acquired"] += 1
+                self.waits.append(0.0)
+                return
+            self._start_waiting(wake)
+
+        deadline = started + settings["max_wait"]
+        acquired = False
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._timeout(settings)
+                try:
+                    await asyncio.wait_for(event.wait(), min(retry_in or remaining, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+                with self.lock:
+                    retry_in = self._try_acquire(settings)
+                if retry_in is None:
+                    acquired = True
+                    return
+        finally:
+            self._stop_waiting(wake, time.monotonic() - started, acquired)
+
+    def release(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+            wakers = list(self.wakers)
+        for waker in wakers:
+            waker()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            snapshot: Dict[str, Any] = {
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                **self.counts,
+            }
+            waits = list(self.waits)
+        if waits:
+            p50, p95, peak = np.percentile(waits, [50, 95, 100])
+            snapshot["wait_ms"] = {"p50": round(p50 * 1000), "p95": round(p95 * 1000), "max": round(peak * 1000)}
+        return snapshot
+
+
+def get_worker_count() -> int:
+    try:
+        return max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
+    except ValueError:
+        return 1
+
+
+def worker_share(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """This worker's share of a model's configured limits; burst and max_in_flight never drop below one."""
+    workers = get_worker_count()
+    if workers == 1:
+        return settings
+    share = dict(settings)
+    share["requests_per_minute"] = settings["requests_per_minute"] / workers
+    share["burst"] = max(1.0, settings["burst"] / workers)
+    share["max_in_flight"] = max(1, settings["max_in_flight"] // workers)
+    return share
+
+
+_GATES_LOCK = threading.Lock()
+_GATES: Dict[str, ModelGate] = {}
+
+
+def _get_gate(model: str) -> ModelGate:
+    with _GATES_LOCK:
+        gate = _GATES.get(model)
+        if gate is None:
+            gate = _GATES[model] = ModelGate(model)
+        return gate
+
+
+@contextmanager
+def model_slot(model: str) -> Iterator[None]:
+    """Hold one request slot for `model` while the block runs; a no-op for models without a rate_limit."""
+    settings = get_rate_limit_settings(model)
+    if settings is None:
+        yield
+        return
+    settings = worker_share(settings)
+
+    gate = _get_gate(model)
+    gate.acquire(settings)
+    try:
+        yield
+    finally:
+        gate.release()
+
+
+@asynccontextmanager
+async def model_slot_async(model: str) -> AsyncIterator[None]:
+    """Async variant of model_slot."""
+    settings = get_rate_limit_settings(model)
+    if settings is None:
+        yield
+        return
+    settings = worker_share(settings)
+
+    gate = _get_gate(model)
+    await gate.acquire_async(settings)
+    try:
+        yield
+    finally:
+        gate.release()
+
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    with _GATES_LOCK:
+        gates = dict(_GATES)
+    models = {}
+    for model, gate in gates.items():
+        settings = get_rate_limit_settings(model)
+        models[model] = {
+            **gate.snapshot(),
+            "settings": settings,
+            "worker_settings": worker_share(settings) if settings is not None else None,
+        }
+    return {"models": models, "workers": get_worker_count(), "pid": os.getpid()}
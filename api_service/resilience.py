@@ -0,0 +1,286 @@
+"""
+Retries and per-model circuit breakers for OpenRouter calls.
+
+Transient failures (429, 5xx, timeouts, dropped connections) are retried with
+exponential backoff and full jitter, waiting at least as long as any
+Retry-After header asks. Each model slug has a breaker that opens after
+repeated transient failures; while it is open, calls go to the model's
+configured fallback until a single half-open probe succeeds.
+"""
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+import httpx
+
+from api_service.model_config import get_circuit_breaker_settings, get_model_fallback, get_retry_settings
+
+logger = logging.getLogger("api_service")
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class OpenRouterError(RuntimeError):
+    """An error status from OpenRouter, with the Retry-After hint in seconds when one was sent."""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"OpenRouter API request failed with status {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a model and its fallback are both behind open circuit breakers."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, OpenRouterError):
+        return exc.status_code in RETRYABLE_STATUS_CODES or exc.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    def __init__(self, model: str):
+        self.model = model
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.counts = {"successes": 0, "failures": 0, "trips": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        settings = get_circuit_breaker_settings()
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= settings["reset_timeout"]:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                logger.info(f"Circuit for {self.model} is half-open; sending a probe")
+                return True
+            self.counts["rejected"] += 1
+            return False
+
+    def record(self, exc: Optional[BaseException] = None) -> None:
+        """Record a call outcome; errors that say nothing about model health only release the probe."""
+        settings = get_circuit_breaker_settings()
+        with self.lock:
+            self.probe_in_flight = False
+            if exc is None:
+                if self.state != CLOSED:
+                    logger.info(f"Circuit for {self.model} closed")
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                self.counts["successes"] += 1
+                return
+            if not is_retryable(exc):
+                return
+
+            self.counts["failures"] += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= settings["failure_threshold"]:
+                if self.state != OPEN:
+                    self.counts["trips"] += 1
+                    logger.warning(f"Circuit for {self.model} opened after {self.consecutive_failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            snapshot: Dict[str, Any] = {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                **self.counts,
+            }
+            if self.state == OPEN:
+                remaining = get_circuit_breaker_settings()["reset_timeout"] - (time.monotonic() - self.opened_at)
+                snapshot["half_open_in_seconds"] = round(max(0.0, remaining), 1)
+        snapshot["fallback"] = get_model_fallback(self.model)
+        return snapshot
+
+
+_BREAKERS_LOCK = threading.Lock()
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {"retries": 0, "fallback_routes": 0, "circuit_rejections": 0}
+
+
+def _count(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def get_breaker(model: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(model)
+        if breaker is None:
+            breaker = _BREAKERS[model] = CircuitBreaker(model)
+        return breaker
+
+
+def choose_model(model: str) -> str:
+    """Return the model to call: `model` unless its circuit is open, then its fallback."""
+    if get_breaker(model).allow():
+        return model
+
+    fallback = get_model_fallback(model)
+    if fallback and get_breaker(fallback).allow():
+        _count("fallback_routes")
+        logger.warning(f"Circuit for {model} is open; routing to fallback {fallback}")
+        return fallback
+
+    _count("circuit_rejections")
+    raise CircuitOpenError(f"Model '{model}' is temporarily unavailable; try again shortly or pick another model")
+
+
+def next_retry_delay(exc: BaseException, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying after `exc` on 0-based `attempt`, or None to give up."""
+    settings = get_retry_settings()
+    if not is_retryable(exc) or attempt + 1 >= settings["max_attempts"]:
+        return None
+
+    delay = random.uniform(0, min(settings["max_delay"], settings["base_delay"] * 2**attempt))
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        if retry_after > settings["max_retry_after"]:
+            logger.warning(f"Not retrying: Retry-After of {retry_after:.0f}s exceeds max_retry_after")
+            return None
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _retry_delay_after(target: str, exc: BaseException, attempt: int, retry_allowed: bool = True) -> Optional[float]:
+    """Record a failed attempt on `target`'s breaker and return the retry delay, or None to re-raise."""
+    get_breaker(target).record(exc)
+    if not isinstance(exc, Exception) or not retry_allowed:
+        return None
+    delay = next_retry_delay(exc, attempt)
+    if delay is not None:
+        _count("retries")
+        logger.warning(f"Retrying {target} in {delay:.2f}s after: {exc}")
+    return delay
+
+
+def call_with_retries(model: str, call: Callable[[str], Any]) -> Any:
+    """Run call(target) with retries, re-choosing the target on every attempt so an opened circuit falls back."""
+    attempt = 0
+    while True:
+        target = choose_model(model)
+        try:
+            result = call(target)
+        except BaseException as exc:
+            delay = _retry_delay_after(target, exc, attempt)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        get_breaker(target).record()
+        return result
+
+
+async def call_with_retries_async(model: str, call: Callable[[str], Awaitable[Any]]) -> Any:
+    """Async variant of call_with_retries."""
+    attempt = 0
+    while True:
+        target = choose_model(model)
+        try:
+            result = await call(target)
+        except BaseException as exc:
+            delay = _retry_delay_after(target, exc, attempt)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+
+        get_breaker(target).record()
+        return result
+
+
+def stream_with_retries(model: str, open_stream: Callable[[str], Iterator[Any]]) -> Iterator[Any]:
+    """
+    Yield from open_stream(target) with the same routing and retries as call_with_retries.
+
+    A failure is retried only before the first item is yielded; once output has
+    reached the client, restarting would duplicate it.
+    """
+    attempt = 0
+    while True:
+        target = choose_model(model)
+        started = False
+        try:
+            for item in open_stream(target):
+                started = True
+                yield item
+        except BaseException as exc:
+            delay = _retry_delay_after(target, exc, attempt, retry_allowed=not started)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        get_breaker(target).record()
+        return
+
+
+async def stream_with_retries_async(model: str, open_stream: Callable[[str], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+    """Async variant of stream_with_retries."""
+    attempt = 0
+    while True:
+        target = choose_model(model)
+        started = False
+        try:
+            async for item in open_stream(target):
+                started = True
+                yield item
+        except BaseException as exc:
+            delay = _retry_delay_after(target, exc, attempt, retry_allowed=not started)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+
+        get_breaker(target).record()
+        return
+
+
+def get_circuit_breaker_stats() -> Dict[str, Any]:
+    with _BREAKERS_LOCK:
+        breakers = dict(_BREAKERS)
+    with _STATS_LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+    stats["breakers"] = {model: breaker.snapshot() for model, breaker in breakers.items()}
+    stats["settings"] = {"retry": get_retry_settings(), "circuit_breaker": get_circuit_breaker_settings()}
+    stats["pid"] = os.getpid()
+    return stats
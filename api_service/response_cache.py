@@ -0,0 +1,521 @@
+"""
+Two-tier cache for generated responses.
+
+A small in-memory LRU sits in front of a SQLite file that every gunicorn
+worker on the host shares. Entries expire after a TTL and the disk tier is
+trimmed to a maximum entry count and byte size, least recently used first.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from api_service import singleflight
+
+logger = logging.getLogger("api_service")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(ROOT_DIR, "cache", "responses.sqlite3")
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_BYPASS = "bypass"
+CACHE_COALESCED = "coalesced"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"{name} is not a number; using {default}")
+        return default
+
+
+def make_cache_key(kind: str, **parts: Any) -> str:
+    """Hash the normalized inputs of a generation call into a cache key."""
+    normalized = json.dumps({"kind": kind, **parts}, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return f"{kind}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: str,
+        ttl: float,
+        max_entries: int,
+        max_bytes: int,
+        memory_entries: int,
+        memory_ttl: float,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory_ttl = memory_ttl
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        with self._memory_lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: Any, expires_at: float) -> None:
+        if self.memory_entries <= 0:
+            return
+        with self._memory_lock:
+            self._memory[key] = (min(expires_at, time.time() + self.memory_ttl), value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str, min_created_at: Optional[float] = None) -> Optional[Any]:
+        """Return a live entry; with min_created_at, only one written at or after that time."""
+        value = self._memory_get(key) if min_created_at is None else None
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        now = time.time()
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ? AND created_at >= ?",
+                (key, now, min_created_at or 0.0),
+            ).fetchone()
+            if row is not None:
+                connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as exc:
+            logger.warning(f"Response cache read failed: {exc}")
+            row = None
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        value = json.loads(row[0])
+        self._memory_set(key, value, row[1])
+        self._count("disk_hits")
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        serialized = json.dumps(value, ensure_ascii=False)
+        self._memory_set(key, value, expires_at)
+
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, serialized, len(serialized.encode("utf-8")), now, expires_at, now),
+            )
+            self._count("writes")
+            self._evict(connection, now)
+        except sqlite3.Error as exc:
+            logger.warning(f"Response cache write failed: {exc}")
+
+    def delete(self, key: str) -> None:
+        with self._memory_lock:
+            self._memory.pop(key, None)
+        try:
+            self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as exc:
+            logger.warning(f"Response cache delete failed: {exc}")
+
+    def try_acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        """Take the cross-worker lease for key unless another live owner holds it."""
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT owner, expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+                acquired = row is None or row[1] <= now or row[0] == owner
+                if acquired:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                        (key, owner, now + ttl),
+                    )
+            finally:
+                connection.execute("COMMIT")
+        except sqlite3.Error as exc:
+            logger.warning(f"Lease acquisition failed, computing without it: {exc}")
+            return True
+        return acquired
+
+    def release_lease(self, key: str, owner: str) -> None:
+        try:
+            self._connection().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+        except sqlite3.Error as exc:
+            logger.warning(f"Lease release failed: {exc}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        evicted = connection.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+        count, total_bytes = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+        while count > self.max_entries or total_bytes > self.max_bytes:
+            row = connection.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            connection.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            count -= 1
+            total_bytes -= row[1]
+            evicted += 1
+
+        if evicted:
+            self._count("evictions", evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        with self._memory_lock:
+            stats["memory_entries"] = len(self._memory)
+        try:
+            count, total_bytes = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            stats["disk_entries"] = count
+            stats["disk_bytes"] = total_bytes
+        except sqlite3.Error as exc:
+            stats["disk_error"] = str(exc)
+        stats["pid"] = os.getpid()
+        return stats
+
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def is_response_cache_enabled() -> bool:
+    return os.environ.get("RESPONSE_CACHE_ENABLED", "1").lower() not in {"0", "false", "no"}
+
+
+def get_response_cache() -> ResponseCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResponseCache(
+                    path=os.environ.get("RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    ttl=_env_number("RESPONSE_CACHE_TTL", 7 * 24 * 3600),
+                    max_entries=int(_env_number("RESPONSE_CACHE_MAX_ENTRIES", 2000)),
+                    max_bytes=int(_env_number("RESPONSE_CACHE_MAX_BYTES", 50 * 1024 * 1024)),
+                    memory_entries=int(_env_number("RESPONSE_CACHE_MEMORY_ENTRIES", 128)),
+                    memory_ttl=_env_number("RESPONSE_CACHE_MEMORY_TTL", 300),
+                )
+    return _CACHE
+
+
+def cache_get(cache_key: str) -> Optional[Any]:
+    """Look up a cached value, or None when missing or the cache is disabled."""
+    if not is_response_cache_enabled():
+        return None
+    return get_response_cache().get(cache_key)
+
+
+def cache_set(cache_key: str, value: Any, ttl: Optional[float] = None) -> None:
+    if is_response_cache_enabled():
+        get_response_cache().set(cache_key, value, ttl)
+
+
+def _compute_and_store(
+    cache: ResponseCache, cache_key: str, compute: Callable[[], Any], use_cache: bool, ttl: Optional[float] = None
+) -> Tuple[Any, bool]:
+    """Compute and store a value, deferring to another worker's lease when enabled."""
+    if not singleflight.is_cross_worker_enabled():
+        value = compute()
+        cache.set(cache_key, value, ttl)
+        return value, False
+
+    started_at = time.time()
+    owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+    value, acquired = singleflight.wait_for_lease(
+        cache_key,
+        lambda: cache.try_acquire_lease(cache_key, owner, singleflight.get_lease_ttl()),
+        # A bypass must not pick up an entry written before it started.
+        lambda: cache.get(cache_key, None if use_cache else started_at),
+    )
+    if value is not None:
+        return value, True
+
+    try:
+        value = compute()
+        cache.set(cache_key, value, ttl)
+        return value, False
+    finally:
+        if acquired:
+            cache.release_lease(cache_key, owner)
+
+
+async def _compute_and_store_async(
+    cache: ResponseCache,
+    cache_key: str,
+    compute: Callable[[], Awaitable[Any]],
+    use_cache: bool,
+    ttl: Optional[float] = None,
+) -> Tuple[Any, bool]:
+    if not singleflight.is_cross_worker_enabled():
+        value = await compute()
+        await asyncio.to_thread(cache.set, cache_key, value, ttl)
+        return value, False
+
+    started_at = time.time()
+    owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+    value, acquired = await singleflight.wait_for_lease_async(
+        cache_key,
+        lambda: cache.try_acquire_lease(cache_key, owner, singleflight.get_lease_ttl()),
+        lambda: cache.get(cache_key, None if use_cache else started_at),
+    )
+    if value is not None:
+        return value, True
+
+    try:
+        value = await compute()
+        await asyncio.to_thread(cache.set, cache_key, value, ttl)
+        return value, False
+    finally:
+        if acquired:
+            await asyncio.to_thread(cache.release_lease, cache_key, owner)
+
+
+def run_cached(
+    cache_key: str, compute: Callable[[], Any], use_cache: bool = True, ttl: Optional[float] = None
+) -> Tuple[Any, str]:
+    """
+    Return (value, cache_status) for `cache_key`, calling `compute` on a miss.
+
+    Concurrent misses for the same key share one call to `compute`. With
+    use_cache False the lookup is skipped but the fresh value is still stored,
+    so a bypass also refreshes the cache. `ttl` overrides the cache-wide TTL
+    for the stored value.
+    """
+    if not is_response_cache_enabled():
+        value, shared = singleflight.do(cache_key, compute)
+        return value, CACHE_COALESCED if shared else CACHE_BYPASS
+
+    cache = get_response_cache()
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached, CACHE_HIT
+
+    (value, cross_worker_shared), shared = singleflight.do(
+        cache_key, lambda: _compute_and_store(cache, cache_key, compute, use_cache, ttl)
+    )
+    if shared or cross_worker_shared:
+        return value, CACHE_COALESCED
+    return value, CACHE_MISS if use_cache else CACHE_BYPASS
+
+
+async def run_cached_async(
+    cache_key: str, compute: Callable[[], Awaitable[Any]], use_cache: bool = True, ttl: Optional[float] = None
+) -> Tuple[Any, str]:
+    """Async variant of run_cached; SQLite access runs in a worker thread."""
+    if not is_response_cache_enabled():
+        value, shared = await singleflight.do_async(cache_key, compute)
+        return value, CACHE_COALESCED if shared else CACHE_BYPASS
+
+    cache = get_response_cache()
+    if use_cache:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return cached, CACHE_HIT
+
+    (value, cross_worker_shared), shared = await singleflight.do_async(
+        cache_key, lambda: _compute_and_store_async(cache, cache_key, compute, use_cache, ttl)
+    )
+    if shared or cross_worker_shared:
+        return value, CACHE_COALESCED
+    return value, CACHE_MISS if use_cache else CACHE_BYPASS
+
+
+def _cache_status(use_cache: bool, shared: bool, cache: Optional[ResponseCache]) -> str:
+    if shared:
+        return CACHE_COALESCED
+    return CACHE_MISS if cache is not None and use_cache else CACHE_BYPASS
+
+
+def _stream_and_store(
+    cache: Optional[ResponseCache],
+    cache_key: str,
+    open_stream: Callable[[], Iterator[str]],
+    finish: Callable[[str], Any],
+    use_cache: bool,
+) -> Iterator[Tuple[str, Any]]:
+    """Stream text pieces, then store finish(text); defers to another worker's lease when enabled."""
+    owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+    acquired = False
+    if cache is not None and singleflight.is_cross_worker_enabled():
+        started_at = time.time()
+        value, acquired = singleflight.wait_for_lease(
+            cache_key,
+            lambda: cache.try_acquire_lease(cache_key, owner, singleflight.get_lease_ttl()),
+            lambda: cache.get(cache_key, None if use_cache else started_at),
+        )
+        if value is not None:
+            yield "value", (value, True)
+            return
+
+    try:
+        parts = []
+        for piece in open_stream():
+            parts.append(piece)
+            yield "text", piece
+        value = finish("".join(parts))
+        if cache is not None:
+            cache.set(cache_key, value)
+        yield "value", (value, False)
+    finally:
+        if acquired:
+            cache.release_lease(cache_key, owner)
+
+
+async def _stream_and_store_async(
+    cache: Optional[ResponseCache],
+    cache_key: str,
+    open_stream: Callable[[], AsyncIterator[str]],
+    finish: Callable[[str], Any],
+    use_cache: bool,
+) -> AsyncIterator[Tuple[str, Any]]:
+    owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+    acquired = False
+    if cache is not None and singleflight.is_cross_worker_enabled():
+        started_at = time.time()
+        value, acquired = await singleflight.wait_for_lease_async(
+            cache_key,
+            lambda: cache.try_acquire_lease(cache_key, owner, singleflight.get_lease_ttl()),
+            lambda: cache.get(cache_key, None if use_cache else started_at),
+        )
+        if value is not None:
+            yield "value", (value, True)
+            return
+
+    try:
+        parts = []
+        async for piece in open_stream():
+            parts.append(piece)
+            yield "text", piece
+        value = finish("".join(parts))
+        if cache is not None:
+            await asyncio.to_thread(cache.set, cache_key, value)
+        yield "value", (value, False)
+    finally:
+        if acquired:
+            await asyncio.to_thread(cache.release_lease, cache_key, owner)
+
+
+def stream_cached(
+    cache_key: str,
+    open_stream: Callable[[], Iterator[str]],
+    finish: Callable[[str], Any],
+    use_cache: bool = True,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Streaming counterpart of run_cached.
+
+    Yields ("text", piece) for each piece of a fresh stream, then
+    ("value", (value, cache_status)) where value is finish() of the full text.
+    A cache hit, or a result another worker stored while this one waited on
+    its lease, yields only the value. Concurrent identical streams in this
+    worker share one upstream stream; late joiners replay it from the start.
+    """
+    cache = get_response_cache() if is_response_cache_enabled() else None
+    if cache is not None and use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield "value", (cached, CACHE_HIT)
+            return
+
+    produce = lambda: _stream_and_store(cache, cache_key, open_stream, finish, use_cache)
+    for (kind, payload), shared in singleflight.do_stream(cache_key, produce):
+        if kind == "value":
+            value, cross_worker_shared = payload
+            payload = value, _cache_status(use_cache, shared or cross_worker_shared, cache)
+        yield kind, payload
+
+
+async def stream_cached_async(
+    cache_key: str,
+    open_stream: Callable[[], AsyncIterator[str]],
+    finish: Callable[[str], Any],
+    use_cache: bool = True,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Async variant of stream_cached; SQLite access runs in a worker thread."""
+    cache = get_response_cache() if is_response_cache_enabled() else None
+    if cache is not None and use_cache:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            yield "value", (cached, CACHE_HIT)
+            return
+
+    produce = lambda: _stream_and_store_async(cache, cache_key, open_stream, finish, use_cache)
+    async for (kind, payload), shared in singleflight.do_stream_async(cache_key, produce):
+        if kind == "value":
+            value, cross_worker_shared = payload
+            payload = value, _cache_status(use_cache, shared or cross_worker_shared, cache)
+        yield kind, payload
+
+
+def get_response_cache_stats() -> Dict[str, Any]:
+    if not is_response_cache_enabled():
+        return {"enabled": False}
+    return {"enabled": True, **get_response_cache().stats()}
@@ -0,0 +1,335 @@
+"""
+Singleflight deduplication for identical generation calls.
+
+Concurrent callers with the same key share one execution of the wrapped
+function. Within a worker this uses futures; across workers an optional
+SQLite lease in the response cache file lets followers wait for the leader's
+cached result instead of making their own upstream call. Streams are shared
+within a worker too: callers that join late replay what has arrived so far
+and then follow the stream live.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("api_service")
+
+LEASE_POLL_INTERVAL = 0.25
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {
+    "leaders": 0,
+    "coalesced_local": 0,
+    "coalesced_cross_worker": 0,
+    "lease_timeouts": 0,
+}
+
+_CALLS_LOCK = threading.Lock()
+_CALLS: Dict[str, Future] = {}
+_ASYNC_CALLS: Dict[Tuple[int, str], "asyncio.Task[Any]"] = {}
+_STREAMS: Dict[str, "StreamBroadcast"] = {}
+_ASYNC_STREAMS: Dict[Tuple[int, str], "AsyncStreamBroadcast"] = {}
+
+
+def _count(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def is_cross_worker_enabled() -> bool:
+    return os.environ.get("SINGLEFLIGHT_CROSS_WORKER", "0").lower() in {"1", "true", "yes"}
+
+
+def get_lease_ttl() -> float:
+    try:
+        return float(os.environ.get("SINGLEFLIGHT_LEASE_TTL", 180))
+    except ValueError:
+        return 180.0
+
+
+def do(key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+    """
+    Run fn once for all concurrent callers with the same key.
+
+    Returns (value, shared) where shared is True when this caller reused
+    another caller's execution. Exceptions propagate to every waiter.
+    """
+    with _CALLS_LOCK:
+        future = _CALLS.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _CALLS[key] = future
+
+    if not leader:
+        _count("coalesced_local")
+        return future.result(), True
+
+    _count("leaders")
+    try:
+        future.set_result(fn())
+    except BaseException as exc:
+        future.set_exception(exc)
+    finally:
+        with _CALLS_LOCK:
+            _CALLS.pop(key, None)
+    return future.result(), False
+
+
+async def do_async(key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+    """Async variant of do() for callers on the same event loop."""
+    call_key = (id(asyncio.get_running_loop()), key)
+    task = _ASYNC_CALLS.get(call_key)
+    if task is not None:
+        _count("coalesced_local")
+        # Shield so a follower's cancellation does not cancel the shared call.
+        return await asyncio.shield(task), True
+
+    _count("leaders")
+    task = asyncio.ensure_future(fn())
+    _ASYNC_CALLS[call_key] = task
+    task.add_done_callback(lambda _: _ASYNC_CALLS.pop(call_key, None))
+    return await asyncio.shield(task), False
+
+
+class StreamBroadcast:
+    """
+    One in-flight stream shared by every caller with the same key.
+
+    Items are kept so callers that join late can replay them. Whichever
+    reader runs out of items pulls the next one, so the stream keeps going as
+    long as any reader is left, even after the caller that started it leaves.
+    """
+
+    def __init__(self, iterator: Iterator[Any]):
+        self._condition = threading.Condition()
+        self._iterator = iterator
+        self._pulling = False
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.readers = 0
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        with self._condition:
+            self.done = True
+            self.error = error
+            self._pulling = False
+            self._condition.notify_all()
+
+    def _pull(self) -> None:
+        try:
+            item = next(self._iterator)
+        except StopIteration:
+            self._finish()
+        except BaseException as exc:
+            self._finish(exc)
+        else:
+            with self._condition:
+                self.items.append(item)
+                self._pulling = False
+                self._condition.notify_all()
+
+    def follow(self) -> Iterator[Any]:
+        position = 0
+        while True:
+            with self._condition:
+                while position == len(self.items) and not self.done and self._pulling:
+                    self._condition.wait()
+                items = self.items[position:]
+                finished = self.done
+                pull = not items and not finished
+                if pull:
+                    self._pulling = True
+            if pull:
+                self._pull()
+                continue
+            position += len(items)
+            yield from items
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+    def close(self) -> None:
+        close = getattr(self._iterator, "close", None)
+        if close is not None:
+            close()
+
+
+class AsyncStreamBroadcast:
+    """
+    StreamBroadcast for callers on one event loop.
+
+    The next item is pulled in its own task so a reader that is cancelled
+    mid-pull does not break the stream for the others.
+    """
+
+    def __init__(self, iterator: AsyncIterator[Any]):
+        self._iterator = iterator
+        self._pull_task: Optional["asyncio.Task[None]"] = None
+        self._changed = asyncio.Event()
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.readers = 0
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _pull(self) -> None:
+        try:
+            self.items.append(await self._iterator.__anext__())
+        except StopAsyncIteration:
+            self.done = True
+        except BaseException as exc:
+            self.done = True
+            self.error = exc
+        finally:
+            self._pull_task = None
+            self._notify()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            if position < len(self.items):
+                position += 1
+                yield self.items[position - 1]
+                continue
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            if self._pull_task is None:
+                self._pull_task = asyncio.ensure_future(self._pull())
+            await self._changed.wait()
+
+    async def aclose(self) -> None:
+        if self._pull_task is not None:
+            self._pull_task.cancel()
+        else:
+            await self._iterator.aclose()
+
+
+def do_stream(key: str, produce: Callable[[], Iterator[Any]]) -> Iterator[Tuple[Any, bool]]:
+    """
+    Iterate produce() once for all concurrent callers with the same key.
+
+    Yields (item, shared) pairs; shared is True for callers that joined a
+    stream another caller started. Exceptions propagate to every reader. The
+    stream is closed once its last reader leaves.
+    """
+    with _CALLS_LOCK:
+        broadcast = _STREAMS.get(key)
+        shared = broadcast is not None
+        if not shared:
+            broadcast = StreamBroadcast(produce())
+            _STREAMS[key] = broadcast
+        broadcast.readers += 1
+    _count("coalesced_local" if shared else "leaders")
+
+    try:
+        for item in broadcast.follow():
+            yield item, shared
+    finally:
+        with _CALLS_LOCK:
+            broadcast.readers -= 1
+            abandoned = broadcast.readers == 0 and not broadcast.done
+            if _STREAMS.get(key) is broadcast and (abandoned or broadcast.done):
+                _STREAMS.pop(key)
+        if abandoned:
+            broadcast.close()
+
+
+async def do_stream_async(key: str, produce: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Tuple[Any, bool]]:
+    """Async variant of do_stream() for callers on the same event loop."""
+    stream_key = (id(asyncio.get_running_loop()), key)
+    broadcast = _ASYNC_STREAMS.get(stream_key)
+    shared = broadcast is not None
+    if not shared:
+        broadcast = AsyncStreamBroadcast(produce())
+        _ASYNC_STREAMS[stream_key] = broadcast
+    broadcast.readers += 1
+    _count("coalesced_local" if shared else "leaders")
+
+    try:
+        async for item in broadcast.follow():
+            yield item, shared
+    finally:
+        broadcast.readers -= 1
+        abandoned = broadcast.readers == 0 and not broadcast.done
+        if _ASYNC_STREAMS.get(stream_key) is broadcast and (abandoned or broadcast.done):
+            _ASYNC_STREAMS.pop(stream_key)
+        if abandoned:
+            await broadcast.aclose()
+
+
+def wait_for_lease(
+    key: str,
+    try_acquire: Callable[[], bool],
+    lookup: Callable[[], Optional[Any]],
+) -> Tuple[Optional[Any], bool]:
+    """
+    Coordinate with other workers through a lease.
+
+    Returns (value, False) when another worker finished the call and its result
+    is available via `lookup`, or (None, True) when this caller holds the lease
+    and must compute the value itself.
+    """
+    deadline = time.monotonic() + get_lease_ttl()
+    while True:
+        # Look before acquiring: a leader stores its result before releasing the lease.
+        value = lookup()
+        if value is not None:
+            _count("coalesced_cross_worker")
+            return value, False
+
+        if try_acquire():
+            return None, True
+
+        if time.monotonic() >= deadline:
+            _count("lease_timeouts")
+            logger.warning(f"Timed out waiting for cross-worker lease on {key}; computing locally")
+            return None, False
+
+        time.sleep(LEASE_POLL_INTERVAL)
+
+
+async def wait_for_lease_async(
+    key: str,
+    try_acquire: Callable[[], bool],
+    lookup: Callable[[], Optional[Any]],
+) -> Tuple[Optional[Any], bool]:
+    """Async variant of wait_for_lease; the SQLite calls run in a worker thread."""
+    deadline = time.monotonic() + get_lease_ttl()
+    while True:
+        value = await asyncio.to_thread(lookup)
+        if value is not None:
+            _count("coalesced_cross_worker")
+            return value, False
+
+        if await asyncio.to_thread(try_acquire):
+            return None, True
+
+        if time.monotonic() >= deadline:
+            _count("lease_timeouts")
+            logger.warning(f"Timed out waiting for cross-worker lease on {key}; computing locally")
+            return None, False
+
+        await asyncio.sleep(LEASE_POLL_INTERVAL)
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+    with _CALLS_LOCK:
+        stats["in_flight"] = len(_CALLS) + len(_ASYNC_CALLS) + len(_STREAMS) + len(_ASYNC_STREAMS)
+    stats["coalesced"] = stats["coalesced_local"] + stats["coalesced_cross_worker"]
+    stats["cross_worker"] = is_cross_worker_enabled()
+    stats["pid"] = os.getpid()
+    return stats
@@ -0,0 +1,216 @@
+"""
+Token, cost and latency accounting for OpenRouter calls.
+
+Every call records the usage block OpenRouter returns, the model that actually
+served it and its wall-clock time. Totals are kept per model and per endpoint
+for the stats endpoint, and the calls made while handling one request are
+collected in a context-local scope so they can be reported in its debug field.
+"""
+import contextvars
+import functools
+import inspect
+import math
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+LATENCY_WINDOW = 200
+# Rough size of a token in English prose; only used for estimates.
+CHARS_PER_TOKEN = 4
+UNSCOPED_ENDPOINT = "other"
+
+_SCOPE: "contextvars.ContextVar[Optional[Dict[str, Any]]]" = contextvars.ContextVar("usage_scope", default=None)
+
+_STATS_LOCK = threading.Lock()
+_TOTALS: Dict[str, Dict[str, Dict[str, Any]]] = {"models": {}, "endpoints": {}}
+_LATENCIES: Dict[str, Dict[str, Deque[float]]] = {"models": {}, "endpoints": {}}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+@contextmanager
+def usage_scope(endpoint: str) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Attribute the calls made inside the block to `endpoint`.
+
+    A nested scope (company research inside a cover letter) gets its own
+    endpoint but adds its calls to the outer request's list.
+    """
+    token = _enter_scope(endpoint)
+    try:
+        yield _SCOPE.get()["calls"]
+    finally:
+        try:
+            _SCOPE.reset(token)
+        except ValueError:
+            # An async generator closed from another task; its context is already gone.
+            pass
+
+
+def _enter_scope(endpoint: str) -> "contextvars.Token":
+    parent = _SCOPE.get()
+    calls = parent["calls"] if parent is not None else []
+    return _SCOPE.set({"endpoint": endpoint, "calls": calls})
+
+
+def track_usage(endpoint: str) -> Callable:
+    """Decorator form of usage_scope for functions, coroutines and (async) generators."""
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def async_gen_wrapper(*args, **kwargs):
+                with usage_scope(endpoint):
+                    async for item in fn(*args, **kwargs):
+                        yield item
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def coroutine_wrapper(*args, **kwargs):
+                with usage_scope(endpoint):
+                    return await fn(*args, **kwargs)
+            return coroutine_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                # Step the generator inside its own context so the scope does not
+                # leak into the caller between items.
+                context = contextvars.copy_context()
+                context.run(_enter_scope, endpoint)
+                generator = context.run(fn, *args, **kwargs)
+                try:
+                    while True:
+                        try:
+                            item = context.run(next, generator)
+                        except StopIteration:
+                            return
+                        yield item
+                finally:
+                    context.run(generator.close)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with usage_scope(endpoint):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def _number(value: Any) -> float:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def _add(totals: Dict[str, Dict[str, Any]], latencies: Dict[str, Deque[float]], key: str, call: Dict[str, Any]) -> None:
+    bucket = totals.setdefault(
+        key,
+        {
+            "calls": 0,
+            "errors": 0,
+            "web_search_calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+            "cost": 0.0,
+        },
+    )
+    bucket["calls"] += 1
+    bucket["errors"] += call["error"] is not None
+    bucket["web_search_calls"] += call["webSearch"]
+    bucket["prompt_tokens"] += call["promptTokens"]
+    bucket["completion_tokens"] += call["completionTokens"]
+    bucket["cached_tokens"] += call["cachedTokens"]
+    bucket["cost"] += call["cost"]
+    if call["error"] is None:
+        latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(call["latencyMs"])
+
+
+def record_openrouter_call(
+    model: str,
+    response_data: Optional[Dict[str, Any]],
+    seconds: float,
+    web_search: bool,
+    text_tokens_estimate: int,
+    attach_resume: bool,
+    error: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Record one OpenRouter call (streamed or not) and return its per-call entry."""
+    response_data = response_data or {}
+    usage = response_data.get("usage") or {}
+    prompt_tokens = int(_number(usage.get("prompt_tokens")))
+    scope = _SCOPE.get()
+    call = {
+        "endpoint": scope["endpoint"] if scope is not None else UNSCOPED_ENDPOINT,
+        "model": model,
+        "servedModel": response_data.get("model") or model,
+        "provider": response_data.get("provider"),
+        "promptTokens": prompt_tokens,
+        "completionTokens": int(_number(usage.get("completion_tokens"))),
+        "cachedTokens": int(_number((usage.get("prompt_tokens_details") or {}).get("cached_tokens"))),
+        "cost": float(_number(usage.get("cost"))),
+        "latencyMs": round(seconds * 1000),
+        "webSearch": bool(web_search),
+        "error": error,
+    }
+    if attach_resume and prompt_tokens:
+        # The resume is the only non-text input, so it accounts for whatever the text does not.
+        call["resumeTokensEstimate"] = max(0, prompt_tokens - text_tokens_estimate)
+
+    with _STATS_LOCK:
+        _add(_TOTALS["models"], _LATENCIES["models"], model, call)
+        _add(_TOTALS["endpoints"], _LATENCIES["endpoints"], call["endpoint"], call)
+        served = _TOTALS["models"][model].setdefault("served_by", {})
+        served[call["servedModel"]] = served.get(call["servedModel"], 0) + 1
+
+    if scope is not None:
+        scope["calls"].append(call)
+    return call
+
+
+def current_usage_summary() -> Optional[Dict[str, Any]]:
+    """Usage of the calls made so far in the current request, or None outside a scope."""
+    scope = _SCOPE.get()
+    if scope is None:
+        return None
+    calls = list(scope["calls"])
+    resume_estimates = [call["resumeTokensEstimate"] for call in calls if "resumeTokensEstimate" in call]
+    return {
+        "calls": calls,
+        "promptTokens": sum(call["promptTokens"] for call in calls),
+        "completionTokens": sum(call["completionTokens"] for call in calls),
+        "cost": round(sum(call["cost"] for call in calls), 8),
+        "latencyMs": sum(call["latencyMs"] for call in calls),
+        "resumeTokensEstimate": resume_estimates[0] if resume_estimates else None,
+    }
+
+
+def _with_latency(totals: Dict[str, Dict[str, Any]], latencies: Dict[str, Deque[float]]) -> Dict[str, Any]:
+    result = {}
+    for key, bucket in totals.items():
+        entry = {**bucket, "cost": round(bucket["cost"], 8)}
+        if "served_by" in bucket:
+            entry["served_by"] = dict(bucket["served_by"])
+        samples = list(latencies.get(key, ()))
+        if samples:
+            p50, p95 = np.percentile(samples, [50, 95])
+            entry["latency_ms"] = {"p50": round(p50), "p95": round(p95)}
+        result[key] = entry
+    return result
+
+
+def get_usage_stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        return {
+            "models": _with_latency(_TOTALS["models"], _LATENCIES["models"]),
+            "endpoints": _with_latency(_TOTALS["endpoints"], _LATENCIES["endpoints"]),
+            "pid": os.getpid(),
+        }
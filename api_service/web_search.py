@@ -0,0 +1,150 @@
+"""
+Decide per request whether the OpenRouter web search tool is worth its cost.
+
+Questions are scored with a small set of weighted patterns: company research
+signals ("why do you want to work here", product, mission) push towards
+search, while behavioural and logistics questions ("describe a time",
+sponsorship, salary) push away from it. Cover letters search only when the job
+description carries little company context. A request can force either way.
+"""
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger("api_service")
+
+DEFAULT_QUESTION_THRESHOLD = 1.0
+# Job descriptions shorter than this rarely say enough about the company.
+DEFAULT_COVER_LETTER_MIN_WORDS = 150
+
+COMPANY_RESEARCH_QUESTION_PATTERN = re.compile(
+    r"\b("
+    r"why\s+(?:do\s+you\s+)?(?:want|interested)|"
+    r"why\s+(?:this\s+)?company|"
+    r"why\s+(?:are\s+you\s+)?(?:interested\s+in\s+)?(?:us|our)|"
+    r"what\s+do\s+you\s+know\s+about|"
+    r"company|product|mission|team|culture"
+    r")\b",
+    re.IGNORECASE,
+)
+QUESTION_SIGNALS = [
+    (COMPANY_RESEARCH_QUESTION_PATTERN, 1.0),
+    (re.compile(r"\b(?:work(?:ing)?\s+(?:here|at|for\s+us)|join(?:ing)?\s+(?:us|our))\b", re.IGNORECASE), 1.0),
+    (re.compile(r"\b(?:values|vision|customers?|competitors?|industry|recent\s+news|roadmap)\b", re.IGNORECASE), 0.5),
+    (re.compile(r"\b(?:describe|tell\s+(?:me|us)\s+about)\s+a\s+time\b", re.IGNORECASE), -1.5),
+    (re.compile(r"\b(?:how\s+do\s+you\s+(?:handle|approach|prioriti[sz]e)|your\s+(?:greatest|biggest)\s+(?:strength|weakness))\b", re.IGNORECASE), -1.0),
+    (re.compile(r"\b(?:years\s+of\s+experience|experience\s+with|proficien\w*|familiar\s+with)\b", re.IGNORECASE), -0.5),
+    (re.compile(r"\b(?:salary|compensation|sponsorship|visa|relocat\w*|start\s+date|notice\s+period|authori[sz]ed\s+to\s+work)\b", re.IGNORECASE), -2.0),
+]
+JOB_DESCRIPTION_COMPANY_CONTEXT_PATTERN = re.compile(
+    r"\b(?:about\s+us|about\s+the\s+company|who\s+we\s+are|our\s+mission|our\s+values|our\s+story|founded\s+in)\b",
+    re.IGNORECASE,
+)
+CUSTOM_INSTRUCTION_RESEARCH_PATTERN = re.compile(r"\b(?:research|recent\s+news|look\s+up)\b", re.IGNORECASE)
+
+_STATS_LOCK = threading.Lock()
+_DECISIONS: Dict[str, Dict[str, int]] = {}
+_LATENCY: Dict[bool, Dict[str, float]] = {True: {"calls": 0, "seconds": 0.0}, False: {"calls": 0, "seconds": 0.0}}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"{name} is not a number; using the default")
+        return default
+
+
+def score_question(question: str, company_name: str = "") -> float:
+    score = sum(weight for pattern, weight in QUESTION_SIGNALS if pattern.search(question))
+    if company_name and company_name.strip().lower() in question.lower():
+        score += 1.0
+    return score
+
+
+def _record_decision(kind: str, enabled: bool, forced: bool) -> None:
+    with _STATS_LOCK:
+        counts = _DECISIONS.setdefault(kind, {"searched": 0, "skipped": 0, "forced_on": 0, "forced_off": 0})
+        counts["searched" if enabled else "skipped"] += 1
+        if forced:
+            counts["forced_on" if enabled else "forced_off"] += 1
+
+
+def _decide(kind: str, override: Optional[bool], enabled: bool, reason: str, score: Optional[float] = None) -> Tuple[bool, Dict[str, Any]]:
+    forced = override is not None
+    if forced:
+        enabled, reason = bool(override), "request override"
+    _record_decision(kind, enabled, forced)
+    decision: Dict[str, Any] = {"enabled": enabled, "reason": reason}
+    if score is not None:
+        decision["score"] = round(score, 2)
+    return enabled, decision
+
+
+def decide_for_questions(
+    questions: Iterable[str], company_name: str = "", override: Optional[bool] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """Return (enabled, decision) for a set of application questions; the best-scoring question decides."""
+    threshold = _env_float("WEB_SEARCH_QUESTION_THRESHOLD", DEFAULT_QUESTION_THRESHOLD)
+    score = max((score_question(question, company_name) for question in questions), default=0.0)
+    enabled = score >= threshold
+    reason = "company research question" if enabled else "no company research question"
+    return _decide("question_answers", override, enabled, reason, score)
+
+
+def decide_for_cover_letter(
+    job_description: str, company_name: str, custom_instructions: str = "", override: Optional[bool] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """Return (enabled, decision) for a cover letter based on how much company context the request already has."""
+    if not (company_name or "").strip():
+        enabled, reason = False, "no company name"
+    elif CUSTOM_INSTRUCTION_RESEARCH_PATTERN.search(custom_instructions or ""):
+        enabled, reason = True, "custom instructions ask for research"
+    elif JOB_DESCRIPTION_COMPANY_CONTEXT_PATTERN.search(job_description or "") and len(
+        (job_description or "").split()
+    ) >= int(_env_float("WEB_SEARCH_COVER_LETTER_MIN_WORDS", DEFAULT_COVER_LETTER_MIN_WORDS)):
+        enabled, reason = False, "job description describes the company"
+    else:
+        enabled, reason = True, "job description has little company context"
+    return _decide("cover_letter", override, enabled, reason)
+
+
+def record_call_latency(web_search: bool, seconds: float) -> None:
+    with _STATS_LOCK:
+        _LATENCY[web_search]["calls"] += 1
+        _LATENCY[web_search]["seconds"] += seconds
+
+
+def _average(bucket: Dict[str, float]) -> Optional[float]:
+    return bucket["seconds"] / bucket["calls"] if bucket["calls"] else None
+
+
+def get_web_search_stats() -> Dict[str, Any]:
+    """
+    Gating counters plus an estimate of latency saved.
+
+    The estimate is skipped searches times the observed difference between the
+    average call latency with and without the search tool in this worker.
+    """
+    with _STATS_LOCK:
+        decisions = {kind: dict(counts) for kind, counts in _DECISIONS.items()}
+        with_search = _average(_LATENCY[True])
+        without_search = _average(_LATENCY[False])
+        calls = {"with_search": int(_LATENCY[True]["calls"]), "without_search": int(_LATENCY[False]["calls"])}
+
+    skipped = sum(counts["skipped"] for counts in decisions.values())
+    penalty = with_search - without_search if with_search is not None and without_search is not None else None
+    return {
+        "decisions": decisions,
+        "skipped": skipped,
+        "searched": sum(counts["searched"] for counts in decisions.values()),
+        "calls": calls,
+        "avg_latency_ms": {
+            "with_search": round(with_search * 1000) if with_search is not None else None,
+            "without_search": round(without_search * 1000) if without_search is not None else None,
+        },
+        "estimated_latency_saved_ms": round(max(penalty, 0.0) * skipped * 1000) if penalty is not None else None,
+        "pid": os.getpid(),
+    }
@@ -1,15 +1,61 @@
+import io
 import os
 import sys
+import json
+import time
 import logging
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, Response, g, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
 import traceback
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from api_service.ai_service import generate_cover_letter, generate_job_question_answers
-from api_service.model_config import get_default_model, get_models, is_allowed_model, load_model_config
-from pdf_service.pdf_generator import generate_cover_letter_pdf
+from api_service.ai_service import (
+    generate_cover_letter,
+    generate_job_question_answers,
+    preload_resume,
+    stream_cover_letter,
+    stream_job_question_answers,
+)
+from api_service.hedging import get_hedging_stats
+from api_service.http_client import get_pool_stats
+from api_service.job_queue import (
+    TERMINAL_STATUSES,
+    get_job,
+    get_job_queue_stats,
+    is_job_type,
+    register_job_handler,
+    start_job_workers,
+    submit_job,
+)
+from api_service.metrics import format_server_timing, render_metrics, start_request_timing
+from api_service.rate_limit import get_rate_limit_stats
+from api_service.resilience import get_circuit_breaker_stats
+from api_service.response_cache import get_response_cache_stats
+from api_service.singleflight import get_singleflight_stats
+from api_service.usage import get_usage_stats
+from api_service.web_search import get_web_search_stats
+from api_service.model_config import get_default_model, get_models, load_model_config
+from api_service.project_index import preload_project_index
+from backend.request_fields import (
+    QUESTION_REQUIRED_ERROR,
+    application_fields_error,
+    is_optional_non_negative_int,
+    read_application_fields,
+    read_question_chunk_size,
+)
+from pdf_service.pdf_generator import (
+    OUTPUT_DIR as PDF_OUTPUT_DIR,
+    build_letter_frame,
+    format_letter_date,
+    generate_cover_letter_pdf,
+    inline_cover_letter_pdf,
+    store_cover_letter_pdf,
+)
+from pdf_service import pdf_store
+from pdf_service.bulk_render import stream_pdf_zip
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -22,14 +68,296 @@ logging.basicConfig(
 logger = logging.getLogger('backend')
 
 app = Flask(__name__, static_folder='../frontend/build')
-CORS(app)
+CORS(app, expose_headers=['Content-Disposition'])
 
 load_model_config()
+preload_resume()
+preload_project_index()
 
 OPENROUTER_API_KEY = os.environ.get('OPENROUTER_API_KEY')
 if not OPENROUTER_API_KEY:
     logger.warning("OPENROUTER_API_KEY not set in environment")
 
+PDF_DOWNLOAD_MAX_AGE = 24 * 3600
+
+
+@app.before_request
+def start_stage_timing():
+    g.stage_timings = start_request_timing()
+
+
+@app.after_request
+def add_server_timing(response):
+    # Streamed responses send their headers before any stage runs, so they carry no timings.
+    timings = g.get('stage_timings')
+    if timings:
+        response.headers['Server-Timing'] = format_server_timing(timings)
+        response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+
+def question_error_status(result):
+    return 400 if QUESTION_REQUIRED_ERROR in result['error'] else 500
+
+
+def wants_inline_pdf(data):
+    """True when the client asked for the PDF bytes in the response instead of a download filename."""
+    if data.get('inline') is True:
+        return True
+    return request.accept_mimetypes.best == 'application/pdf'
+
+
+JOB_EVENTS_POLL_INTERVAL = 0.5
+JOB_EVENTS_KEEPALIVE = 15
+# Browsers' EventSource reconnects this many milliseconds after the stream ends.
+JOB_EVENTS_RETRY_MS = 1000
+
+
+def run_cover_letter_job(data):
+    return generate_cover_letter(**read_application_fields(data))
+
+
+def run_cover_letter_pdf_job(data):
+    result = generate_cover_letter(**read_application_fields(data))
+    if 'error' not in result:
+        attach_cover_letter_file(result)
+    return result
+
+
+def run_question_answers_job(data):
+    chunk_size, _ = read_question_chunk_size(data)
+    return generate_job_question_answers(
+        questions=data.get('questions', ''), chunk_size=chunk_size, **read_application_fields(data)
+    )
+
+
+def run_pdf_job(data):
+    return {'coverLetterFile': generate_cover_letter_pdf(data)}
+
+
+JOB_HANDLERS = {
+    'cover_letter': run_cover_letter_job,
+    'cover_letter_pdf': run_cover_letter_pdf_job,
+    'question_answers': run_question_answers_job,
+    'pdf': run_pdf_job,
+}
+
+# Workers are started by the gunicorn post_worker_init hook or lazily by the job
+# routes, never on import: scripts and tests that import this module must not
+# claim jobs from the shared queue.
+for job_type, handler in JOB_HANDLERS.items():
+    register_job_handler(job_type, handler)
+
+
+def pdf_request_error(data):
+    """Return a 400 error message for an invalid PDF render body, or None."""
+    cover_letter = data.get('coverLetter')
+    if not isinstance(cover_letter, str) or not cover_letter.strip():
+        return 'coverLetter must be a non-empty string'
+    if not isinstance(data.get('personalInfo', {}), dict):
+        return 'personalInfo must be an object'
+    return None
+
+
+def job_request_error(job_type, data):
+    """Validate a job up front so bad input fails the submission, not the job."""
+    if not is_job_type(job_type):
+        return f"type must be one of: {', '.join(JOB_HANDLERS)}"
+    if job_type == 'pdf':
+        return pdf_request_error(data)
+
+    if job_type == 'question_answers':
+        if not str(data.get('questions', '')).strip():
+            return QUESTION_REQUIRED_ERROR
+        _, chunk_size_error = read_question_chunk_size(data)
+        if chunk_size_error:
+            return chunk_size_error
+    return application_fields_error(read_application_fields(data))
+
+
+def job_response(job):
+    """The client view of a job: no payload or lease details."""
+    return {
+        'id': job['id'],
+        'type': job['type'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'createdAt': job['createdAt'],
+        'startedAt': job['startedAt'],
+        'finishedAt': job['finishedAt'],
+        'result': job['result'],
+        'error': job['error'],
+        'links': {'self': f"/api/jobs/{job['id']}", 'events': f"/api/jobs/{job['id']}/events"},
+    }
+
+
+# Builds PDF header/signature flowables while the LLM call for the same request runs.
+LETTER_FRAME_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='letter-frame')
+
+# Sent before the upstream call starts so clients and proxies see the first
+# byte immediately instead of waiting for the first model token.
+SSE_PREAMBLE = ': stream opened\n\n'
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"{name} is not an integer; using {default}")
+        return default
+
+
+BATCH_DEFAULT_CONCURRENCY = env_int('BATCH_CONCURRENCY', 4)
+BATCH_MAX_CONCURRENCY = env_int('BATCH_MAX_CONCURRENCY', 16)
+BATCH_MAX_ITEMS = env_int('BATCH_MAX_ITEMS', 100)
+BULK_PDF_MAX_LETTERS = env_int('BULK_PDF_MAX_LETTERS', 200)
+# A job event stream holds a sync worker while open, so it is closed after this
+# long and the client reconnects (EventSource does so on its own) or polls.
+JOB_EVENTS_MAX_SECONDS = env_int('JOB_EVENTS_MAX_SECONDS', 25)
+
+
+def read_batch_request():
+    """
+    Return (jobs, shared_fields, concurrency) from a JSON array, a {"jobs": [...]}
+    object, or an NDJSON body with one job per line.
+    """
+    body = request.get_data(as_text=True) or ''
+    concurrency = request.args.get('concurrency')
+    shared = {}
+
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        jobs = [json.loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        payload = json.loads(body or '[]')
+        if isinstance(payload, dict):
+            jobs = payload.get('jobs')
+            concurrency = payload.get('concurrency', concurrency)
+            shared = {key: value for key, value in payload.items() if key not in ('jobs', 'concurrency')}
+        else:
+            jobs = payload
+
+    if not isinstance(jobs, list) or not jobs:
+        raise ValueError('Batch body must contain a non-empty list of jobs')
+    if len(jobs) > BATCH_MAX_ITEMS:
+        raise ValueError(f'Batch is limited to {BATCH_MAX_ITEMS} jobs')
+
+    if concurrency in (None, ''):
+        concurrency = BATCH_DEFAULT_CONCURRENCY
+    elif isinstance(concurrency, str) and concurrency.strip().isdigit():
+        concurrency = int(concurrency)
+    elif not is_optional_non_negative_int(concurrency):
+        raise ValueError('concurrency must be a non-negative integer')
+    return jobs, shared, max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+
+
+def read_bulk_letters():
+    """
+    Return (letters, shared_fields) from a JSON array of letters or a
+    {"letters": [...]} object whose other fields apply to every letter.
+    """
+    payload = json.loads(request.get_data(as_text=True) or '[]')
+    shared = {}
+    if isinstance(payload, dict):
+        letters = payload.get('letters')
+        shared = {key: value for key, value in payload.items() if key != 'letters'}
+    else:
+        letters = payload
+
+    if not isinstance(letters, list) or not letters:
+        raise ValueError('Bulk body must contain a non-empty list of letters')
+    if len(letters) > BULK_PDF_MAX_LETTERS:
+        raise ValueError(f'Bulk export is limited to {BULK_PDF_MAX_LETTERS} letters')
+    if not all(isinstance(letter, dict) for letter in letters):
+        raise ValueError('Each letter must be a JSON object')
+    return letters, shared
+
+
+def run_batch_job(index, job, shared):
+    if not isinstance(job, dict):
+        return {'index': index, 'status': 'error', 'error': 'Each job must be a JSON object'}
+
+    fields = read_application_fields({**shared, **job})
+    line = {'index': index, 'status': 'ok'}
+    if job.get('id') is not None:
+        line['id'] = job['id']
+
+    fields_error = application_fields_error(fields)
+    if fields_error:
+        return {**line, 'status': 'error', 'error': fields_error}
+
+    started = time.perf_counter()
+    result = generate_cover_letter(**fields)
+    line['elapsedMs'] = round((time.perf_counter() - started) * 1000)
+    if 'error' in result:
+        return {**line, 'status': 'error', 'error': result['error']}
+    return {**line, 'result': result}
+
+
+def holds_whole_worker():
+    """True under a sync gunicorn worker, where a long response blocks every other request to that worker."""
+    return not request.environ.get('wsgi.multithread', True)
+
+
+def queue_batch_jobs(jobs, shared):
+    """Submit each valid batch job to the job queue; return one NDJSON line per job, then a summary line."""
+    start_job_workers()
+    lines = []
+    for index, job in enumerate(jobs):
+        line = {'index': index, 'status': 'queued'}
+        if not isinstance(job, dict):
+            lines.append({**line, 'status': 'error', 'error': 'Each job must be a JSON object'})
+            continue
+        if job.get('id') is not None:
+            line['id'] = job['id']
+
+        payload = {**shared, **job}
+        request_error = job_request_error('cover_letter', payload)
+        if request_error:
+            lines.append({**line, 'status': 'error', 'error': request_error})
+            continue
+        lines.append({**line, 'job': job_response(submit_job('cover_letter', payload))})
+
+    failed = sum(line['status'] == 'error' for line in lines)
+    lines.append({'summary': {'total': len(jobs), 'queued': len(jobs) - failed, 'failed': failed}})
+    return ''.join(json.dumps(line) + '\n' for line in lines)
+
+
+def iter_batch_results(jobs, shared, concurrency):
+    """Yield one NDJSON line per job as it finishes, then a summary line."""
+    started = time.perf_counter()
+    failed = 0
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch')
+    try:
+        futures = {executor.submit(run_batch_job, index, job, shared): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            try:
+                line = future.result()
+            except Exception as e:
+                logger.error(f"Batch job {futures[future]} failed: {str(e)}")
+                line = {'index': futures[future], 'status': 'error', 'error': str(e)}
+            failed += line['status'] != 'ok'
+            yield json.dumps(line) + '\n'
+
+        yield json.dumps({'summary': {
+            'total': len(jobs),
+            'succeeded': len(jobs) - failed,
+            'failed': failed,
+            'concurrency': concurrency,
+            'elapsedMs': round((time.perf_counter() - started) * 1000),
+        }}) + '\n'
+    finally:
+        # Stop queued jobs if the client disconnects mid-stream.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -52,30 +380,137 @@ def get_model_catalog():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    try:
+        body, content_type = render_metrics()
+        return Response(body, content_type=content_type), 200
+    except Exception as e:
+        logger.error(f"Error rendering metrics: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/jobs', methods=['GET'])
+def job_queue_stats():
+    try:
+        return jsonify(get_job_queue_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading job queue stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/pdf-store', methods=['GET'])
+def pdf_store_stats():
+    try:
+        return jsonify(pdf_store.get_store_stats(PDF_OUTPUT_DIR)), 200
+    except Exception as e:
+        logger.error(f"Error loading PDF store stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/pool', methods=['GET'])
+def pool_stats():
+    try:
+        return jsonify(get_pool_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading connection pool stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/cache', methods=['GET'])
+def cache_stats():
+    try:
+        return jsonify(get_response_cache_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading response cache stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/circuit-breakers', methods=['GET'])
+def circuit_breaker_stats():
+    try:
+        return jsonify(get_circuit_breaker_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading circuit breaker stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/coalescing', methods=['GET'])
+def coalescing_stats():
+    try:
+        return jsonify(get_singleflight_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading request coalescing stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/hedging', methods=['GET'])
+def hedging_stats():
+    try:
+        return jsonify(get_hedging_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading hedging stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/usage', methods=['GET'])
+def usage_stats():
+    try:
+        return jsonify(get_usage_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading usage stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/rate-limits', methods=['GET'])
+def rate_limit_stats():
+    try:
+        return jsonify(get_rate_limit_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading rate limit stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/stats/web-search', methods=['GET'])
+def web_search_stats():
+    try:
+        return jsonify(get_web_search_stats()), 200
+    except Exception as e:
+        logger.error(f"Error loading web search stats: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_resume():
     try:
         logger.info("Received analyze request")
         data = request.get_json(silent=True) or {}
-        job_description = data.get('jobDescription', '')
-        company_name = data.get('companyName', '')
-        custom_instructions = data.get('customInstructions', '')
-        personal_info = data.get('personalInfo', {})
-        model = data.get('model') or get_default_model()
+        fields = read_application_fields(data)
+        model = fields['model']
         
-        logger.debug(f"Job description length: {len(job_description)}")
-        logger.debug(f"Company name: {company_name}")
-        logger.debug(f"Custom instructions length: {len(custom_instructions)}")
-        logger.debug(f"Personal info: {personal_info}")
+        logger.debug(f"Job description length: {len(fields['job_description'])}")
+        logger.debug(f"Company name: {fields['company_name']}")
+        logger.debug(f"Custom instructions length: {len(fields['custom_instructions'])}")
+        logger.debug(f"Personal info: {fields['personal_info']}")
         logger.debug(f"Selected model: {model}")
 
-        if not is_allowed_model(model):
-            return jsonify({
-                'error': f"Invalid model '{model}'. Please select a model from /api/models."
-            }), 400
+        fields_error = application_fields_error(fields)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
         
         logger.info("Processing request with AI service directly")
-        result = generate_cover_letter(job_description, company_name, custom_instructions, personal_info, model)
+        result = generate_cover_letter(**fields)
         
         if 'error' in result:
             logger.error(f"AI service error: {result['error']}")
@@ -91,43 +526,157 @@ def analyze_resume():
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
 
+@app.route('/api/analyze/stream', methods=['POST'])
+def analyze_resume_stream():
+    try:
+        logger.info("Received streaming analyze request")
+        data = request.get_json(silent=True) or {}
+        fields = read_application_fields(data)
+        model = fields['model']
+        logger.debug(f"Company name: {fields['company_name']}")
+        logger.debug(f"Selected model: {model}")
+
+        fields_error = application_fields_error(fields)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
+
+        def generate():
+            yield SSE_PREAMBLE
+            for event, payload in stream_cover_letter(**fields):
+                yield format_sse(event, payload)
+
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+    except Exception as e:
+        logger.error(f"Error in analyze_resume_stream: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+def attach_cover_letter_file(result, frame=None):
+    """Store the letter's PDF; a render failure is reported as pdfError so the generated letter is still returned."""
+    try:
+        result['coverLetterFile'] = store_cover_letter_pdf(result, frame)
+    except Exception as e:
+        logger.error(f"Error rendering cover letter PDF: {str(e)}")
+        logger.error(traceback.format_exc())
+        result['pdfError'] = f'Cover letter was generated but the PDF failed: {e}'
+    return result
+
+
+def start_letter_frame(fields):
+    """Build the PDF header and signature on a helper thread while the letter is generated."""
+    pdf_data = {'personalInfo': fields['personal_info'], 'companyName': fields['company_name']}
+    return LETTER_FRAME_EXECUTOR.submit(build_letter_frame, pdf_data, format_letter_date())
+
+
+@app.route('/api/analyze/pdf', methods=['POST'])
+def analyze_and_render():
+    try:
+        logger.info("Received analyze-and-render request")
+        data = request.get_json(silent=True) or {}
+        fields = read_application_fields(data)
+
+        fields_error = application_fields_error(fields)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
+
+        frame_future = start_letter_frame(fields)
+        result = generate_cover_letter(**fields)
+        if 'error' in result:
+            logger.error(f"AI service error: {result['error']}")
+            return jsonify(result), 500
+
+        attach_cover_letter_file(result, frame_future.result())
+        logger.info(f"Generated cover letter and PDF: {result.get('coverLetterFile')}")
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"Error in analyze_and_render: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+@app.route('/api/analyze/pdf/stream', methods=['POST'])
+def analyze_and_render_stream():
+    try:
+        logger.info("Received streaming analyze-and-render request")
+        data = request.get_json(silent=True) or {}
+        fields = read_application_fields(data)
+
+        fields_error = application_fields_error(fields)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
+
+        frame_future = start_letter_frame(fields)
+
+        def generate():
+            yield SSE_PREAMBLE
+            for event, payload in stream_cover_letter(**fields):
+                if event == 'done':
+                    attach_cover_letter_file(payload, frame_future.result())
+                yield format_sse(event, payload)
+
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+    except Exception as e:
+        logger.error(f"Error in analyze_and_render_stream: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    try:
+        logger.info("Received batch analyze request")
+        try:
+            jobs, shared, concurrency = read_batch_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if holds_whole_worker():
+            # Streaming the batch would tie up the worker for its whole run.
+            logger.info(f"Queueing {len(jobs)} batch jobs")
+            return Response(queue_batch_jobs(jobs, shared), status=202, mimetype='application/x-ndjson')
+
+        logger.info(f"Running {len(jobs)} batch jobs with concurrency {concurrency}")
+        return Response(
+            iter_batch_results(jobs, shared, concurrency),
+            mimetype='application/x-ndjson',
+            headers={'X-Accel-Buffering': 'no'},
+        )
+    except Exception as e:
+        logger.error(f"Error in analyze_batch: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
 @app.route('/api/answer-questions', methods=['POST'])
 def answer_questions():
     try:
         logger.info("Received question answering request")
         data = request.get_json(silent=True) or {}
-        job_description = data.get('jobDescription', '')
-        company_name = data.get('companyName', '')
-        custom_instructions = data.get('customInstructions', '')
-        personal_info = data.get('personalInfo', {})
+        fields = read_application_fields(data)
         questions = data.get('questions', '')
-        model = data.get('model') or get_default_model()
+        model = fields['model']
 
         logger.debug(f"Questions length: {len(str(questions))}")
-        logger.debug(f"Company name: {company_name}")
+        logger.debug(f"Company name: {fields['company_name']}")
         logger.debug(f"Selected model: {model}")
 
         if not str(questions).strip():
-            return jsonify({'error': 'Please provide at least one application question'}), 400
-
-        if not is_allowed_model(model):
-            return jsonify({
-                'error': f"Invalid model '{model}'. Please select a model from /api/models."
-            }), 400
-
-        result = generate_job_question_answers(
-            job_description,
-            company_name,
-            custom_instructions,
-            personal_info,
-            questions,
-            model,
-        )
+            return jsonify({'error': QUESTION_REQUIRED_ERROR}), 400
+
+        fields_error = application_fields_error(fields)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
+
+        chunk_size, chunk_size_error = read_question_chunk_size(data)
+        if chunk_size_error:
+            return jsonify({'error': chunk_size_error}), 400
+
+        result = generate_job_question_answers(questions=questions, chunk_size=chunk_size, **fields)
 
         if 'error' in result:
             logger.error(f"Question answering service error: {result['error']}")
-            status_code = 400 if 'Please provide at least one application question' in result['error'] else 500
-            return jsonify(result), status_code
+            return jsonify(result), question_error_status(result)
 
         logger.info("Successfully generated question answers")
         return jsonify(result), 200
@@ -136,6 +685,109 @@ def answer_questions():
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+@app.route('/api/answer-questions/stream', methods=['POST'])
+def answer_questions_stream():
+    try:
+        logger.info("Received streaming question answering request")
+        data = request.get_json(silent=True) or {}
+        fields = read_application_fields(data)
+        questions = data.get('questions', '')
+        logger.debug(f"Questions length: {len(str(questions))}")
+        logger.debug(f"Selected model: {fields['model']}")
+
+        if not str(questions).strip():
+            return jsonify({'error': QUESTION_REQUIRED_ERROR}), 400
+
+        fields_error = application_fields_error(fields)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
+
+        def generate():
+            yield SSE_PREAMBLE
+            for event, payload in stream_job_question_answers(questions=questions, **fields):
+                yield format_sse(event, payload)
+
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+    except Exception as e:
+        logger.error(f"Error in answer_questions_stream: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    try:
+        data = request.get_json(silent=True) or {}
+        job_type = data.get('type')
+        request_error = job_request_error(job_type, data)
+        if request_error:
+            return jsonify({'error': request_error}), 400
+
+        start_job_workers()
+        payload = {key: value for key, value in data.items() if key != 'type'}
+        job = submit_job(job_type, payload)
+        return jsonify(job_response(job)), 202, {'Location': f"/api/jobs/{job['id']}"}
+    except Exception as e:
+        logger.error(f"Error in create_job: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    try:
+        start_job_workers()
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job_response(job)), 200
+    except Exception as e:
+        logger.error(f"Error in job_status: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    try:
+        start_job_workers()
+        if get_job(job_id) is None:
+            return jsonify({'error': 'Job not found'}), 404
+
+        def generate():
+            yield SSE_PREAMBLE
+            yield f"retry: {JOB_EVENTS_RETRY_MS}\n\n"
+            last_status = None
+            last_sent = time.monotonic()
+            deadline = time.monotonic() + JOB_EVENTS_MAX_SECONDS
+            while True:
+                job = get_job(job_id)
+                if job is None:
+                    yield format_sse('error', {'error': 'Job not found'})
+                    return
+                if job['status'] in TERMINAL_STATUSES:
+                    yield format_sse('done', job_response(job))
+                    return
+                if time.monotonic() >= deadline:
+                    reconnect = {'id': job_id, 'status': job['status'], 'links': job_response(job)['links']}
+                    yield format_sse('reconnect', reconnect)
+                    return
+                if job['status'] != last_status:
+                    last_status = job['status']
+                    last_sent = time.monotonic()
+                    yield format_sse('status', {'id': job_id, 'status': job['status'], 'attempts': job['attempts']})
+                elif time.monotonic() - last_sent >= JOB_EVENTS_KEEPALIVE:
+                    # Keeps proxies from closing an idle connection during long jobs.
+                    last_sent = time.monotonic()
+                    yield ': keepalive\n\n'
+                time.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+    except Exception as e:
+        logger.error(f"Error in job_events: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
 @app.route('/api/generate-pdf', methods=['POST'])
 def generate_pdf():
     try:
@@ -143,6 +795,18 @@ def generate_pdf():
         data = request.json
         logger.debug(f"PDF generation data keys: {list(data.keys())}")
         
+        if wants_inline_pdf(data):
+            logger.info("Returning PDF inline")
+            filename, pdf_bytes = inline_cover_letter_pdf(data)
+            return send_file(
+                io.BytesIO(pdf_bytes),
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name=filename,
+                etag=pdf_store.digest_from_filename(filename),
+                max_age=0
+            )
+
         logger.info("Generating PDF directly using service")
         cover_letter_filename = generate_cover_letter_pdf(data)
         
@@ -157,18 +821,42 @@ def generate_pdf():
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+@app.route('/api/generate-pdf/bulk', methods=['POST'])
+def generate_pdf_bulk():
+    try:
+        try:
+            letters, shared = read_bulk_letters()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        logger.info(f"Rendering {len(letters)} PDFs into a ZIP archive")
+        return Response(
+            stream_with_context(stream_pdf_zip([{**shared, **letter} for letter in letters])),
+            mimetype='application/zip',
+            headers={'Content-Disposition': 'attachment; filename="cover_letters.zip"'}
+        )
+    except Exception as e:
+        logger.error(f"Error in generate_pdf_bulk: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
 @app.route('/api/download/<filename>')
 def download_file(filename):
     try:
         logger.info(f"Download request for file: {filename}")
-        file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pdf_service', 'output', filename)
-        logger.debug(f"Attempting to send file from: {file_path}")
-        
-        if not os.path.exists(file_path):
-            logger.error(f"File not found: {file_path}")
-            return jsonify({'error': 'File not found'}), 404
-            
-        return send_file(file_path, as_attachment=True)
+        digest = pdf_store.digest_from_filename(filename)
+        if digest is None:
+            return send_from_directory(PDF_OUTPUT_DIR, filename, as_attachment=True)
+
+        # Stored files never change under a given name, so the digest is a strong ETag.
+        response = send_from_directory(
+            PDF_OUTPUT_DIR, filename, as_attachment=True, etag=digest, max_age=PDF_DOWNLOAD_MAX_AGE
+        )
+        pdf_store.touch(os.path.join(PDF_OUTPUT_DIR, filename))
+        return response
+    except NotFound:
+        logger.error(f"File not found: {filename}")
+        return jsonify({'error': 'File not found'}), 404
     except Exception as e:
         logger.error(f"Error in download_file: {str(e)}")
         logger.error(traceback.format_exc())
@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import sys
+import traceback
+
+from asgiref.wsgi import WsgiToAsgi
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from api_service.ai_service import (
+    generate_cover_letter_async,
+    generate_job_question_answers_async,
+    stream_cover_letter_async,
+    stream_job_question_answers_async,
+)
+from api_service.http_client import aclose_async_http_client
+from api_service.metrics import format_server_timing, start_request_timing
+from backend.app import (
+    QUESTION_REQUIRED_ERROR,
+    SSE_HEADERS,
+    SSE_PREAMBLE,
+    app as flask_app,
+    application_fields_error,
+    format_sse,
+    question_error_status,
+    read_application_fields,
+    read_question_chunk_size,
+)
+
+logger = logging.getLogger('backend')
+
+# Everything that is not served natively below (static files, PDFs, model
+# catalog, CORS preflight) is handed to the Flask app unchanged.
+wsgi_app = WsgiToAsgi(flask_app)
+
+JSON_HEADERS = [
+    (b'content-type', b'application/json'),
+    (b'access-control-allow-origin', b'*'),
+]
+SSE_RESPONSE_HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'access-control-allow-origin', b'*'),
+] + [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in SSE_HEADERS.items()]
+
+
+async def read_json_body(receive):
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        more_body = message.get('more_body', False)
+
+    try:
+        return json.loads(b''.join(chunks) or b'{}') or {}
+    except ValueError:
+        return {}
+
+
+def server_timing_headers(timings):
+    if not timings:
+        return []
+    return [
+        (b'server-timing', format_server_timing(timings).encode('ascii')),
+        (b'timing-allow-origin', b'*'),
+    ]
+
+
+async def send_json(send, status, payload, timings=None):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': (
+            JSON_HEADERS
+            + [(b'content-length', str(len(body)).encode('ascii'))]
+            + server_timing_headers(timings)
+        ),
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def analyze_resume(data):
+    fields = read_application_fields(data)
+    fields_error = application_fields_error(fields)
+    if fields_error:
+        return 400, {'error': fields_error}
+
+    result = await generate_cover_letter_async(**fields)
+    if 'error' in result:
+        logger.error(f"AI service error: {result['error']}")
+        return 500, result
+    return 200, result
+
+
+async def answer_questions(data):
+    fields = read_application_fields(data)
+    questions = data.get('questions', '')
+    if not str(questions).strip():
+        return 400, {'error': QUESTION_REQUIRED_ERROR}
+
+    fields_error = application_fields_error(fields)
+    if fields_error:
+        return 400, {'error': fields_error}
+
+    chunk_size, chunk_size_error = read_question_chunk_size(data)
+    if chunk_size_error:
+        return 400, {'error': chunk_size_error}
+
+    result = await generate_job_question_answers_async(questions=questions, chunk_size=chunk_size, **fields)
+    if 'error' in result:
+        logger.error(f"Question answering service error: {result['error']}")
+        return question_error_status(result), result
+    return 200, result
+
+
+async def send_event_stream(send, events):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': SSE_RESPONSE_HEADERS})
+    await send({'type': 'http.response.body', 'body': SSE_PREAMBLE.encode('utf-8'), 'more_body': True})
+    async for event, payload in events:
+        await send({
+            'type': 'http.response.body',
+            'body': format_sse(event, payload).encode('utf-8'),
+            'more_body': True,
+        })
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def analyze_resume_stream(data):
+    fields = read_application_fields(data)
+    fields_error = application_fields_error(fields)
+    if fields_error:
+        return 400, {'error': fields_error}
+
+    return 200, stream_cover_letter_async(**fields)
+
+
+async def answer_questions_stream(data):
+    fields = read_application_fields(data)
+    questions = data.get('questions', '')
+    if not str(questions).strip():
+        return 400, {'error': QUESTION_REQUIRED_ERROR}
+
+    fields_error = application_fields_error(fields)
+    if fields_error:
+        return 400, {'error': fields_error}
+
+    return 200, stream_job_question_answers_async(questions=questions, **fields)
+
+
+ASYNC_ROUTES = {
+    '/api/analyze': analyze_resume,
+    '/api/analyze/stream': analyze_resume_stream,
+    '/api/answer-questions': answer_questions,
+    '/api/answer-questions/stream': answer_questions_stream,
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await aclose_async_http_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point: native async handlers for generation routes, Flask for the rest."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    handler = ASYNC_ROUTES.get(scope.get('path')) if scope['type'] == 'http' else None
+    if handler is None or scope['method'] != 'POST':
+        await wsgi_app(scope, receive, send)
+        return
+
+    timings = start_request_timing()
+    try:
+        data = await read_json_body(receive)
+        status, payload = await handler(data)
+    except Exception as e:
+        logger.error(f"Error in ASGI handler for {scope['path']}: {str(e)}")
+        logger.error(traceback.format_exc())
+        status, payload = 500, {'error': str(e), 'traceback': traceback.format_exc()}
+
+    if isinstance(payload, dict):
+        await send_json(send, status, payload, timings)
+    else:
+        await send_event_stream(send, payload)
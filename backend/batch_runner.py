@@ -0,0 +1,239 @@
+"""
+Offline batch runner for application requests.
+
+Reads a JSONL file where each line is an /api/analyze payload (or an
+/api/answer-questions payload when it has "questions"), generates the cover
+letter or answers on a thread pool, renders cover letter PDFs on a process
+pool, and appends one result line per request to an output JSONL file.
+Requests already recorded as "ok" in the output are skipped, so an
+interrupted run resumes where it stopped. Calls that were in flight when the
+run stopped still land in the response cache, so retrying them is cheap.
+
+    python -m backend.batch_runner applications.jsonl --output results.jsonl
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from api_service.ai_service import generate_cover_letter, generate_job_question_answers, preload_resume
+from api_service.metrics import disable_metrics
+from api_service.model_config import load_model_config
+from api_service.project_index import preload_project_index
+from backend.request_fields import application_fields_error, read_application_fields, read_question_chunk_size
+from pdf_service.pdf_generator import generate_cover_letter_pdf
+
+logger = logging.getLogger('batch_runner')
+
+
+def read_requests(input_path):
+    """Return (request_id, record) pairs; unparseable lines become error records."""
+    requests = []
+    with open(input_path, 'r', encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = {'_error': f'Invalid JSON on line {line_number}: {e}'}
+            if not isinstance(record, dict):
+                record = {'_error': f'Line {line_number} is not a JSON object'}
+            request_id = str(record.get('id') or record.get('request_id') or f'line-{line_number}')
+            requests.append((request_id, record))
+    return requests
+
+
+def read_completed_ids(output_path):
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, 'r', encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash; that request simply runs again.
+                continue
+            if entry.get('status') == 'ok':
+                completed.add(entry.get('id'))
+    return completed
+
+
+def generate(record):
+    """Run the LLM stage for one record and return (kind, result, elapsed_seconds)."""
+    if '_error' in record:
+        raise ValueError(record['_error'])
+
+    fields = read_application_fields(record)
+    fields_error = application_fields_error(fields)
+    if fields_error:
+        raise ValueError(fields_error)
+
+    started = time.perf_counter()
+    if record.get('questions'):
+        chunk_size, chunk_size_error = read_question_chunk_size(record)
+        if chunk_size_error:
+            raise ValueError(chunk_size_error)
+        kind = 'question_answers'
+        result = generate_job_question_answers(questions=record['questions'], chunk_size=chunk_size, **fields)
+    else:
+        kind = 'cover_letter'
+        result = generate_cover_letter(**fields)
+    elapsed = time.perf_counter() - started
+
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return kind, result, elapsed
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[position]
+
+
+class BatchRunner:
+    def __init__(self, output_path, llm_workers, pdf_workers, render_pdf):
+        self.output_path = output_path
+        self.llm_workers = llm_workers
+        self.pdf_workers = pdf_workers
+        self.render_pdf = render_pdf
+        self.latencies = {'llm': [], 'pdf': [], 'total': []}
+        self.counts = {'ok': 0, 'error': 0}
+
+    def write_entry(self, handle, entry):
+        handle.write(json.dumps(entry) + '\n')
+        handle.flush()
+        os.fsync(handle.fileno())
+        self.counts[entry['status']] += 1
+        if entry['status'] == 'ok':
+            self.latencies['total'].append(entry['latencyMs']['total'])
+        logger.info(f"[{entry['status']}] {entry['id']}")
+
+    def run(self, pending):
+        # spawn: the LLM threads are already running when PDF workers start.
+        pdf_context = multiprocessing.get_context('spawn')
+        llm_pool = ThreadPoolExecutor(max_workers=self.llm_workers, thread_name_prefix='llm')
+        pdf_pool = ProcessPoolExecutor(
+            max_workers=self.pdf_workers, mp_context=pdf_context, initializer=disable_metrics
+        ) if self.render_pdf else None
+        in_flight = {}
+
+        try:
+            with open(self.output_path, 'a', encoding='utf-8') as handle:
+                for request_id, record in pending:
+                    future = llm_pool.submit(generate, record)
+                    in_flight[future] = ('llm', request_id, time.perf_counter(), None)
+
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, request_id, started, state = in_flight.pop(future)
+                        self.handle_done(handle, future, stage, request_id, started, state, pdf_pool, in_flight)
+        finally:
+            llm_pool.shutdown(wait=False, cancel_futures=True)
+            if pdf_pool is not None:
+                pdf_pool.shutdown(wait=False, cancel_futures=True)
+
+    def handle_done(self, handle, future, stage, request_id, started, state, pdf_pool, in_flight):
+        try:
+            if stage == 'llm':
+                kind, result, llm_elapsed = future.result()
+                self.latencies['llm'].append(round(llm_elapsed * 1000))
+                if kind == 'cover_letter' and pdf_pool is not None:
+                    pdf_future = pdf_pool.submit(generate_cover_letter_pdf, result)
+                    in_flight[pdf_future] = ('pdf', request_id, started, (kind, result, llm_elapsed, time.perf_counter()))
+                    return
+                pdf_file, pdf_elapsed = None, None
+            else:
+                kind, result, llm_elapsed, pdf_started = state
+                pdf_file = future.result()
+                pdf_elapsed = time.perf_counter() - pdf_started
+                self.latencies['pdf'].append(round(pdf_elapsed * 1000))
+        except Exception as e:
+            self.write_entry(handle, {'id': request_id, 'status': 'error', 'stage': stage, 'error': str(e)})
+            return
+
+        entry = {
+            'id': request_id,
+            'status': 'ok',
+            'kind': kind,
+            'result': result,
+            'latencyMs': {
+                'llm': round(llm_elapsed * 1000),
+                'pdf': round(pdf_elapsed * 1000) if pdf_elapsed is not None else None,
+                'total': round((time.perf_counter() - started) * 1000),
+            },
+        }
+        if pdf_file:
+            entry['pdfFile'] = pdf_file
+        self.write_entry(handle, entry)
+
+    def summary(self, elapsed, skipped):
+        processed = self.counts['ok'] + self.counts['error']
+        lines = [
+            f"Processed {processed} requests in {elapsed:.1f}s "
+            f"({self.counts['ok']} ok, {self.counts['error']} failed, {skipped} already done)",
+            f"Throughput: {processed / elapsed if elapsed else 0:.2f} requests/s",
+        ]
+        for stage, values in self.latencies.items():
+            if values:
+                lines.append(
+                    f"{stage} latency ms: p50={percentile(values, 0.5)} "
+                    f"p95={percentile(values, 0.95)} max={max(values)}"
+                )
+        return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate cover letters or answers for a JSONL file of applications.')
+    parser.add_argument('input', help='JSONL file with one application request per line')
+    parser.add_argument('--output', help='Checkpoint/result JSONL file (default: <input>.results.jsonl)')
+    parser.add_argument('--llm-workers', type=int, default=4, help='Concurrent OpenRouter calls')
+    parser.add_argument('--pdf-workers', type=int, default=max(1, (os.cpu_count() or 2) - 1), help='PDF render processes')
+    parser.add_argument('--no-pdf', action='store_true', help='Skip PDF rendering for cover letters')
+    args = parser.parse_args(argv)
+
+    # force: importing the services already configured the root logger at DEBUG.
+    logging.basicConfig(
+        level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', force=True
+    )
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+
+    # The runner serves no /metrics, and gunicorn does not track it or its render processes.
+    disable_metrics()
+    load_model_config()
+    preload_resume()
+    preload_project_index()
+
+    requests = read_requests(args.input)
+    completed = read_completed_ids(output_path)
+    pending = [(request_id, record) for request_id, record in requests if request_id not in completed]
+    skipped = len(requests) - len(pending)
+    logger.info(f"{len(pending)} pending, {skipped} already completed in {output_path}")
+
+    runner = BatchRunner(output_path, args.llm_workers, args.pdf_workers, not args.no_pdf)
+    started = time.perf_counter()
+    interrupted = False
+    try:
+        runner.run(pending)
+    except KeyboardInterrupt:
+        interrupted = True
+        logger.warning("Interrupted; finished requests are checkpointed and will be skipped on the next run")
+
+    print(runner.summary(time.perf_counter() - started, skipped))
+    return 130 if interrupted else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
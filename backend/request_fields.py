@@ -0,0 +1,54 @@
+"""
+Readers and validators for the request fields shared by the API routes and
+the offline batch runner, so both accept the same payloads with the same
+error messages.
+"""
+from api_service.model_config import get_default_model, is_allowed_model
+
+QUESTION_REQUIRED_ERROR = 'Please provide at least one application question'
+
+
+def read_application_fields(data):
+    """Pull the shared generation fields out of a request body."""
+    return {
+        'job_description': data.get('jobDescription', ''),
+        'company_name': data.get('companyName', ''),
+        'custom_instructions': data.get('customInstructions', ''),
+        'personal_info': data.get('personalInfo', {}),
+        'model': data.get('model') or get_default_model(),
+        'project_limit': data.get('projectLimit'),
+        'debug': bool(data.get('debug')),
+        'use_cache': not data.get('noCache'),
+        'web_search': data.get('webSearch'),
+        'refresh_research': bool(data.get('refreshResearch')),
+    }
+
+
+def invalid_model_error(model):
+    return f"Invalid model '{model}'. Please select a model from /api/models."
+
+
+def is_optional_non_negative_int(value):
+    return value is None or (not isinstance(value, bool) and isinstance(value, int) and value >= 0)
+
+
+def application_fields_error(fields):
+    """Return a 400 error message for invalid shared fields, or None."""
+    if not is_allowed_model(fields['model']):
+        return invalid_model_error(fields['model'])
+
+    if not is_optional_non_negative_int(fields['project_limit']):
+        return 'projectLimit must be a non-negative integer'
+
+    if fields['web_search'] is not None and not isinstance(fields['web_search'], bool):
+        return 'webSearch must be true, false or null'
+
+    return None
+
+
+def read_question_chunk_size(data):
+    """Return (chunk_size, error) for the optional chunkSize field of a question request."""
+    chunk_size = data.get('chunkSize')
+    if not is_optional_non_negative_int(chunk_size):
+        return None, 'chunkSize must be a non-negative integer'
+    return chunk_size, None
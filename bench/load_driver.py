@@ -0,0 +1,184 @@
+"""
+Load driver for the HTTP API.
+
+Sends a fixed number of requests to each endpoint at each concurrency level
+and reports throughput, p50/p95/p99 latency and the error rate. Every request
+body is unique, so the response cache, request coalescing and the PDF store
+do not turn the run into a cache benchmark (pass --repeat-bodies to measure
+the warm path instead). Run it against a server configured with the mock from
+bench/mock_openrouter.py to compare server modes without calling OpenRouter:
+
+    python -m bench.load_driver --base-url http://127.0.0.1:8080 \
+        --concurrency 1,8,32 --requests 200 --label wsgi --json wsgi.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+
+ENDPOINTS = {
+    'analyze': '/api/analyze',
+    'answer-questions': '/api/answer-questions',
+    'generate-pdf': '/api/generate-pdf',
+}
+PERSONAL_INFO = {
+    'name': 'Devang Borkar',
+    'email': 'devang@example.com',
+    'phone': '555-0100',
+}
+JOB_DESCRIPTION = (
+    'We are hiring a backend engineer to build and operate Python APIs, design data pipelines, '
+    'and improve latency and reliability across our services.'
+)
+QUESTIONS = [
+    'Why do you want to work here?',
+    'Describe a time you improved the performance of a system.',
+    'What is your experience with Python and distributed systems?',
+]
+COVER_LETTER = (
+    'Dear Hiring Manager,\n\nI am excited to apply for the backend engineer role. I have built and operated '
+    'Python services end to end and care about systems that stay fast under load.\n\nSincerely,\nDevang Borkar'
+)
+
+
+def build_payload(endpoint, index, model, unique):
+    suffix = f" (request {index})" if unique else ''
+    if endpoint == 'generate-pdf':
+        return {'coverLetter': COVER_LETTER + suffix, 'companyName': 'Acme', 'personalInfo': PERSONAL_INFO}
+
+    payload = {
+        'jobDescription': JOB_DESCRIPTION + suffix,
+        'companyName': 'Acme',
+        'personalInfo': PERSONAL_INFO,
+        'webSearch': False,
+        'noCache': unique,
+    }
+    if model:
+        payload['model'] = model
+    if endpoint == 'answer-questions':
+        payload['questions'] = QUESTIONS
+    return payload
+
+
+def send_request(client, url, payload):
+    """Return (seconds, error); error is None for a 2xx response without an "error" field."""
+    started = time.perf_counter()
+    try:
+        response = client.post(url, json=payload)
+        elapsed = time.perf_counter() - started
+    except httpx.HTTPError as e:
+        return time.perf_counter() - started, type(e).__name__
+
+    if response.status_code >= 400:
+        return elapsed, f"HTTP {response.status_code}"
+    if response.headers.get('content-type', '').startswith('application/json') and 'error' in response.json():
+        return elapsed, 'error in body'
+    return elapsed, None
+
+
+def run_level(client, base_url, endpoint, concurrency, requests, model, unique, offset):
+    url = base_url.rstrip('/') + ENDPOINTS[endpoint]
+    payloads = [build_payload(endpoint, offset + index, model, unique) for index in range(requests)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda payload: send_request(client, url, payload), payloads))
+    wall = time.perf_counter() - started
+
+    latencies = np.array([seconds for seconds, error in results if error is None])
+    errors = {}
+    for _, error in results:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+
+    summary = {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': requests,
+        'seconds': round(wall, 3),
+        'throughput': round(requests / wall, 2) if wall else None,
+        'error_rate': round(sum(errors.values()) / requests, 4) if requests else 0,
+        'errors': errors,
+    }
+    if latencies.size:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary.update({
+            'p50_ms': round(p50 * 1000, 1),
+            'p95_ms': round(p95 * 1000, 1),
+            'p99_ms': round(p99 * 1000, 1),
+        })
+    return summary
+
+
+def format_table(results):
+    header = f"{'endpoint':<18}{'conc':>6}{'reqs':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}"
+    lines = [header, '-' * len(header)]
+    for row in results:
+        lines.append(
+            f"{row['endpoint']:<18}{row['concurrency']:>6}{row['requests']:>7}{row['throughput']:>9}"
+            f"{row.get('p50_ms', '-'):>10}{row.get('p95_ms', '-'):>10}{row.get('p99_ms', '-'):>10}"
+            f"{row['error_rate']:>9.1%}"
+        )
+    return '\n'.join(lines)
+
+
+def parse_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure throughput and latency of the API at several concurrency levels.')
+    parser.add_argument('--base-url', default=os.environ.get('BENCH_BASE_URL', 'http://127.0.0.1:5000'))
+    parser.add_argument('--endpoints', type=parse_list, default=list(ENDPOINTS),
+                        help=f"Comma-separated subset of: {', '.join(ENDPOINTS)}")
+    parser.add_argument('--concurrency', type=lambda value: [int(item) for item in parse_list(value)],
+                        default=[1, 8, 32], help='Comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per endpoint and concurrency level')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per endpoint before the run')
+    parser.add_argument('--model', help='Model slug to request (default: the server default)')
+    parser.add_argument('--timeout', type=float, default=300.0, help='Per-request timeout in seconds')
+    parser.add_argument('--repeat-bodies', action='store_true',
+                        help='Send the same body every time so caches and the PDF store can answer')
+    parser.add_argument('--label', default='', help='Name for this run in the JSON output, e.g. the server mode')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    unknown = [endpoint for endpoint in args.endpoints if endpoint not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+
+    unique = not args.repeat_bodies
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    results = []
+    offset = 0
+    with httpx.Client(timeout=args.timeout, limits=limits) as client:
+        for endpoint in args.endpoints:
+            if args.warmup:
+                run_level(client, args.base_url, endpoint, 1, args.warmup, args.model, unique, offset)
+                offset += args.warmup
+            for concurrency in args.concurrency:
+                summary = run_level(
+                    client, args.base_url, endpoint, concurrency, args.requests, args.model, unique, offset
+                )
+                offset += args.requests
+                results.append(summary)
+                print(
+                    f"{endpoint} x{concurrency}: {summary['throughput']} req/s, "
+                    f"p95 {summary.get('p95_ms', '-')} ms, errors {summary['error_rate']:.1%}",
+                    file=sys.stderr,
+                )
+
+    print(format_table(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump({'label': args.label, 'base_url': args.base_url, 'results': results}, handle, indent=2)
+    return 1 if any(row['error_rate'] == 1 for row in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
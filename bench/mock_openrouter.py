@@ -0,0 +1,291 @@
+"""
+Local stand-in for the OpenRouter chat completions endpoint.
+
+Answers POST .../chat/completions with canned bodies: a cover letter, or a
+{"answers": [...]} object with one answer per question when the prompt has a
+"Questions:" block. Latency is drawn from a configurable distribution (per
+model if needed), "stream": true is answered with SSE chunks, and a share of
+requests can fail with retryable statuses or break off mid-stream. Responses
+include a usage block so token accounting works as it does upstream.
+
+    python -m bench.mock_openrouter --port 8999 --latency lognormal:1.2:0.4 \
+        --write-config /tmp/model.bench.yaml
+    MODEL_CONFIG_PATH=/tmp/model.bench.yaml gunicorn -b 0.0.0.0:8080 backend.app:app
+
+Latency specs: "fixed:S", "uniform:LOW:HIGH", "normal:MEAN:STDDEV" and
+"lognormal:MEDIAN:SIGMA", all in seconds.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from api_service.model_config import get_config_path
+
+logger = logging.getLogger('mock_openrouter')
+
+COVER_LETTER = """Dear Hiring Manager,
+
+I am excited to apply for this role. Over the last few years I have built and operated backend services end to end, from API design and data modelling to deployment, monitoring and on-call. I care about systems that stay fast and predictable under load, and about making them easy for the next engineer to change.
+
+In my recent projects I designed a retrieval pipeline that cut response times by more than half, moved a batch workload onto a job queue with retries and idempotent handlers, and added the metrics and dashboards the team now uses to catch regressions before users do. I work closely with product and design, and I am comfortable owning a feature from the first sketch to the post-launch review.
+
+I would welcome the chance to bring the same care to your team. Thank you for your time and consideration.
+
+Sincerely,
+Devang Borkar"""
+
+ANSWER_TEMPLATE = (
+    "In my last project I owned this end to end: I scoped the problem with the team, shipped a first version "
+    "within two weeks and measured the result against a clear baseline. {question}"
+)
+QUESTION_LINE = re.compile(r'^\s*\d+\.\s+(.*\S)\s*$')
+CHUNK_CHARS = 24
+
+
+def parse_latency(spec):
+    """Return a function that draws one latency in seconds from a spec like "uniform:0.2:1.5"."""
+    name, _, params = spec.partition(':')
+    values = [float(value) for value in params.split(':')] if params else []
+    samplers = {
+        'fixed': (1, lambda seconds: seconds),
+        'uniform': (2, lambda low, high: random.uniform(low, high)),
+        'normal': (2, lambda mean, stddev: random.gauss(mean, stddev)),
+        'lognormal': (2, lambda median, sigma: random.lognormvariate(math.log(median), sigma)),
+    }
+    if name not in samplers or len(values) != samplers[name][0]:
+        raise argparse.ArgumentTypeError(f"Invalid latency spec '{spec}'")
+    sampler = samplers[name][1]
+    return lambda: max(0.0, sampler(*values))
+
+
+def parse_model_latency(value):
+    slug, separator, spec = value.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError(f"Expected SLUG=SPEC, got '{value}'")
+    return slug, parse_latency(spec)
+
+
+def parse_statuses(value):
+    try:
+        return [int(status) for status in value.split(',') if status.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid status list '{value}'")
+
+
+def prompt_text(body):
+    """The text parts of the user message; the attached resume is ignored."""
+    messages = body.get('messages') or []
+    content = messages[-1].get('content') if messages else ''
+    if isinstance(content, str):
+        return content
+    return '\n'.join(part.get('text', '') for part in content if isinstance(part, dict))
+
+
+def build_content(prompt):
+    if 'Questions:\n' not in prompt:
+        return COVER_LETTER
+
+    questions = []
+    for line in prompt.split('Questions:\n', 1)[1].splitlines():
+        match = QUESTION_LINE.match(line)
+        if match:
+            questions.append(match.group(1))
+    answers = [{'question': question, 'answer': ANSWER_TEMPLATE.format(question=question)} for question in questions]
+    return json.dumps({'answers': answers})
+
+
+def build_usage(body, content):
+    prompt_tokens = math.ceil(len(json.dumps(body.get('messages') or [])) / 4)
+    completion_tokens = math.ceil(len(content) / 4)
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+        'cost': 0,
+    }
+
+
+class MockStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {'requests': 0, 'streams': 0, 'errors': 0, 'stream_errors': 0}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+
+def make_handler(settings, stats):
+    class ChatCompletionsHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def write_chunk(self, data):
+            encoded = data.encode('utf-8')
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(encoded), encoded))
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path.rstrip('/').endswith('/stats'):
+                with stats.lock:
+                    self.send_json(200, dict(stats.counts))
+                return
+            self.send_json(404, {'error': {'message': 'Not found'}})
+
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self.send_json(404, {'error': {'message': 'Not found'}})
+                return
+
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            model = body.get('model', '')
+            stats.count('requests')
+            time.sleep(settings['model_latency'].get(model, settings['latency'])())
+
+            if settings['error_statuses'] and random.random() < settings['error_rate']:
+                stats.count('errors')
+                status = random.choice(settings['error_statuses'])
+                headers = {'Retry-After': str(settings['retry_after'])} if settings['retry_after'] is not None else {}
+                self.send_json(status, {'error': {'code': status, 'message': 'Injected failure'}}, headers)
+                return
+
+            content = build_content(prompt_text(body))
+            usage = build_usage(body, content)
+            completion_id = f"gen-{uuid.uuid4().hex}"
+            if body.get('stream'):
+                self.stream_completion(completion_id, model, content, usage)
+                return
+
+            self.send_json(200, {
+                'id': completion_id,
+                'model': model,
+                'provider': 'mock',
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                'usage': usage,
+            })
+
+        def stream_completion(self, completion_id, model, content, usage):
+            stats.count('streams')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            chunks = [content[start:start + CHUNK_CHARS] for start in range(0, len(content), CHUNK_CHARS)]
+            fail_at = random.randrange(len(chunks)) if random.random() < settings['stream_error_rate'] else None
+            for index, chunk in enumerate(chunks):
+                if index == fail_at:
+                    stats.count('stream_errors')
+                    self.write_chunk(f"data: {json.dumps({'error': {'message': 'Injected stream failure'}})}\n\n")
+                    break
+                event = {'id': completion_id, 'model': model, 'choices': [{'index': 0, 'delta': {'content': chunk}}]}
+                self.write_chunk(f"data: {json.dumps(event)}\n\n")
+                time.sleep(settings['chunk_delay'])
+            else:
+                final = {'id': completion_id, 'model': model, 'provider': 'mock', 'choices': [], 'usage': usage}
+                self.write_chunk(f"data: {json.dumps(final)}\n\n")
+                self.write_chunk('data: [DONE]\n\n')
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+
+    return ChatCompletionsHandler
+
+
+def write_bench_config(output_path, base_url, keep_rate_limits):
+    """Copy the model config with base_url pointed at the mock."""
+    with open(get_config_path(), 'r', encoding='utf-8') as handle:
+        config = yaml.safe_load(handle)
+
+    config['openrouter']['base_url'] = base_url
+    if not keep_rate_limits:
+        # The client-side limits exist to protect the real API; against the mock they would cap throughput.
+        for model in config['openrouter']['models']:
+            model.pop('rate_limit', None)
+
+    with open(output_path, 'w', encoding='utf-8') as handle:
+        yaml.safe_dump(config, handle, sort_keys=False)
+    logger.info(f"Wrote benchmark model config to {output_path}")
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a mock OpenRouter chat completions endpoint for benchmarks.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8999)
+    parser.add_argument('--latency', type=parse_latency, default=parse_latency('fixed:0.5'),
+                        help='Time to the response (or first stream chunk), e.g. lognormal:1.2:0.4')
+    parser.add_argument('--model-latency', type=parse_model_latency, action='append', default=[],
+                        metavar='SLUG=SPEC', help='Latency for one model; repeatable')
+    parser.add_argument('--chunk-delay', type=float, default=0.02, help='Seconds between stream chunks')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests that fail')
+    parser.add_argument('--error-status', type=parse_statuses, default=[429, 503],
+                        help='Comma-separated statuses for failed requests')
+    parser.add_argument('--retry-after', type=float, help='Retry-After seconds sent with failures')
+    parser.add_argument('--stream-error-rate', type=float, default=0.0,
+                        help='Share of streams that break off with an error event')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    parser.add_argument('--write-config', metavar='PATH',
+                        help='Write a copy of the model config pointing at this mock, for MODEL_CONFIG_PATH')
+    parser.add_argument('--keep-rate-limits', action='store_true',
+                        help='Keep the per-model client rate limits in the written config')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    base_url = f"http://{args.host}:{args.port}/api/v1"
+    if args.write_config:
+        write_bench_config(args.write_config, base_url, args.keep_rate_limits)
+
+    settings = {
+        'latency': args.latency,
+        'model_latency': dict(args.model_latency),
+        'chunk_delay': args.chunk_delay,
+        'error_rate': args.error_rate,
+        'error_statuses': args.error_status,
+        'retry_after': args.retry_after,
+        'stream_error_rate': args.stream_error_rate,
+    }
+    server = MockServer((args.host, args.port), make_handler(settings, MockStats()))
+    logger.info(f"Mock OpenRouter listening on {base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
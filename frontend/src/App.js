@@ -224,7 +224,7 @@ function App() {
     setFile(null);
 
     try {
-      const analyzeResponse = await fetch(`${API_URL}/api/analyze`, {
+      const analyzeResponse = await fetch(`${API_URL}/api/analyze/pdf`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -239,33 +239,22 @@ function App() {
         return;
       }
 
-      const sanitizedData = {
+      setCoverLetterResult({
         ...analyzeData,
-        personalInfo: personalInfoForRequest(personalInfo),
-        companyName,
         coverLetter: typeof analyzeData.coverLetter === 'string'
           ? analyzeData.coverLetter
           : JSON.stringify(analyzeData.coverLetter)
-      };
-
-      setCoverLetterResult(sanitizedData);
-
-      const generateResponse = await fetch(`${API_URL}/api/generate-pdf`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(sanitizedData),
       });
 
-      const generateData = await generateResponse.json();
-
-      if (!generateResponse.ok || generateData.error) {
-        setPdfError(generateData.error || 'Failed to generate PDF');
+      if (!analyzeData.coverLetterFile) {
+        setPdfError(analyzeData.pdfError || 'Failed to generate PDF');
         return;
       }
 
-      setFile(generateData.coverLetterFile);
+      setFile({
+        url: `${API_URL}/api/download/${encodeURIComponent(analyzeData.coverLetterFile)}`,
+        name: analyzeData.coverLetterFile
+      });
     } catch (err) {
       console.error('Error during cover letter generation:', err);
       setError(err.message || 'An unexpected error occurred');
@@ -551,9 +540,9 @@ function App() {
             <h2>Download Cover Letter</h2>
             <div className="download-buttons">
               <a
-                href={`${API_URL}/api/download/${file}`}
+                href={file.url}
                 className="download-button"
-                download
+                download={file.name}
               >
                 Download Cover Letter PDF
               </a>
@@ -0,0 +1,36 @@
+import os
+import shutil
+import tempfile
+
+# prometheus_client picks its storage when it is first imported, so the
+# directory must be in the environment before any worker loads the app.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'cover-letter-metrics'))
+
+
+def on_starting(server):
+    # Samples from a previous run would be merged into this one's.
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    # Workers size their per-process pools from this.
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # The app, and with it the job handlers, is loaded by now.
+    from api_service.job_queue import start_job_workers
+
+    start_job_workers()
+
+
+def worker_exit(server, worker):
+    # Spawned render processes would otherwise outlive the worker that started them.
+    from pdf_service.bulk_render import shutdown_render_pool
+
+    shutdown_render_pool()
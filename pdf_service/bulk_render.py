@@ -0,0 +1,128 @@
+"""
+Bulk cover letter rendering on a process pool, streamed as a ZIP archive.
+
+ReportLab holds the GIL while it lays out a document, so threads cannot render
+several letters at once. Letters are rendered by a pool of worker processes
+and each PDF is written into the archive as soon as it finishes; the archive
+is produced chunk by chunk and never held in memory as a whole.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from api_service.metrics import disable_metrics
+from pdf_service.pdf_generator import get_cover_letter_pdf
+
+logger = logging.getLogger('pdf_service')
+
+_POOL_LOCK = threading.Lock()
+_POOL = None
+_POOL_PID = None
+
+
+def default_render_workers():
+    """The CPU count shared out across the server's worker processes, which each get their own pool."""
+    try:
+        server_workers = max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+    except ValueError:
+        server_workers = 1
+    return max(1, (os.cpu_count() or 1) // server_workers)
+
+
+def get_render_workers():
+    try:
+        return max(1, int(os.environ.get('PDF_RENDER_WORKERS', default_render_workers())))
+    except ValueError:
+        logger.warning("PDF_RENDER_WORKERS is not an integer; using the default")
+        return default_render_workers()
+
+
+def get_render_pool():
+    """Return this process's render pool, creating it on first use."""
+    global _POOL, _POOL_PID
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_PID != os.getpid():
+            # spawn: forking a worker that already runs request threads is unsafe.
+            _POOL = ProcessPoolExecutor(
+                max_workers=get_render_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=disable_metrics,
+            )
+            _POOL_PID = os.getpid()
+            logger.info(f"Started PDF render pool with {get_render_workers()} processes")
+        return _POOL
+
+
+def shutdown_render_pool():
+    """Stop this process's render pool, if it started one; called when a server worker exits."""
+    global _POOL, _POOL_PID
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_PID == os.getpid():
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            logger.info("Stopped PDF render pool")
+        _POOL = None
+        _POOL_PID = None
+
+
+class ZipChunkBuffer:
+    """Write-only file object that collects what zipfile writes until the stream drains it."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_pdf_zip(letters):
+    """
+    Yield a ZIP archive of rendered cover letters chunk by chunk.
+
+    Entries are named "<index>_<filename>" and added in completion order.
+    A letter that fails to render is reported in the trailing manifest.json
+    instead of failing the archive.
+    """
+    pool = get_render_pool()
+    futures = {pool.submit(get_cover_letter_pdf, letter): index for index, letter in enumerate(letters)}
+    width = len(str(len(letters)))
+    manifest = [None] * len(letters)
+    buffer = ZipChunkBuffer()
+
+    try:
+        with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    try:
+                        filename, pdf_bytes = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to render letter {index}: {e}")
+                        manifest[index] = {'index': index, 'status': 'error', 'error': str(e)}
+                        continue
+
+                    entry_name = f"{index + 1:0{width}d}_{filename}"
+                    archive.writestr(entry_name, pdf_bytes)
+                    manifest[index] = {'index': index, 'status': 'ok', 'file': entry_name}
+                    yield buffer.drain()
+
+            archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+        yield buffer.drain()
+    finally:
+        # Client went away or the archive failed: stop work nobody will read.
+        for future in futures:
+            future.cancel()
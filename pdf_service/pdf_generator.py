@@ -1,18 +1,16 @@
+import io
 import os
-import json
 import logging
 import traceback
 import re
-from flask import Flask, request, jsonify
-from flask_cors import CORS
 from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.pdfgen import canvas
-import uuid
 from datetime import datetime
 
+from api_service.metrics import stage
+from pdf_service import pdf_store
+
 logging.basicConfig(
     level=logging.DEBUG,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -23,6 +21,17 @@ OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 logger.info(f"Output directory set to: {OUTPUT_DIR}")
 
+# Compiled once per process; every render shares these read-only styles.
+STYLES = getSampleStyleSheet()
+NORMAL_STYLE = STYLES['Normal']
+SENDER_NAME_STYLE = ParagraphStyle(
+    name='SenderName',
+    parent=NORMAL_STYLE,
+    fontName='Helvetica-Bold',
+    fontSize=12,
+    alignment=0
+)
+
 def sanitize_filename(filename):
     """
     Sanitize a string to be safe for use as a filename.
@@ -41,108 +50,179 @@ def sanitize_filename(filename):
         filename = filename[:37]
     return filename
 
+def get_cover_letter_prefix(data):
+    """Readable start of the PDF filename: the sanitized company name when there is one."""
+    company_name = data.get('companyName', '').strip()
+    if company_name:
+        try:
+            sanitized_company = sanitize_filename(company_name)
+            if sanitized_company:  # Make sure sanitization didn't result in empty string
+                return f"cover_letter_{sanitized_company}"
+            raise ValueError("Sanitized company name is empty")
+        except Exception as e:
+            logger.warning(f"Failed to use company name in filename: {e}. Using the content hash only.")
+    return "cover_letter"
+
+def format_letter_date():
+    return datetime.now().strftime("%B %d, %Y")
+
+def get_cover_letter_filename(data, today):
+    """Content-addressed filename: identical render inputs on the same day map to the same file."""
+    return pdf_store.stored_filename(get_cover_letter_prefix(data), pdf_store.make_pdf_digest(data, today))
+
+def build_header_elements(data, today):
+    elements = []
+
+    personal_info = data.get('personalInfo', {})
+    company_name = data.get('companyName', 'Company Name')
+    logger.debug(f"Adding personal information to cover letter: {personal_info}")
+    logger.debug(f"Company name: {company_name}")
+
+    if personal_info:
+        name = personal_info.get('name', '')
+        if name:
+            elements.append(Paragraph(name, SENDER_NAME_STYLE))
+
+        if personal_info.get('email'):
+            elements.append(Paragraph(personal_info.get('email', ''), NORMAL_STYLE))
+        if personal_info.get('phone'):
+            elements.append(Paragraph(personal_info.get('phone', ''), NORMAL_STYLE))
+        if personal_info.get('address'):
+            elements.append(Paragraph(personal_info.get('address', ''), NORMAL_STYLE))
+        if personal_info.get('linkedin'):
+            elements.append(Paragraph(f"LinkedIn: {personal_info.get('linkedin', '')}", NORMAL_STYLE))
+        if personal_info.get('website'):
+            elements.append(Paragraph(f"Website: {personal_info.get('website', '')}", NORMAL_STYLE))
+
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(today, NORMAL_STYLE))
+        elements.append(Spacer(1, 20))
+
+        elements.append(Paragraph("Hiring Manager", NORMAL_STYLE))
+        elements.append(Paragraph(company_name, NORMAL_STYLE))
+        elements.append(Spacer(1, 20))
+
+        elements.append(Paragraph(f"Dear Hiring Manager at {company_name},", NORMAL_STYLE))
+        elements.append(Spacer(1, 10))
+
+    return elements
+
+def build_body_elements(cover_letter):
+    elements = []
+    logger.debug(f"Cover letter length: {len(cover_letter)}")
+
+    if not cover_letter:
+        logger.warning("Cover letter content is empty")
+        elements.append(Paragraph("No cover letter content provided.", NORMAL_STYLE))
+    else:
+        paragraphs = cover_letter.split('\n\n')
+        if len(paragraphs) == 1:
+            paragraphs = cover_letter.split('\n')
+
+        logger.debug(f"Number of paragraphs: {len(paragraphs)}")
+
+        for paragraph in paragraphs:
+            if paragraph.strip():
+                elements.append(Paragraph(paragraph.strip(), NORMAL_STYLE))
+                elements.append(Spacer(1, 10))
+
+    return elements
+
+def build_signature_elements(data):
+    personal_info = data.get('personalInfo', {})
+    elements = [
+        Spacer(1, 15),
+        Paragraph("Sincerely,", NORMAL_STYLE),
+        Spacer(1, 30),
+    ]
+    if personal_info and personal_info.get('name'):
+        elements.append(Paragraph(personal_info.get('name'), NORMAL_STYLE))
+    return elements
+
+def build_letter_frame(data, today):
+    """
+    Build the flowables that do not depend on the letter text.
+    Callers that know the sender and company before the text is ready can
+    build these while the letter is still being generated. A frame is used
+    by one render only: ReportLab keeps layout state on flowables.
+    """
+    return {
+        'today': today,
+        'header': build_header_elements(data, today),
+        'signature': build_signature_elements(data),
+    }
+
+def build_cover_letter_elements(data, today, frame=None):
+    frame = frame or build_letter_frame(data, today)
+    return frame['header'] + build_body_elements(data.get('coverLetter', '')) + frame['signature']
+
+def render_cover_letter_pdf(data, today=None, frame=None):
+    """Render the cover letter PDF in memory and return its bytes."""
+    try:
+        logger.info("Rendering cover letter PDF in memory")
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter)
+        elements = build_cover_letter_elements(data, today or format_letter_date(), frame)
+        with stage('pdf_build'):
+            doc.build(elements)
+        pdf_bytes = buffer.getvalue()
+        logger.info(f"Cover letter PDF rendered: {len(pdf_bytes)} bytes")
+        return pdf_bytes
+    except Exception as e:
+        logger.error(f"Error rendering cover letter PDF: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise
+
+def get_cover_letter_pdf(data):
+    """
+    Return (filename, pdf_bytes) for a cover letter.
+    Identical inputs reuse the stored render; a new render is added to the store.
+    """
+    today = format_letter_date()
+    filename = get_cover_letter_filename(data, today)
+    file_path = pdf_store.lookup(OUTPUT_DIR, filename)
+    if file_path:
+        logger.info(f"Reusing stored cover letter PDF: {filename}")
+        with open(file_path, 'rb') as handle:
+            return filename, handle.read()
+
+    pdf_bytes = render_cover_letter_pdf(data, today)
+    pdf_store.save(OUTPUT_DIR, filename, pdf_bytes)
+    return filename, pdf_bytes
+
+def inline_cover_letter_pdf(data):
+    """
+    Return (filename, pdf_bytes) for a response that carries the PDF itself.
+    Renders in memory and writes nothing; the filename matches the download path's.
+    """
+    today = format_letter_date()
+    return get_cover_letter_filename(data, today), render_cover_letter_pdf(data, today)
+
+def store_cover_letter_pdf(data, frame=None):
+    """
+    Make sure the cover letter PDF is in the store and return its filename.
+    A prebuilt frame from build_letter_frame is used when the render is needed.
+    """
+    today = frame['today'] if frame else format_letter_date()
+    filename = get_cover_letter_filename(data, today)
+    if pdf_store.lookup(OUTPUT_DIR, filename):
+        logger.info(f"Reusing stored cover letter PDF: {filename}")
+        return filename
+
+    pdf_store.save(OUTPUT_DIR, filename, render_cover_letter_pdf(data, today, frame))
+    logger.info(f"Cover letter PDF generated successfully: {filename}")
+    return filename
+
 def generate_cover_letter_pdf(data):
     """
     Service function to generate a cover letter PDF directly.
     This can be imported and used by other modules without Flask.
+    Stores the PDF in OUTPUT_DIR and returns its filename; identical inputs skip rendering.
     """
     try:
         logger.info("Generating cover letter PDF via service")
-        
-        # Try to use company name in filename, fallback to random ID
-        company_name = data.get('companyName', '').strip()
-        if company_name:
-            try:
-                sanitized_company = sanitize_filename(company_name)
-                if sanitized_company:  # Make sure sanitization didn't result in empty string
-                    filename = f"cover_letter_{sanitized_company}.pdf"
-                    logger.info(f"Using company name in filename: {filename}")
-                else:
-                    raise ValueError("Sanitized company name is empty")
-            except Exception as e:
-                logger.warning(f"Failed to use company name in filename: {e}. Falling back to random ID.")
-                filename = f"cover_letter_{uuid.uuid4().hex}.pdf"
-        else:
-            logger.info("No company name provided, using random ID in filename")
-            filename = f"cover_letter_{uuid.uuid4().hex}.pdf"
-        
-        file_path = os.path.join(OUTPUT_DIR, filename)
-        logger.debug(f"Cover letter PDF will be saved as: {file_path}")
-        
-        doc = SimpleDocTemplate(file_path, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
-        
-        personal_info = data.get('personalInfo', {})
-        company_name = data.get('companyName', 'Company Name')
-        logger.debug(f"Adding personal information to cover letter: {personal_info}")
-        logger.debug(f"Company name: {company_name}")
-        
-        if personal_info:
-            name = personal_info.get('name', '')
-            if name:
-                elements.append(Paragraph(name, ParagraphStyle(
-                    name='SenderName',
-                    parent=styles['Normal'],
-                    fontName='Helvetica-Bold',
-                    fontSize=12,
-                    alignment=0
-                )))
-                
-            if personal_info.get('email'):
-                elements.append(Paragraph(personal_info.get('email', ''), styles['Normal']))
-            if personal_info.get('phone'):
-                elements.append(Paragraph(personal_info.get('phone', ''), styles['Normal']))
-            if personal_info.get('address'):
-                elements.append(Paragraph(personal_info.get('address', ''), styles['Normal']))
-            if personal_info.get('linkedin'):
-                elements.append(Paragraph(f"LinkedIn: {personal_info.get('linkedin', '')}", styles['Normal']))
-            if personal_info.get('website'):
-                elements.append(Paragraph(f"Website: {personal_info.get('website', '')}", styles['Normal']))
-            
-            today = datetime.now().strftime("%B %d, %Y")
-            elements.append(Spacer(1, 20))
-            elements.append(Paragraph(today, styles['Normal']))
-            elements.append(Spacer(1, 20))
-            
-            elements.append(Paragraph("Hiring Manager", styles['Normal']))
-            elements.append(Paragraph(company_name, styles['Normal']))
-            elements.append(Spacer(1, 20))
-            
-            elements.append(Paragraph(f"Dear Hiring Manager at {company_name},", styles['Normal']))
-            elements.append(Spacer(1, 10))
-        
-        cover_letter = data.get('coverLetter', '')
-        logger.debug(f"Cover letter length: {len(cover_letter)}")
-        
-        if not cover_letter:
-            logger.warning("Cover letter content is empty")
-            elements.append(Paragraph("No cover letter content provided.", styles['Normal']))
-        else:
-            paragraphs = cover_letter.split('\n\n')
-            if len(paragraphs) == 1:
-                paragraphs = cover_letter.split('\n')
-                
-            logger.debug(f"Number of paragraphs: {len(paragraphs)}")
-            
-            for paragraph in paragraphs:
-                if paragraph.strip():
-                    elements.append(Paragraph(paragraph.strip(), styles['Normal']))
-                    elements.append(Spacer(1, 10))
-        
-        elements.append(Spacer(1, 15))
-        elements.append(Paragraph("Sincerely,", styles['Normal']))
-        elements.append(Spacer(1, 30)) 
-        
-        if personal_info and personal_info.get('name'):
-            elements.append(Paragraph(personal_info.get('name'), styles['Normal']))
-        
-        logger.info("Building PDF document")
-        doc.build(elements)
-        logger.info(f"Cover letter PDF generated successfully: {filename}")
-        return filename
+        return store_cover_letter_pdf(data)
     except Exception as e:
         logger.error(f"Error generating cover letter PDF: {str(e)}")
         logger.error(traceback.format_exc())
         raise
-
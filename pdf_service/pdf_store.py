@@ -0,0 +1,158 @@
+"""
+Content-addressed store for rendered cover letter PDFs.
+
+A PDF is saved under a hash of everything that affects its bytes (the letter,
+personal info, company name, the date printed on the letter and the layout
+version), so identical requests reuse one file instead of rendering again and
+two applicants to the same company never overwrite each other. The directory
+is capped by file count and total size; the least recently used files go first.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+logger = logging.getLogger('pdf_service')
+
+# Bump when the layout changes so old renders stop matching.
+RENDER_VERSION = 1
+DEFAULT_MAX_FILES = 5000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction scans the whole directory, so each process runs it on its first save and then every N saves.
+DEFAULT_EVICT_EVERY = 32
+DIGEST_LENGTH = 24
+STORED_FILENAME_PATTERN = re.compile(r'^cover_letter_(?:.+_)?([0-9a-f]{%d})\.pdf$' % DIGEST_LENGTH)
+
+_EVICT_LOCK = threading.Lock()
+_SAVE_COUNT_LOCK = threading.Lock()
+_save_count = 0
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"{name} is not an integer; using {default}")
+        return default
+
+
+def make_pdf_digest(data, today):
+    """Hash the render inputs of a cover letter PDF."""
+    inputs = {
+        'version': RENDER_VERSION,
+        'today': today,
+        'companyName': data.get('companyName', ''),
+        'coverLetter': data.get('coverLetter', ''),
+        'personalInfo': data.get('personalInfo') or {},
+    }
+    normalized = json.dumps(inputs, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:DIGEST_LENGTH]
+
+
+def stored_filename(prefix, digest):
+    """`prefix` is the human-readable part, e.g. "cover_letter_Acme"."""
+    return f"{prefix}_{digest}.pdf"
+
+
+def digest_from_filename(filename):
+    """The content digest of a stored file, or None for files not written by the store."""
+    match = STORED_FILENAME_PATTERN.match(filename)
+    return match.group(1) if match else None
+
+
+def touch(path):
+    """Mark a file as used now; eviction reads atime, which is set explicitly so noatime mounts do not matter."""
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError:
+        pass
+
+
+def lookup(directory, filename):
+    """Return the path of a stored PDF and mark it used, or None when it is not stored."""
+    path = os.path.join(directory, filename)
+    if not os.path.isfile(path):
+        return None
+    touch(path)
+    return path
+
+
+def _eviction_due():
+    global _save_count
+    every = max(1, _env_int('PDF_STORE_EVICT_EVERY', DEFAULT_EVICT_EVERY))
+    with _SAVE_COUNT_LOCK:
+        due = _save_count % every == 0
+        _save_count += 1
+    return due
+
+
+def save(directory, filename, pdf_bytes):
+    """Atomically write a PDF into the store, trimming the store to its caps every PDF_STORE_EVICT_EVERY saves."""
+    path = os.path.join(directory, filename)
+    temp_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+    with open(temp_path, 'wb') as handle:
+        handle.write(pdf_bytes)
+    os.replace(temp_path, path)
+
+    if _eviction_due():
+        # The PDF is already stored; a failed trim must not fail the request.
+        try:
+            evict(directory)
+        except OSError as e:
+            logger.warning(f"PDF store eviction failed: {e}")
+    return path
+
+
+def _stored_files(directory):
+    """(atime, size, path) of every stored PDF; files deleted by another process mid-scan are skipped."""
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.name.endswith('.pdf') and entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_atime, stat.st_size, entry.path))
+            except OSError:
+                continue
+    return files
+
+
+def evict(directory):
+    """Delete least recently used PDFs until the store is within PDF_STORE_MAX_FILES and PDF_STORE_MAX_BYTES."""
+    max_files = _env_int('PDF_STORE_MAX_FILES', DEFAULT_MAX_FILES)
+    max_bytes = _env_int('PDF_STORE_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+    with _EVICT_LOCK:
+        files = _stored_files(directory)
+        total_bytes = sum(size for _, size, _ in files)
+        if len(files) <= max_files and total_bytes <= max_bytes:
+            return 0
+
+        files.sort()
+        removed = 0
+        for _, size, path in files:
+            if len(files) - removed <= max_files and total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            removed += 1
+
+    logger.info(f"Evicted {removed} PDFs from {directory}")
+    return removed
+
+
+def get_store_stats(directory):
+    files = _stored_files(directory)
+    return {
+        'files': len(files),
+        'bytes': sum(size for _, size, _ in files),
+        'max_files': _env_int('PDF_STORE_MAX_FILES', DEFAULT_MAX_FILES),
+        'max_bytes': _env_int('PDF_STORE_MAX_BYTES', DEFAULT_MAX_BYTES),
+    }
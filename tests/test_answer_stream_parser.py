@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from api_service.ai_service import AnswerStreamParser, streamed_answer_events
+
+BODY = json.dumps(
+    {
+        "answers": [
+            {"question": "Why us?", "answer": "Your {data} team \"ships\" weekly."},
+            {"question": "Salary?", "answer": "Open, see ]notes[ \\ here."},
+        ]
+    }
+)
+
+
+def feed_in_pieces(parser, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start : start + size]))
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, len(BODY)])
+def test_answers_come_out_whole_however_the_body_is_split(size):
+    items = feed_in_pieces(AnswerStreamParser(), BODY, size)
+
+    assert items == [(index, answer) for index, answer in enumerate(json.loads(BODY)["answers"])]
+
+
+def test_an_answer_is_emitted_as_soon_as_its_object_closes():
+    parser = AnswerStreamParser()
+    first_end = BODY.index("},") + 1
+
+    assert parser.feed(BODY[:first_end - 1]) == []
+    assert parser.feed(BODY[first_end - 1 : first_end]) == [(0, json.loads(BODY)["answers"][0])]
+
+
+def test_text_before_the_answers_array_is_ignored():
+    parser = AnswerStreamParser()
+    body = '```json\n{"note": "{not an answer}", "answers": [{"answer": "Yes"}]}\n```'
+
+    assert feed_in_pieces(parser, body, 5) == [(0, {"answer": "Yes"})]
+
+
+def test_nothing_after_the_array_closes_is_parsed():
+    parser = AnswerStreamParser()
+
+    assert parser.feed('{"answers": [{"answer": "A"}], "extra": [{"answer": "B"}]}') == [(0, {"answer": "A"})]
+    assert parser.closed
+
+
+def test_invalid_objects_keep_their_slot():
+    parser = AnswerStreamParser()
+
+    assert parser.feed('{"answers": [{"answer": 01}, {"answer": "B"}]}') == [(0, None), (1, {"answer": "B"})]
+
+
+def test_streamed_answer_events_skip_invalid_and_extra_answers():
+    parser = AnswerStreamParser()
+    body = json.dumps({"answers": [{"answer": "First"}, {"answer": " "}, {"answer": "Third"}, {"answer": "Extra"}]})
+
+    events = streamed_answer_events(parser, body, ["Q1?", "Q2?", "Q3?"])
+
+    assert events == [
+        ("answer", {"index": 0, "question": "Q1?", "answer": "First"}),
+        ("answer", {"index": 2, "question": "Q3?", "answer": "Third"}),
+    ]
@@ -0,0 +1,117 @@
+import pytest
+
+from api_service import job_queue
+from api_service.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), lease_seconds=60, max_attempts=2, retention=3600)
+
+
+def test_jobs_are_claimed_oldest_first_and_only_once(queue, clock):
+    first = queue.submit("cover_letter", {"companyName": "Acme"})
+    clock.now += 1
+    second = queue.submit("cover_letter", {"companyName": "Globex"})
+
+    claimed = queue.claim("worker-a")
+    assert claimed["id"] == first["id"]
+    assert claimed["status"] == RUNNING
+    assert claimed["attempts"] == 1
+    assert claimed["payload"] == {"companyName": "Acme"}
+    assert queue.claim("worker-b")["id"] == second["id"]
+    assert queue.claim("worker-c") is None
+    assert queue.get(second["id"])["status"] == RUNNING
+
+
+def test_an_expired_lease_lets_another_worker_reclaim_the_job(queue, clock):
+    job = queue.submit("cover_letter", {})
+    queue.claim("dead-worker")
+    clock.now += 59
+    assert queue.claim("worker-b") is None
+
+    clock.now += 1
+    reclaimed = queue.claim("worker-b")
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["attempts"] == 2
+
+    queue.finish(job["id"], "dead-worker", result={"coverLetter": "stale"})
+    assert queue.get(job["id"])["status"] == RUNNING
+    queue.finish(job["id"], "worker-b", result={"coverLetter": "fresh"})
+    assert queue.get(job["id"])["status"] == SUCCEEDED
+    assert queue.get(job["id"])["result"] == {"coverLetter": "fresh"}
+
+
+def test_renewing_keeps_the_lease(queue, clock):
+    job = queue.submit("cover_letter", {})
+    queue.claim("worker-a")
+    clock.now += 50
+    queue.renew([job["id"]], "worker-a")
+    clock.now += 50
+
+    assert queue.claim("worker-b") is None
+
+
+def test_a_job_that_keeps_losing_its_worker_fails(queue, clock):
+    job = queue.submit("cover_letter", {})
+    for owner in ("worker-a", "worker-b"):
+        assert queue.claim(owner)["id"] == job["id"]
+        clock.now += 61
+
+    assert queue.claim("worker-c") is None
+    failed = queue.get(job["id"])
+    assert failed["status"] == FAILED
+    assert failed["error"] == "Job was interrupted too many times"
+
+
+def test_purge_drops_only_old_finished_jobs(queue, clock):
+    done = queue.submit("cover_letter", {})
+    queue.claim("worker-a")
+    queue.finish(done["id"], "worker-a", error="upstream down")
+    waiting = queue.submit("cover_letter", {})
+    clock.now += 3601
+
+    assert queue.purge() == 1
+    assert queue.get(done["id"]) is None
+    assert queue.get(waiting["id"])["status"] == QUEUED
+    assert queue.stats()["jobs"] == {QUEUED: 1, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+
+
+@pytest.mark.parametrize(
+    "handler, status, result, error",
+    [
+        (lambda payload: {"echo": payload["n"]}, SUCCEEDED, {"echo": 1}, None),
+        (lambda payload: {"error": "Missing jobDescription"}, FAILED, None, "Missing jobDescription"),
+        (lambda payload: 1 / 0, FAILED, None, "division by zero"),
+    ],
+)
+def test_workers_record_the_handler_outcome(queue, monkeypatch, handler, status, result, error):
+    monkeypatch.setattr(job_queue, "_OWNER", "worker-a")
+    monkeypatch.setattr(job_queue, "_QUEUE", queue)
+    monkeypatch.setitem(job_queue._HANDLERS, "echo", handler)
+    job = job_queue.submit_job("echo", {"n": 1})
+
+    assert job_queue._work_once(queue)
+    assert not job_queue._work_once(queue)
+    finished = queue.get(job["id"])
+    assert (finished["status"], finished["result"], finished["error"]) == (status, result, error)
+
+
+def test_unknown_job_types_are_rejected():
+    with pytest.raises(ValueError, match="Unknown job type"):
+        job_queue.submit_job("no-such-job", {})
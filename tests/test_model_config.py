@@ -0,0 +1,59 @@
+import pytest
+
+from api_service import model_config
+
+
+SAMPLE = """
+# Top-level comment
+openrouter:
+  base_url: https://example.test/api/v1   # trailing comment
+  default_model: "vendor/model#1"
+  http:
+    http2: false
+    timeout: 12.5
+  models:
+    - label: First
+      slug: vendor/model#1
+      timeout: 90
+      rate_limit:
+        burst: 5
+    - label: 'Second # not a comment'
+      slug: ~vendor/second
+"""
+
+
+def test_fallback_parser_reads_nested_mappings_lists_and_scalars():
+    assert model_config._fallback_parse_model_yaml(SAMPLE) == {
+        "openrouter": {
+            "base_url": "https://example.test/api/v1",
+            "default_model": "vendor/model#1",
+            "http": {"http2": False, "timeout": 12.5},
+            "models": [
+                {"label": "First", "slug": "vendor/model#1", "timeout": 90, "rate_limit": {"burst": 5}},
+                {"label": "Second # not a comment", "slug": "~vendor/second"},
+            ],
+        }
+    }
+
+
+def test_fallback_parser_matches_pyyaml_on_the_shipped_config():
+    yaml = pytest.importorskip("yaml")
+    with open(model_config.DEFAULT_CONFIG_PATH, "r", encoding="utf-8") as handle:
+        raw_text = handle.read()
+
+    assert model_config._fallback_parse_model_yaml(raw_text) == yaml.safe_load(raw_text)
+
+
+def test_fallback_parser_rejects_unsupported_lines():
+    with pytest.raises(ValueError, match="unsupported line"):
+        model_config._fallback_parse_model_yaml("openrouter:\n  just a sentence\n")
+
+
+def test_load_model_config_without_pyyaml(monkeypatch):
+    monkeypatch.setattr(model_config, "yaml", None)
+    monkeypatch.setattr(model_config, "_CONFIG", None)
+
+    config = model_config.load_model_config(model_config.DEFAULT_CONFIG_PATH)
+
+    assert config["openrouter"]["default_model"] in {model["slug"] for model in config["openrouter"]["models"]}
+    assert model_config.is_allowed_model(config["openrouter"]["default_model"])
@@ -0,0 +1,135 @@
+import os
+import threading
+
+import pytest
+
+from pdf_service import pdf_store
+
+DATA = {"companyName": "Acme", "coverLetter": "Dear Acme,", "personalInfo": {"name": "Ada"}}
+
+
+@pytest.fixture(autouse=True)
+def store_limits(monkeypatch):
+    monkeypatch.setenv("PDF_STORE_MAX_FILES", "3")
+    monkeypatch.setenv("PDF_STORE_MAX_BYTES", "1000000")
+    monkeypatch.setenv("PDF_STORE_EVICT_EVERY", "1")
+
+
+def write_pdf(directory, name, size=10, atime=None):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    if atime is not None:
+        os.utime(path, (atime, atime))
+    return str(path)
+
+
+def test_digest_changes_with_every_render_input():
+    digest = pdf_store.make_pdf_digest(DATA, "October 17, 2026")
+
+    assert digest == pdf_store.make_pdf_digest(dict(reversed(list(DATA.items()))), "October 17, 2026")
+    assert digest != pdf_store.make_pdf_digest(DATA, "October 18, 2026")
+    assert digest != pdf_store.make_pdf_digest({**DATA, "coverLetter": "Dear team,"}, "October 17, 2026")
+    assert pdf_store.digest_from_filename(pdf_store.stored_filename("cover_letter_Acme", digest)) == digest
+    assert pdf_store.digest_from_filename("notes.pdf") is None
+
+
+def test_saved_pdfs_can_be_looked_up(tmp_path):
+    path = pdf_store.save(str(tmp_path), "cover_letter_Acme_abc.pdf", b"%PDF")
+
+    assert pdf_store.lookup(str(tmp_path), "cover_letter_Acme_abc.pdf") == path
+    assert pdf_store.lookup(str(tmp_path), "missing.pdf") is None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_evict_removes_least_recently_used_first(tmp_path):
+    for age, name in enumerate(["newest.pdf", "recent.pdf", "older.pdf", "oldest.pdf", "ancient.pdf"]):
+        write_pdf(tmp_path, name, atime=1_000_000 - age * 100)
+
+    assert pdf_store.evict(str(tmp_path)) == 2
+    assert sorted(os.listdir(tmp_path)) == ["newest.pdf", "older.pdf", "recent.pdf"]
+
+
+def test_evict_respects_the_byte_cap(tmp_path, monkeypatch):
+    monkeypatch.setenv("PDF_STORE_MAX_BYTES", "25")
+    write_pdf(tmp_path, "old.pdf", atime=1_000)
+    write_pdf(tmp_path, "new.pdf", size=20, atime=2_000)
+
+    assert pdf_store.evict(str(tmp_path)) == 1
+    assert os.listdir(tmp_path) == ["new.pdf"]
+
+
+def test_evict_tolerates_files_already_deleted_by_another_process(tmp_path, monkeypatch):
+    paths = [write_pdf(tmp_path, f"{name}.pdf", atime=1_000 + index) for index, name in enumerate("abcde")]
+    scan = pdf_store._stored_files
+
+    def scan_then_lose_the_oldest(directory):
+        files = scan(directory)
+        os.remove(paths[0])
+        return files
+
+    monkeypatch.setattr(pdf_store, "_stored_files", scan_then_lose_the_oldest)
+
+    assert pdf_store.evict(str(tmp_path)) == 2
+    assert sorted(os.listdir(tmp_path)) == ["c.pdf", "d.pdf", "e.pdf"]
+
+
+def test_scan_skips_files_deleted_mid_scan(tmp_path, monkeypatch):
+    for name in "abc":
+        write_pdf(tmp_path, f"{name}.pdf")
+    real_scandir = os.scandir
+
+    class DeletingScandir:
+        """Delete b.pdf after the directory listing is read but before it is stat'ed."""
+
+        def __init__(self, directory):
+            self.entries = list(real_scandir(directory))
+            os.remove(tmp_path / "b.pdf")
+
+        def __enter__(self):
+            return iter(self.entries)
+
+        def __exit__(self, *exc_info):
+            return False
+
+    monkeypatch.setattr(pdf_store.os, "scandir", DeletingScandir)
+
+    assert pdf_store.get_store_stats(str(tmp_path))["files"] == 2
+
+
+def test_eviction_and_stats_survive_concurrent_deletes(tmp_path, monkeypatch):
+    monkeypatch.setenv("PDF_STORE_MAX_FILES", "5")
+    directory = str(tmp_path)
+    stop = threading.Event()
+    errors = []
+
+    def delete_files():
+        # Another worker's eviction: it only ever removes stored PDFs, never in-progress temp files.
+        while not stop.is_set():
+            for name in os.listdir(directory):
+                if not name.endswith(".pdf"):
+                    continue
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def save_and_scan(worker):
+        try:
+            for index in range(200):
+                pdf_store.save(directory, f"cover_letter_{worker}_{index}.pdf", b"%PDF")
+                pdf_store.get_store_stats(directory)
+        except Exception as exc:
+            errors.append(exc)
+
+    deleter = threading.Thread(target=delete_files)
+    savers = [threading.Thread(target=save_and_scan, args=(worker,)) for worker in range(3)]
+    deleter.start()
+    for saver in savers:
+        saver.start()
+    for saver in savers:
+        saver.join(30)
+    stop.set()
+    deleter.join(5)
+
+    assert errors == []
+    assert pdf_store.get_store_stats(directory)["files"] <= 5
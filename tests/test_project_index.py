@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from api_service import project_index
+from api_service.project_index import ProjectIndexError, build_index, parse_projects
+
+
+SOURCE = r"""
+import something from './elsewhere';
+
+export const projects = [
+  // line comment
+  {
+    id: 'alpha',
+    title: "Alpha \"quoted\" tool",
+    role: `Lead`,
+    /* block
+       comment */
+    evidence: ['Cut latency by 40%', 'Café line\nbreak'],
+    bestForRoles: ["Backend"],
+    technologies: ['Python', 'C++',],
+    year: 2024,
+    score: -1.5e2,
+    active: true,
+    archived: false,
+    link: null,
+  },
+  {'id': "beta", "title": 'Beta', highlights: ['Shipped']},
+];
+
+export const other = 1;
+"""
+
+
+def test_parse_projects_reads_the_js_literal_subset():
+    alpha, beta = parse_projects(SOURCE)
+
+    assert alpha == {
+        "id": "alpha",
+        "title": 'Alpha "quoted" tool',
+        "role": "Lead",
+        "evidence": ["Cut latency by 40%", "Café line\nbreak"],
+        "bestForRoles": ["Backend"],
+        "technologies": ["Python", "C++"],
+        "year": 2024,
+        "score": -150.0,
+        "active": True,
+        "archived": False,
+        "link": None,
+    }
+    assert beta == {"id": "beta", "title": "Beta", "highlights": ["Shipped"]}
+
+
+def test_build_index_summarizes_each_project():
+    index = build_index(SOURCE)
+
+    assert [entry["id"] for entry in index["entries"]] == ["alpha", "beta"]
+    assert index["entries"][0]["roles"] == ["Lead", "Backend"]
+    assert index["entries"][1]["evidence"] == ["Shipped"]
+    assert len(index["source_sha256"]) == 64
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("const projects = [];", "could not find"),
+        ("export const projects = [\n  { id: 'a', title: `x ${y}` },\n];", "line 2: template literal"),
+        ("export const projects = [{ id: 'a', title: 'A' } { id: 'b' }];", "expected ',' or ']'"),
+        ("export const projects = [{ id: 'a', title: 'unterminated }];", "unterminated string"),
+        ("export const projects = [{ id: 'a', title: 'A', size: big }];", "unsupported value"),
+        ("export const projects = [];", "non-empty array"),
+        ("export const projects = [{ id: 'a', title: 'A' }, { id: 'a', title: 'B' }];", "duplicate project id"),
+        ("export const projects = [{ id: 'a', title: 'A', technologies: 'Python' }];", "must be a list of strings"),
+        ("export const projects = [{ id: 'a', title: '  ' }];", "title must be a non-empty string"),
+    ],
+)
+def test_parse_projects_rejects_malformed_banks(source, message):
+    with pytest.raises(ProjectIndexError, match=message):
+        parse_projects(source)
+
+
+def test_the_shipped_project_bank_parses():
+    with open(project_index.CONSTANTS_PATH, "r", encoding="utf-8") as handle:
+        index = build_index(handle.read())
+
+    assert index["projects"]
+    assert len({project["id"] for project in index["projects"]}) == len(index["projects"])
+
+
+def test_corrupt_or_stale_artifacts_are_ignored(tmp_path):
+    index = build_index(SOURCE)
+    artifact_path = tmp_path / "projects.index.json"
+
+    artifact_path.write_text("{not json", encoding="utf-8")
+    assert project_index._load_artifact(str(artifact_path), index["source_sha256"]) is None
+
+    artifact_path.write_text(json.dumps({"source_sha256": index["source_sha256"], "projects": []}), encoding="utf-8")
+    assert project_index._load_artifact(str(artifact_path), index["source_sha256"]) is None
+
+    artifact = {"source_sha256": index["source_sha256"], "projects": index["projects"]}
+    artifact_path.write_text(json.dumps(artifact), encoding="utf-8")
+    assert project_index._load_artifact(str(artifact_path), "0" * 64) is None
+
+    loaded = project_index._load_artifact(str(artifact_path), index["source_sha256"])
+    assert loaded["entries"] == index["entries"]
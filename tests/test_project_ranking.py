@@ -0,0 +1,89 @@
+import uuid
+
+import pytest
+
+from api_service import project_ranking
+from api_service.project_ranking import rank_projects, score_projects, tokenize
+
+
+def make_index(*projects):
+    entries = [
+        {
+            "id": project["id"],
+            "title": project["title"],
+            "roles": project.get("roles", []),
+            "technologies": project.get("technologies", []),
+            "evidence": project.get("evidence", []),
+        }
+        for project in projects
+    ]
+    # The ranking model is cached per fingerprint.
+    return {"fingerprint": uuid.uuid4().hex, "projects": list(projects), "entries": entries}
+
+
+INDEX = make_index(
+    {"id": "pipeline", "title": "Data pipeline", "technologies": ["Python", "Kafka"], "evidence": ["Streaming ETL"]},
+    {"id": "mobile", "title": "Mobile app", "technologies": ["Swift"], "evidence": ["Shipped an iOS app"]},
+    {"id": "engine", "title": "Game engine", "technologies": ["C++"], "evidence": ["Wrote a Kafka-style log"]},
+    {"id": "web", "title": "Web dashboard", "technologies": ["TypeScript", "React"], "evidence": ["Python backend"]},
+)
+
+
+@pytest.fixture
+def bank(monkeypatch):
+    monkeypatch.setattr(project_ranking, "get_project_index", lambda: INDEX)
+    return INDEX
+
+
+def test_tokenize_drops_stopwords_and_keeps_language_names():
+    assert tokenize("The C++ and C# engineers, with Python!") == ["c++", "c#", "engineers", "python"]
+
+
+def test_matching_fields_outrank_incidental_mentions():
+    scores = score_projects("Kafka streaming pipeline in Python", INDEX)
+
+    assert scores.argmax() == 0
+    # A technology match on "web" (evidence only) scores below the project that lists it as a technology.
+    assert scores[0] > scores[3] > 0
+    assert scores[1] == 0
+
+
+def test_title_terms_weigh_more_than_evidence_terms():
+    index = make_index(
+        {"id": "evidence", "title": "Tooling", "evidence": ["Built a compiler"]},
+        {"id": "title", "title": "Compiler", "evidence": ["Built tooling"]},
+    )
+
+    scores = score_projects("compiler", index)
+
+    assert scores[1] > scores[0] > 0
+
+
+def test_rank_projects_keeps_bank_order_and_reports_picks_by_score(bank):
+    ranking = rank_projects("Python Kafka", top_k=2)
+
+    assert ranking["total"] == 4
+    # "engine" and "web" tie on one evidence match each; the earlier one wins.
+    assert ranking["selected"] == [0, 2]
+    assert [pick["id"] for pick in ranking["picks"]] == ["pipeline", "engine"]
+    assert ranking["picks"][0]["score"] > ranking["picks"][1]["score"]
+
+
+@pytest.mark.parametrize("query, top_k", [("", 2), ("unrelated words only", 2), ("Python", 0), ("Python", 10)])
+def test_rank_projects_selects_everything_when_ranking_cannot_help(bank, query, top_k):
+    assert rank_projects(query, top_k=top_k)["selected"] == [0, 1, 2, 3]
+
+
+def test_equal_scores_keep_bank_order(monkeypatch):
+    index = make_index(*({"id": f"p{i}", "title": f"Project {i}", "evidence": ["Rust"]} for i in range(5)))
+    monkeypatch.setattr(project_ranking, "get_project_index", lambda: index)
+
+    assert rank_projects("rust", top_k=3)["selected"] == [0, 1, 2]
+
+
+def test_project_top_k_setting(monkeypatch):
+    monkeypatch.setenv("PROJECT_TOP_K", "3")
+    assert project_ranking.get_project_top_k() == 3
+
+    monkeypatch.setenv("PROJECT_TOP_K", "lots")
+    assert project_ranking.get_project_top_k() == project_ranking.DEFAULT_PROJECT_TOP_K
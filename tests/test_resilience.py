@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from api_service import resilience
+from api_service.resilience import (
+    OpenRouterError,
+    call_with_retries,
+    parse_retry_after,
+    stream_with_retries,
+    stream_with_retries_async,
+)
+
+MODEL = "vendor/primary"
+FALLBACK = "vendor/fallback"
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "_BREAKERS", {})
+    monkeypatch.setattr(
+        resilience,
+        "get_retry_settings",
+        lambda: {"max_attempts": 3, "base_delay": 0.0, "max_delay": 0.0, "max_retry_after": 5},
+    )
+    monkeypatch.setattr(
+        resilience, "get_circuit_breaker_settings", lambda: {"failure_threshold": 10, "reset_timeout": 30}
+    )
+    monkeypatch.setattr(resilience, "get_model_fallback", lambda slug: FALLBACK if slug == MODEL else None)
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+
+
+def flaky(failures, result="ok"):
+    """A call that raises each of `failures` in turn, then returns `result`."""
+    attempts = []
+
+    def call(target):
+        attempts.append(target)
+        if len(attempts) <= len(failures):
+            raise failures[len(attempts) - 1]
+        return result
+
+    return call, attempts
+
+
+def test_transient_failures_are_retried():
+    call, attempts = flaky([OpenRouterError(503), OpenRouterError(429)])
+
+    assert call_with_retries(MODEL, call) == "ok"
+    assert attempts == [MODEL] * 3
+
+
+def test_retries_stop_at_max_attempts():
+    call, attempts = flaky([OpenRouterError(500)] * 5)
+
+    with pytest.raises(OpenRouterError):
+        call_with_retries(MODEL, call)
+    assert len(attempts) == 3
+
+
+def test_client_errors_are_not_retried():
+    call, attempts = flaky([OpenRouterError(400)])
+
+    with pytest.raises(OpenRouterError):
+        call_with_retries(MODEL, call)
+    assert len(attempts) == 1
+
+
+def test_a_long_retry_after_is_not_waited_for():
+    call, attempts = flaky([OpenRouterError(429, retry_after=60)])
+
+    with pytest.raises(OpenRouterError):
+        call_with_retries(MODEL, call)
+    assert len(attempts) == 1
+
+
+def test_open_circuit_routes_to_the_fallback(monkeypatch):
+    monkeypatch.setattr(
+        resilience, "get_circuit_breaker_settings", lambda: {"failure_threshold": 2, "reset_timeout": 30}
+    )
+    call, attempts = flaky([OpenRouterError(502), OpenRouterError(502)])
+
+    assert call_with_retries(MODEL, call) == "ok"
+    assert attempts == [MODEL, MODEL, FALLBACK]
+
+
+def test_parse_retry_after_accepts_seconds_and_dates():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def flaky_stream(plan):
+    """open_stream whose n-th call yields plan[n]'s items, then raises its error if it has one."""
+    attempts = []
+
+    def open_stream(target):
+        items, error = plan[len(attempts)]
+        attempts.append(target)
+        yield from items
+        if error is not None:
+            raise error
+
+    return open_stream, attempts
+
+
+def test_stream_failing_before_output_is_retried():
+    open_stream, attempts = flaky_stream([([], OpenRouterError(503)), (["a", "b"], None)])
+
+    assert list(stream_with_retries(MODEL, open_stream)) == ["a", "b"]
+    assert len(attempts) == 2
+
+
+def test_stream_failing_after_output_is_not_retried():
+    open_stream, attempts = flaky_stream([(["a"], OpenRouterError(503)), (["a", "b"], None)])
+    received = []
+
+    with pytest.raises(OpenRouterError):
+        for item in stream_with_retries(MODEL, open_stream):
+            received.append(item)
+    assert received == ["a"]
+    assert len(attempts) == 1
+
+
+def test_async_stream_failing_after_output_is_not_retried(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", no_sleep)
+    plan = [([], OpenRouterError(503)), (["a"], OpenRouterError(503)), (["a", "b"], None)]
+    attempts = []
+
+    async def open_stream(target):
+        items, error = plan[len(attempts)]
+        attempts.append(target)
+        for item in items:
+            yield item
+        if error is not None:
+            raise error
+
+    async def consume():
+        received = []
+        with pytest.raises(OpenRouterError):
+            async for item in stream_with_retries_async(MODEL, open_stream):
+                received.append(item)
+        return received
+
+    assert asyncio.run(consume()) == ["a"]
+    assert len(attempts) == 2
@@ -0,0 +1,132 @@
+import time
+
+import pytest
+
+from api_service import response_cache
+from api_service.response_cache import (
+    CACHE_BYPASS,
+    CACHE_HIT,
+    CACHE_MISS,
+    ResponseCache,
+    make_cache_key,
+    run_cached,
+)
+
+
+def make_cache(tmp_path, **overrides):
+    settings = {
+        "path": str(tmp_path / "responses.sqlite3"),
+        "ttl": 60,
+        "max_entries": 100,
+        "max_bytes": 1_000_000,
+        "memory_entries": 8,
+        "memory_ttl": 60,
+    }
+    settings.update(overrides)
+    return ResponseCache(**settings)
+
+
+@pytest.fixture
+def shared_cache(tmp_path, monkeypatch):
+    """Point the process-wide cache at a temporary file."""
+    monkeypatch.setenv("RESPONSE_CACHE_PATH", str(tmp_path / "shared.sqlite3"))
+    monkeypatch.delenv("RESPONSE_CACHE_ENABLED", raising=False)
+    monkeypatch.delenv("SINGLEFLIGHT_CROSS_WORKER", raising=False)
+    monkeypatch.setattr(response_cache, "_CACHE", None)
+    return response_cache.get_response_cache()
+
+
+def test_cache_key_ignores_argument_order_but_not_values():
+    assert make_cache_key("cover_letter", a=1, b=[1, 2]) == make_cache_key("cover_letter", b=[1, 2], a=1)
+    assert make_cache_key("cover_letter", a=1) != make_cache_key("cover_letter", a=2)
+    assert make_cache_key("cover_letter", a=1) != make_cache_key("question_answers", a=1)
+
+
+def test_values_survive_a_new_process_view_of_the_file(tmp_path):
+    make_cache(tmp_path).set("key", {"answers": ["é"]})
+
+    other_worker = make_cache(tmp_path)
+    assert other_worker.get("key") == {"answers": ["é"]}
+    assert other_worker.stats()["disk_hits"] == 1
+
+
+def test_expired_entries_are_not_returned(tmp_path):
+    cache = make_cache(tmp_path, memory_entries=0)
+    cache.set("key", "value", ttl=-1)
+
+    assert cache.get("key") is None
+
+
+def test_min_created_at_skips_older_entries(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("key", "old")
+    started = time.time()
+
+    assert cache.get("key", min_created_at=started) is None
+    cache.set("key", "new")
+    assert cache.get("key", min_created_at=started) == "new"
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2, memory_entries=0)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_respects_the_byte_budget(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=50, memory_entries=0)
+    cache.set("a", "x" * 30)
+    cache.set("b", "y" * 30)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 30
+
+
+def test_lease_is_exclusive_until_released_or_expired(tmp_path):
+    cache = make_cache(tmp_path)
+
+    assert cache.try_acquire_lease("key", "worker-1", ttl=60)
+    assert cache.try_acquire_lease("key", "worker-1", ttl=60)
+    assert not cache.try_acquire_lease("key", "worker-2", ttl=60)
+    cache.release_lease("key", "worker-1")
+    assert cache.try_acquire_lease("key", "worker-2", ttl=-1)
+    assert cache.try_acquire_lease("key", "worker-3", ttl=60)
+
+
+def test_run_cached_reports_miss_then_hit(shared_cache):
+    calls = []
+    compute = lambda: calls.append(1) or "letter"
+
+    assert run_cached("key", compute) == ("letter", CACHE_MISS)
+    assert run_cached("key", compute) == ("letter", CACHE_HIT)
+    assert len(calls) == 1
+
+
+def test_run_cached_bypass_refreshes_the_stored_value(shared_cache):
+    run_cached("key", lambda: "old")
+
+    assert run_cached("key", lambda: "new", use_cache=False) == ("new", CACHE_BYPASS)
+    assert run_cached("key", lambda: "unused") == ("new", CACHE_HIT)
+
+
+def test_run_cached_with_the_cache_disabled(shared_cache, monkeypatch):
+    monkeypatch.setenv("RESPONSE_CACHE_ENABLED", "0")
+
+    assert run_cached("key", lambda: "fresh") == ("fresh", CACHE_BYPASS)
+    assert shared_cache.get("key") is None
+
+
+def test_run_cached_does_not_store_failures(shared_cache):
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError, match="upstream down"):
+        run_cached("key", fail)
+    assert run_cached("key", lambda: "ok") == ("ok", CACHE_MISS)
@@ -0,0 +1,286 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api_service import response_cache, singleflight
+from api_service.response_cache import CACHE_COALESCED, CACHE_HIT, CACHE_MISS, ResponseCache, stream_cached
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(singleflight, "LEASE_POLL_INTERVAL", 0.01)
+
+
+@pytest.fixture
+def shared_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESPONSE_CACHE_PATH", str(tmp_path / "shared.sqlite3"))
+    monkeypatch.delenv("RESPONSE_CACHE_ENABLED", raising=False)
+    monkeypatch.delenv("SINGLEFLIGHT_CROSS_WORKER", raising=False)
+    monkeypatch.setattr(response_cache, "_CACHE", None)
+    return response_cache.get_response_cache()
+
+
+def worker_cache(path):
+    """A second view of the cache file, as another gunicorn worker would have."""
+    return ResponseCache(str(path), ttl=60, max_entries=100, max_bytes=1_000_000, memory_entries=0, memory_ttl=60)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def coalesced_count():
+    return singleflight.get_singleflight_stats()["coalesced_local"]
+
+
+def test_do_runs_once_for_concurrent_callers():
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "letter"
+
+    def call():
+        results.append(singleflight.do("do-key", compute))
+
+    before = coalesced_count()
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    threads[0].start()
+    wait_until(lambda: calls)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: coalesced_count() - before == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("letter", False)] + [("letter", True)] * 3
+    assert singleflight.get_singleflight_stats()["in_flight"] == 0
+
+
+def test_do_raises_the_leaders_error_for_every_caller():
+    release = threading.Event()
+    errors = []
+
+    def compute():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            singleflight.do("error-key", compute)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    before = coalesced_count()
+    leader = threading.Thread(target=call)
+    follower = threading.Thread(target=call)
+    leader.start()
+    wait_until(lambda: "error-key" in singleflight._CALLS)
+    follower.start()
+    wait_until(lambda: coalesced_count() - before == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["upstream down", "upstream down"]
+
+
+def test_do_async_shares_one_task():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answers"
+
+    async def main():
+        return await asyncio.gather(*(singleflight.do_async("async-key", compute) for _ in range(3)))
+
+    assert asyncio.run(main()) == [("answers", False), ("answers", True), ("answers", True)]
+    assert len(calls) == 1
+
+
+def test_wait_for_lease_returns_the_other_workers_result(tmp_path, monkeypatch):
+    path = tmp_path / "shared.sqlite3"
+    leader, follower = worker_cache(path), worker_cache(path)
+    assert leader.try_acquire_lease("key", "leader", ttl=60)
+    result = []
+
+    thread = threading.Thread(target=lambda: result.append(singleflight.wait_for_lease(
+        "key",
+        lambda: follower.try_acquire_lease("key", "follower", ttl=60),
+        lambda: follower.get("key"),
+    )))
+    thread.start()
+    time.sleep(0.05)
+    assert not result
+    leader.set("key", "letter")
+    leader.release_lease("key", "leader")
+    thread.join(5)
+
+    assert result == [("letter", False)]
+
+
+def test_wait_for_lease_gives_up_after_the_lease_ttl(tmp_path, monkeypatch):
+    monkeypatch.setenv("SINGLEFLIGHT_LEASE_TTL", "0.05")
+    cache = worker_cache(tmp_path / "shared.sqlite3")
+    cache.try_acquire_lease("key", "stuck-worker", ttl=60)
+
+    value = singleflight.wait_for_lease(
+        "key", lambda: cache.try_acquire_lease("key", "me", ttl=60), lambda: cache.get("key")
+    )
+
+    assert value == (None, False)
+
+
+def test_cross_worker_callers_compute_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("SINGLEFLIGHT_CROSS_WORKER", "1")
+    path = tmp_path / "shared.sqlite3"
+    release = threading.Event()
+    calls = []
+    results = {}
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "letter"
+
+    def run(name):
+        cache = worker_cache(path)
+        results[name] = response_cache._compute_and_store(cache, "key", compute, use_cache=True)
+
+    first = threading.Thread(target=run, args=("first",))
+    second = threading.Thread(target=run, args=("second",))
+    first.start()
+    wait_until(lambda: calls)
+    second.start()
+    time.sleep(0.05)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(calls) == 1
+    assert results == {"first": ("letter", False), "second": ("letter", True)}
+
+
+def counting_stream(items, opened, closed):
+    def produce():
+        opened.append(1)
+        try:
+            yield from items
+        finally:
+            closed.append(1)
+    return produce
+
+
+def test_do_stream_late_joiner_replays_then_follows():
+    opened, closed = [], []
+    produce = counting_stream(["a", "b", "c"], opened, closed)
+
+    leader = singleflight.do_stream("stream-key", produce)
+    assert next(leader) == ("a", False)
+    follower = singleflight.do_stream("stream-key", produce)
+    assert next(follower) == ("a", True)
+
+    assert list(leader) == [("b", False), ("c", False)]
+    assert list(follower) == [("b", True), ("c", True)]
+    assert opened == [1]
+    assert singleflight.get_singleflight_stats()["in_flight"] == 0
+
+
+def test_do_stream_survives_the_leader_leaving():
+    opened, closed = [], []
+    produce = counting_stream(["a", "b", "c"], opened, closed)
+
+    leader = singleflight.do_stream("stream-key", produce)
+    next(leader)
+    follower = singleflight.do_stream("stream-key", produce)
+    assert next(follower) == ("a", True)
+    leader.close()
+
+    assert [item for item, _ in follower] == ["b", "c"]
+    assert opened == [1]
+
+
+def test_do_stream_closes_an_abandoned_stream():
+    opened, closed = [], []
+    reader = singleflight.do_stream("stream-key", counting_stream(["a", "b"], opened, closed))
+    next(reader)
+    reader.close()
+
+    assert closed == [1]
+    assert singleflight.get_singleflight_stats()["in_flight"] == 0
+
+
+def test_do_stream_raises_the_stream_error_for_every_reader():
+    def produce():
+        yield "a"
+        raise RuntimeError("stream cut")
+
+    leader = singleflight.do_stream("stream-key", produce)
+    next(leader)
+    follower = singleflight.do_stream("stream-key", produce)
+    next(follower)
+
+    for reader in (leader, follower):
+        with pytest.raises(RuntimeError, match="stream cut"):
+            next(reader)
+
+
+def test_do_stream_async_follower_outlives_a_cancelled_leader():
+    opened = []
+
+    async def produce():
+        opened.append(1)
+        for item in ["a", "b", "c"]:
+            await asyncio.sleep(0.01)
+            yield item
+
+    async def main():
+        leader_started = asyncio.Event()
+
+        async def lead():
+            async for _ in singleflight.do_stream_async("async-stream", produce):
+                leader_started.set()
+
+        async def follow():
+            await leader_started.wait()
+            return [item async for item, _ in singleflight.do_stream_async("async-stream", produce)]
+
+        leader = asyncio.ensure_future(lead())
+        follower = asyncio.ensure_future(follow())
+        await leader_started.wait()
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == ["a", "b", "c"]
+    assert opened == [1]
+
+
+def test_stream_cached_shares_and_stores_the_stream(shared_cache):
+    opened = []
+
+    def open_stream():
+        opened.append(1)
+        yield from ["Dear ", "team"]
+
+    leader = stream_cached("letter-key", open_stream, str.upper)
+    assert next(leader) == ("text", "Dear ")
+    follower = stream_cached("letter-key", open_stream, str.upper)
+    assert next(follower) == ("text", "Dear ")
+
+    assert list(leader) == [("text", "team"), ("value", ("DEAR TEAM", CACHE_MISS))]
+    assert list(follower) == [("text", "team"), ("value", ("DEAR TEAM", CACHE_COALESCED))]
+    assert list(stream_cached("letter-key", open_stream, str.upper)) == [("value", ("DEAR TEAM", CACHE_HIT))]
+    assert opened == [1]